@@ -1,7 +1,140 @@
+import gc
+import os
+import tempfile
+import threading
+from typing import Dict, Any, Optional
+
 from flask import Flask
 
-def create_app():
+DEFAULT_CONFIG = {
+    # Optional catalog files (see app/catalog.py) opened read-only at startup
+    'PROFILE_CATALOG': None,
+    'JOB_CATALOG': None,
+    # Optional engine artifact (see app/artifact.py) providing the skill
+    # embeddings, so the pre-trained model is only loaded for unseen skills
+    'ENGINE_ARTIFACT': os.environ.get('RECOMMENDER_ARTIFACT'),
+    # Admission control: oversized payloads and candidate lists get 413,
+    # requests beyond the concurrent scoring slots of a process get 429
+    'MAX_CONTENT_LENGTH': 32 * 1024 * 1024,
+    # Largest body a gzip/deflate request may inflate to, and the level used
+    # to compress responses for clients sending Accept-Encoding
+    'MAX_DECOMPRESSED_LENGTH': 256 * 1024 * 1024,
+    'COMPRESSION_LEVEL': 6,
+    'MAX_CANDIDATES': 10000,
+    'MAX_CONCURRENT_REQUESTS': 8,
+    # Time budget of a ranking when the request has no deadline_ms, and the
+    # largest budget a request may ask for (None = unlimited)
+    'DEFAULT_DEADLINE_MS': 60000,
+    'MAX_DEADLINE_MS': 120000,
+    # Cascade ranking cutoffs applied to every request (None = score every pair
+    # in full, {} = recommender.DEFAULT_CASCADE); requests may pass "cascade"
+    'CASCADE': None,
+    # Hybrid score weights, caps and cutoff overriding recommender.DEFAULT_SCORING
+    # (e.g. {"weights": {"tfidf": 0.3}}); requests may pass "scoring". Field
+    # weights (e.g. {"fields": {"experiences": 0.2}}) also score the free-text
+    # fields, whose vectors are then built when the catalogs are loaded
+    'SCORING': None,
+    # Chunked ranking with bounded memory: candidates are scored CHUNK_SIZE at a
+    # time (or as many as fit in CHUNK_MEMORY_LIMIT_MB) keeping only the top_k
+    # best (recommender.DEFAULT_CHUNK_TOP_K without top_k); None = in memory
+    'CHUNK_SIZE': None,
+    'CHUNK_MEMORY_LIMIT_MB': None,
+    # Coordinator mode: candidates-for-job queries without userProfiles are sent
+    # to every shard URL in parallel and merged; shards slower than
+    # SHARD_TIMEOUT_MS (or the request deadline) are left out
+    'SHARD_URLS': [u for u in os.environ.get('RECOMMENDER_SHARD_URLS', '').split(',') if u],
+    'SHARD_TIMEOUT_MS': 30000,
+    # Ranked lists of paginated requests (page_size) kept for later pages:
+    # at most RESULT_CACHE_SIZE lists, each for RESULT_CACHE_TTL seconds
+    'RESULT_CACHE_SIZE': 256,
+    'RESULT_CACHE_TTL': 300,
+    # Asynchronous bulk jobs (/jobs): worker threads per process, jobs waiting
+    # in the queue before submissions get 429, seconds finished jobs are kept
+    'JOB_DIR': os.path.join(tempfile.gettempdir(), 'recommender-jobs'),
+    'JOB_WORKERS': 2,
+    'JOB_QUEUE_DEPTH': 100,
+    'JOB_RETENTION': 3600,
+    # Identical recommendation requests in flight at the same time are scored
+    # once and share the result (see app/coalesce.py)
+    'COALESCE_REQUESTS': True,
+    # Shadow mode: on SHADOW_SAMPLE_RATE of the requests the candidates are ranked
+    # again in the background with the ranking options overridden by
+    # SHADOW_ENGINE (e.g. {"cascade": {}}) and compared to the served ranking;
+    # at most SHADOW_WORKERS comparisons run at a time (see app/shadow.py)
+    'SHADOW_ENGINE': None,
+    'SHADOW_SAMPLE_RATE': 0.0,
+    'SHADOW_WORKERS': 1,
+    # Token expected in X-Admin-Token for admin-only features (None disables them)
+    'ADMIN_TOKEN': os.environ.get('RECOMMENDER_ADMIN_TOKEN'),
+    # Per-request profiling (?profile=1) artifacts and how many are kept
+    'PROFILE_DIR': os.path.join(tempfile.gettempdir(), 'recommender-profiles'),
+    'PROFILE_RETENTION': 20,
+    'PROFILE_SAMPLE_INTERVAL_MS': 1.0,
+    # Seconds between two checks of the catalog and artifact files; a changed
+    # file is loaded in the background and swapped in (None = only reload
+    # through POST /admin/reload)
+    'RELOAD_WATCH_INTERVAL': None,
+}
+
+def create_app(config: Optional[Dict[str, Any]] = None):
     app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    if config:
+        app.config.update(config)
     from .api import api_bp
+    from .cache import RankingCache
+    from .coalesce import SingleFlight
+    from .jobs import jobs_bp, JobQueue
+    from .metrics import metrics_bp, Metrics
+    from .shadow import ShadowRunner
+    from .snapshot import snapshot_bp, SnapshotManager
     app.register_blueprint(api_bp)
-    return app 
\ No newline at end of file
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(snapshot_bp)
+    if app.config['MAX_CONCURRENT_REQUESTS']:
+        app.extensions['admission'] = threading.BoundedSemaphore(app.config['MAX_CONCURRENT_REQUESTS'])
+    app.extensions['jobs'] = JobQueue(app.config['JOB_DIR'], app.config['JOB_WORKERS'],
+                                      app.config['JOB_QUEUE_DEPTH'], app.config['JOB_RETENTION'])
+    app.extensions['results'] = RankingCache(app.config['RESULT_CACHE_SIZE'], app.config['RESULT_CACHE_TTL'])
+    app.extensions['metrics'] = Metrics()
+    if app.config['COALESCE_REQUESTS']:
+        app.extensions['coalesce'] = SingleFlight()
+        app.extensions['metrics'].describe('recommender_computed_requests_total', 'counter',
+                                           'Recommendation requests that ran the scoring')
+        app.extensions['metrics'].describe('recommender_coalesced_requests_total', 'counter',
+                                           'Recommendation requests served the result of an identical request in flight')
+    if app.config['SHADOW_ENGINE'] is not None and app.config['SHADOW_SAMPLE_RATE']:
+        app.extensions['shadow'] = ShadowRunner(app.config['SHADOW_ENGINE'], app.config['SHADOW_SAMPLE_RATE'],
+                                                app.extensions['metrics'], app.config['SHADOW_WORKERS'])
+    # Catalogs and engine artifact, swapped as a whole on reload (see app/snapshot.py)
+    app.extensions['snapshots'] = SnapshotManager(app)
+    app.extensions['snapshots'].reload(warm=False)
+    return app
+
+def create_prefork_app(config: Optional[Dict[str, Any]] = None):
+    """
+    Create the app in a parent process that is about to fork workers.
+    The artifact, catalogs and skill embeddings are loaded once here, then the
+    heap is frozen so the garbage collector does not touch (and copy) these
+    shared pages in the workers.
+    """
+    from .snapshot import warm_embeddings, publish_engine
+
+    # Keep collections from moving objects around until everything is loaded
+    gc.disable()
+    try:
+        app = create_app(config)
+
+        # Encode every catalog skill once in the parent so workers inherit the vectors;
+        # skills already in the artifact are not encoded again
+        warm_embeddings(app.extensions['snapshots'].current)
+        publish_engine(app.extensions['snapshots'].current)
+
+        gc.collect()
+        gc.freeze()
+    finally:
+        # Frozen objects are never collected; collect the rest as usual again,
+        # also when loading failed
+        gc.enable()
+    return app
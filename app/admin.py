@@ -0,0 +1,16 @@
+"""
+Admin authentication for operator-only features (profiling, reloads).
+
+Admin requests carry the configured ``ADMIN_TOKEN`` in the ``X-Admin-Token``
+header. Without a configured token every admin feature is disabled.
+"""
+
+import hmac
+
+from flask import current_app, request
+
+def is_admin_request() -> bool:
+    """True when the request carries the configured admin token"""
+    token = current_app.config.get('ADMIN_TOKEN')
+    provided = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(provided.encode('utf-8'), str(token).encode('utf-8'))
@@ -1,27 +1,252 @@
-from flask import Blueprint, request, jsonify
-from .recommender import match_jobs_for_candidate, match_candidates_for_job
+from flask import Blueprint, request, jsonify, current_app, g
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge, ServiceUnavailable
+from functools import wraps
+from typing import List, Dict, Any, Optional
+from .coalesce import request_key
+from .coordinator import scatter_gather
+from .filters import parse_filters, filter_records
+from .profiling import profiled
+from .transport import load_payload, encode_response, compress_response
+from .snapshot import current_snapshot
+from .recommender import match_jobs_for_candidate, match_candidates_for_job, rerank_components, resolve_scoring, DEFAULT_CASCADE
+import time
 import traceback
 
 api_bp = Blueprint('api', __name__)
+api_bp.after_request(compress_response)
+
+# Share of the remaining time budget given to shards, the rest covers transfer and merging
+SHARD_DEADLINE_SHARE = 0.9
+
+def admission_control(view):
+    """Reject oversized payloads (413) and requests beyond the concurrency limit (429) before any work"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.request_start = time.monotonic()
+        max_length = current_app.config.get('MAX_CONTENT_LENGTH')
+        if max_length and request.content_length and request.content_length > max_length:
+            print('ERROR: Payload too large:', request.content_length, 'bytes')
+            return jsonify({'error': f'Payload must not exceed {max_length} bytes'}), 413
+        
+        slots = current_app.extensions.get('admission')
+        if slots is not None and not slots.acquire(blocking=False):
+            print('ERROR: No free scoring slot, rejecting request')
+            response = jsonify({'error': 'Too many concurrent requests, retry later'})
+            response.headers['Retry-After'] = '1'
+            return response, 429
+        g.admission_slots = slots
+        try:
+            return view(*args, **kwargs)
+        except RequestEntityTooLarge:
+            # Bodies without Content-Length are only measured while reading
+            return jsonify({'error': f'Payload must not exceed {max_length} bytes'}), 413
+        finally:
+            release_admission_slot()
+    return wrapper
+
+def release_admission_slot() -> None:
+    """Give the request's scoring slot back early, e.g. while it only waits for a shared result"""
+    slots = g.pop('admission_slots', None)
+    if slots is not None:
+        slots.release()
+
+def reacquire_admission_slot() -> None:
+    """Take a scoring slot again before scoring after a wait, 503 when none is free"""
+    slots = current_app.extensions.get('admission')
+    if slots is None or 'admission_slots' in g:
+        return
+    if not slots.acquire(blocking=False):
+        print('ERROR: No free scoring slot after waiting for an identical request')
+        raise ServiceUnavailable('No free scoring slot, retry later')
+    g.admission_slots = slots
+
+def request_deadline(data: Dict[str, Any]) -> Optional[float]:
+    """Turn the payload's deadline_ms (or the server default) into a monotonic deadline"""
+    deadline_ms = data.get('deadline_ms', current_app.config.get('DEFAULT_DEADLINE_MS'))
+    max_deadline_ms = current_app.config.get('MAX_DEADLINE_MS')
+    if deadline_ms is None:
+        deadline_ms = max_deadline_ms
+    if deadline_ms is None:
+        return None
+    if isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float)) or deadline_ms < 0:
+        raise ValueError('deadline_ms must be a non-negative number')
+    if max_deadline_ms is not None:
+        deadline_ms = min(deadline_ms, max_deadline_ms)
+    return g.request_start + deadline_ms / 1000.0
+
+def request_top_k(data: Dict[str, Any]) -> Optional[int]:
+    top_k = data.get('top_k')
+    if top_k is None:
+        return None
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k <= 0:
+        raise ValueError('top_k must be a positive integer')
+    return top_k
+
+def request_cascade(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Cascade settings of the request: an object of cutoffs, true for the server settings, false to disable"""
+    cascade = data.get('cascade', current_app.config.get('CASCADE'))
+    if cascade is True:
+        return dict(current_app.config.get('CASCADE') or {})
+    if cascade is None or cascade is False:
+        return None
+    if not isinstance(cascade, dict) or set(cascade) - set(DEFAULT_CASCADE):
+        raise ValueError(f"cascade must be a boolean or an object with keys {sorted(DEFAULT_CASCADE)}")
+    for key, value in cascade.items():
+        if key == 'stage2_top_m' and value is not None and (isinstance(value, bool) or not isinstance(value, int) or value <= 0):
+            raise ValueError('cascade.stage2_top_m must be a positive integer or null')
+        if key != 'stage2_top_m' and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f'cascade.{key} must be a number')
+    return cascade
+
+def request_scoring(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Hybrid score weights, caps and cutoff: the server SCORING config overridden by the payload's scoring"""
+    return resolve_scoring(current_app.config.get('SCORING'), data.get('scoring'))
+
+def request_keep_components(data: Dict[str, Any]) -> bool:
+    keep_components = data.get('keep_components', False)
+    if not isinstance(keep_components, bool):
+        raise ValueError('keep_components must be a boolean')
+    return keep_components
+
+def request_page_size(data: Dict[str, Any]) -> Optional[int]:
+    page_size = data.get('page_size')
+    if page_size is None:
+        return None
+    if isinstance(page_size, bool) or not isinstance(page_size, int) or page_size <= 0:
+        raise ValueError('page_size must be a positive integer')
+    return page_size
+
+def ranking_options(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Optional ranking parameters of a payload, raises ValueError when invalid"""
+    options = {
+        'deadline': request_deadline(data),
+        'top_k': request_top_k(data),
+        'cascade': request_cascade(data),
+        'chunk_size': current_app.config.get('CHUNK_SIZE'),
+        'memory_limit_mb': current_app.config.get('CHUNK_MEMORY_LIMIT_MB'),
+        'scoring': request_scoring(data),
+        'keep_components': request_keep_components(data),
+        # The engine of the request's snapshot, unchanged by a reload in flight
+        'engine': current_snapshot().engine,
+    }
+    if options['keep_components'] and (options['chunk_size'] or options['memory_limit_mb']):
+        raise ValueError('keep_components is not available with chunked ranking')
+    return options
+
+def candidate_records(data: Dict[str, Any], key: str, kind: str, filters: Optional[Dict[str, List[str]]]):
+    """
+    Records to rank: the payload list, or the stored catalog when the payload
+    has none. Filters are applied before scoring, on the catalog through its
+    posting lists so only the matching records are decoded.
+    """
+    if key in data:
+        records = filter_records(data[key], kind, filters)
+        return records, {'selected': len(records), 'total': len(data[key])}
+    catalog = current_snapshot().catalogs[kind]
+    indices = catalog.select(filters)
+    return (catalog.record(int(index)) for index in indices), {'selected': len(indices), 'total': len(catalog)}
+
+def rank_and_shadow(endpoint: str, match, subject: Dict[str, Any], items, result_key: str,
+                    stats: Dict[str, Any], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rank with the request's options; on sampled requests compare the shadow engine in the background"""
+    shadow = current_app.extensions.get('shadow')
+    if shadow is None or not shadow.sampled():
+        return match(subject, items, stats=stats, **options)
+    # Both engines must see the same candidates
+    items = list(items)
+    start = time.perf_counter()
+    results = match(subject, items, stats=stats, **options)
+    if not stats.get('partial'):
+        shadow.submit(endpoint, match, subject, items, options, results, time.perf_counter() - start, result_key)
+    return results
+
+def coalesced_ranking(endpoint: str, data: Dict[str, Any], options: Dict[str, Any], rank):
+    """
+    (results, stats) of rank(), computed once for identical requests in flight
+    at the same time. Waiting requests free their scoring slot and give up
+    waiting at their own deadline; a partial result is not shared. A request
+    that scores on its own after waiting takes a scoring slot again first.
+    """
+    flights = current_app.extensions.get('coalesce')
+    if flights is None:
+        return rank()
+    timeout = None if options['deadline'] is None else max(0.0, options['deadline'] - time.monotonic())
+    (results, stats), shared = flights.do(request_key(endpoint, data, current_snapshot().version), rank,
+                                          on_wait=release_admission_slot, timeout=timeout,
+                                          shareable=lambda outcome: not outcome[1].get('partial'),
+                                          on_resume=reacquire_admission_slot)
+    name = 'recommender_coalesced_requests_total' if shared else 'recommender_computed_requests_total'
+    current_app.extensions['metrics'].increment(name, {'endpoint': endpoint})
+    if shared:
+        print('Shared the result of an identical request in flight')
+    return results, dict(stats)
+
+def shard_request(data: Dict[str, Any], deadline: Optional[float]):
+    """Payload forwarded to the shards and how long to wait for them"""
+    payload = {key: value for key, value in data.items() if key not in ('page_size', 'keep_components')}
+    timeout = current_app.config['SHARD_TIMEOUT_MS'] / 1000.0
+    if deadline is not None:
+        remaining = max(0.0, deadline - time.monotonic())
+        timeout = min(timeout, remaining)
+        # Shards stop scoring a bit early so their answer arrives within the budget
+        payload['deadline_ms'] = remaining * 1000 * SHARD_DEADLINE_SHARE
+    return payload, timeout
+
+def ranking_response(results, stats: Dict[str, Any], page_size: Optional[int] = None):
+    """
+    JSON list of results, flagged with headers when the deadline cut scoring short.
+    With page_size only the first page is returned; the ranked list is cached
+    and X-Recommendation-Cursor fetches the next page from /recommend/page.
+    Kept component scores are cached too, X-Recommendation-Ranking names them
+    for /recommend/rerank.
+    """
+    if page_size is None:
+        response = encode_response(results)
+    else:
+        response = page_response(results, 0, page_size)
+    response.headers['X-Recommendation-Partial'] = 'true' if stats.get('partial') else 'false'
+    response.headers['X-Recommendation-Scored'] = f"{stats.get('scored', 0)}/{stats.get('total', 0)}"
+    if 'cascade' in stats:
+        response.headers['X-Recommendation-Cascade'] = ', '.join(f"{key}={value}" for key, value in stats['cascade'].items())
+    if 'shards' in stats:
+        response.headers['X-Recommendation-Shards'] = f"{stats['shards']['answered']}/{stats['shards']['total']}"
+    if 'filtered' in stats:
+        response.headers['X-Recommendation-Filtered'] = f"{stats['filtered']['selected']}/{stats['filtered']['total']}"
+    if 'components' in stats:
+        response.headers['X-Recommendation-Ranking'] = current_app.extensions['results'].put(stats['components'])
+    return response
+
+def page_response(results, offset: int, page_size: int, key: Optional[str] = None):
+    """One page of a ranked list, with the cursor of the next page when there is one"""
+    response = encode_response(results[offset:offset + page_size])
+    response.headers['X-Recommendation-Total'] = str(len(results))
+    if offset + page_size < len(results):
+        if key is None:
+            key = current_app.extensions['results'].put({'results': results, 'page_size': page_size})
+        response.headers['X-Recommendation-Cursor'] = f"{key}.{offset + page_size}"
+    return response
 
 @api_bp.route('/recommend/jobs-for-candidate', methods=['POST'])
+@profiled
+@admission_control
 def recommend_jobs_for_candidate():
     try:
         print('\n=== JOBS FOR CANDIDATE REQUEST ===')
-        data = request.get_json(force=True)
+        data = load_payload()
         print('Received payload keys:', list(data.keys()) if data else 'None')
         print('Payload size:', len(str(data)) if data else 0, 'characters')
         
-        # Validate payload
-        if not data or 'userProfile' not in data or 'jobOffers' not in data:
+        # Validate payload; without jobOffers the stored job catalog is ranked
+        has_catalog = 'jobs' in current_snapshot().catalogs
+        if not data or 'userProfile' not in data or ('jobOffers' not in data and not has_catalog):
             print('ERROR: Missing required fields')
             return jsonify({'error': 'Payload must contain userProfile and jobOffers'}), 400
 
         user_profile = data['userProfile']
-        job_offers = data['jobOffers']
+        job_offers = data.get('jobOffers', [])
         
         print('User profile matricule:', user_profile.get('matricule', 'N/A'))
-        print('Number of job offers:', len(job_offers))
+        print('Number of job offers:', len(job_offers) if 'jobOffers' in data else 'job catalog')
 
         # Defensive: Ensure all required fields exist and are the right type
         if not isinstance(job_offers, list):
@@ -30,34 +255,58 @@ def recommend_jobs_for_candidate():
         if not isinstance(user_profile, dict):
             print('ERROR: userProfile is not a dict')
             return jsonify({'error': 'userProfile must be an object'}), 400
+        if len(job_offers) > current_app.config['MAX_CANDIDATES']:
+            print('ERROR: Too many job offers')
+            return jsonify({'error': f"jobOffers must not contain more than {current_app.config['MAX_CANDIDATES']} items"}), 413
+        try:
+            options = ranking_options(data)
+            filters = parse_filters(data.get('filters'))
+            page_size = request_page_size(data)
+        except ValueError as e:
+            print('ERROR:', str(e))
+            return jsonify({'error': str(e)}), 400
+
+        def rank():
+            records, filtered = candidate_records(data, 'jobOffers', 'jobs', filters)
+            stats = {'filtered': filtered}
+            print('Starting recommendation process...', filtered['selected'], 'job offers after filters')
+            return rank_and_shadow('jobs-for-candidate', match_jobs_for_candidate, user_profile, records, 'jobOffer', stats, options), stats
 
-        print('Starting recommendation process...')
-        results = match_jobs_for_candidate(user_profile, job_offers)
+        results, stats = coalesced_ranking('jobs-for-candidate', data, options, rank)
         print('Recommendation completed, returning', len(results), 'results')
-        return jsonify(results)
+        return ranking_response(results, stats, page_size)
         
+    except RequestEntityTooLarge:
+        raise
+    except HTTPException as e:
+        print('ERROR:', e.description)
+        return jsonify({'error': e.description}), e.code
     except Exception as e:
         print('ERROR in recommend_jobs_for_candidate:', str(e))
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/recommend/candidates-for-job', methods=['POST'])
+@profiled
+@admission_control
 def recommend_candidates_for_job():
     try:
         print('\n=== CANDIDATES FOR JOB REQUEST ===')
-        data = request.get_json(force=True)
+        data = load_payload()
         print('Received payload keys:', list(data.keys()) if data else 'None')
         print('Payload size:', len(str(data)) if data else 0, 'characters')
         
-        if not data or 'jobOffer' not in data or 'userProfiles' not in data:
+        # Without userProfiles the stored profile catalog (or its shards) is ranked
+        has_catalog = 'profiles' in current_snapshot().catalogs or bool(current_app.config.get('SHARD_URLS'))
+        if not data or 'jobOffer' not in data or ('userProfiles' not in data and not has_catalog):
             print('ERROR: Missing required fields')
             return jsonify({'error': 'Payload must contain jobOffer and userProfiles'}), 400
 
         job_offer = data['jobOffer']
-        user_profiles = data['userProfiles']
+        user_profiles = data.get('userProfiles', [])
         
         print('Job offer title:', job_offer.get('titre_de_poste', 'N/A'))
-        print('Number of user profiles:', len(user_profiles))
+        print('Number of user profiles:', len(user_profiles) if 'userProfiles' in data else 'profile catalog')
 
         if not isinstance(user_profiles, list):
             print('ERROR: userProfiles is not a list')
@@ -65,13 +314,85 @@ def recommend_candidates_for_job():
         if not isinstance(job_offer, dict):
             print('ERROR: jobOffer is not a dict')
             return jsonify({'error': 'jobOffer must be an object'}), 400
+        if len(user_profiles) > current_app.config['MAX_CANDIDATES']:
+            print('ERROR: Too many user profiles')
+            return jsonify({'error': f"userProfiles must not contain more than {current_app.config['MAX_CANDIDATES']} items"}), 413
+        try:
+            options = ranking_options(data)
+            filters = parse_filters(data.get('filters'))
+            page_size = request_page_size(data)
+        except ValueError as e:
+            print('ERROR:', str(e))
+            return jsonify({'error': str(e)}), 400
+
+        if 'userProfiles' not in data and current_app.config.get('SHARD_URLS'):
+            print('Fanning out to', len(current_app.config['SHARD_URLS']), 'shards...')
+            stats = {}
+            payload, timeout = shard_request(data, options['deadline'])
+            results = scatter_gather(payload, current_app.config['SHARD_URLS'], timeout, options['top_k'], stats)
+            print('Merged', stats['shards']['answered'], 'shards, returning', len(results), 'results')
+            return ranking_response(results, stats, page_size)
 
-        print('Starting recommendation process...')
-        results = match_candidates_for_job(job_offer, user_profiles)
+        def rank():
+            records, filtered = candidate_records(data, 'userProfiles', 'profiles', filters)
+            stats = {'filtered': filtered}
+            print('Starting recommendation process...', filtered['selected'], 'user profiles after filters')
+            return rank_and_shadow('candidates-for-job', match_candidates_for_job, job_offer, records, 'userProfile', stats, options), stats
+
+        results, stats = coalesced_ranking('candidates-for-job', data, options, rank)
         print('Recommendation completed, returning', len(results), 'results')
-        return jsonify(results)
+        return ranking_response(results, stats, page_size)
         
+    except RequestEntityTooLarge:
+        raise
+    except HTTPException as e:
+        print('ERROR:', e.description)
+        return jsonify({'error': e.description}), e.code
     except Exception as e:
         print('ERROR in recommend_candidates_for_job:', str(e))
         traceback.print_exc()
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/recommend/page', methods=['GET'])
+def recommend_page():
+    """Next page of a ranking requested with page_size, served from the cache without scoring"""
+    cursor = request.args.get('cursor', '')
+    key, _, offset = cursor.rpartition('.')
+    if not key or not offset.isdigit():
+        return jsonify({'error': 'cursor is missing or malformed'}), 400
+    entry = current_app.extensions['results'].get(key)
+    if entry is None:
+        return jsonify({'error': 'cursor has expired, run the recommendation again'}), 410
+    if entry.get('page_size') is None:
+        # Cached component scores of a keep_components request, not a paginated ranking
+        return jsonify({'error': 'cursor does not belong to a paginated ranking'}), 400
+    page_size = request.args.get('page_size', entry['page_size'], type=int)
+    if not page_size or page_size <= 0:
+        return jsonify({'error': 'page_size must be a positive integer'}), 400
+    return page_response(entry['results'], int(offset), page_size, key)
+
+@api_bp.route('/recommend/rerank', methods=['POST'])
+def recommend_rerank():
+    """
+    Rank the pairs of a request sent with keep_components again under new
+    scoring settings, recombining their cached component scores without
+    recomputing TF-IDF or embeddings.
+    """
+    try:
+        data = load_payload()
+    except HTTPException as e:
+        return jsonify({'error': e.description}), e.code
+    if not isinstance(data, dict) or not isinstance(data.get('ranking'), str):
+        return jsonify({'error': 'Payload must contain ranking (X-Recommendation-Ranking of a keep_components request)'}), 400
+    try:
+        scoring = request_scoring(data)
+        top_k = request_top_k(data)
+        page_size = request_page_size(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    entry = current_app.extensions['results'].get(data['ranking'])
+    if entry is None or 'matrix' not in entry:
+        return jsonify({'error': 'ranking has expired, run the recommendation again with keep_components'}), 410
+    results = rerank_components(entry['items'], entry['result_key'], entry['matrix'], scoring, top_k)
+    stats = {'scored': 0, 'total': len(entry['items'])}
+    return ranking_response(results, stats, page_size)
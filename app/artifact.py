@@ -0,0 +1,155 @@
+"""
+Versioned engine artifact: what the recommender derives from known competencies.
+
+An artifact packages the competency vocabulary of a set of job offers and user
+profiles, the TF-IDF lexical model fitted on them and (when the pre-trained
+model is available at build time) the normalized embedding of every skill. It
+uses the memory-mapped array format of ``app/catalog.py``. A server started
+with ``ENGINE_ARTIFACT`` maps the file and installs it on the engine of its
+snapshot (see app/snapshot.py): requests read the skill vectors straight from
+the mapping, outside the shared skill embedding cache, so sentence_transformers
+and torch are only imported when a skill the artifact does not know must be
+encoded.
+
+    python -m app.artifact build --profiles data/user_profiles.json --jobs data/job_offers.json \\
+        --output data/engine.artifact
+    python -m app.artifact info data/engine.artifact
+"""
+
+import argparse
+import hashlib
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .catalog import ArrayFile, StringColumn, encode_strings, write_arrays
+
+ARTIFACT_FORMAT = 'engine'
+# Bumped whenever the arrays stored in an artifact change
+ARTIFACT_FORMAT_VERSION = 1
+
+class EngineArtifact:
+    """Memory-mapped engine artifact"""
+
+    def __init__(self, path: str):
+        self.file = ArrayFile(path)
+        self.path = path
+        self.meta = self.file.meta
+        if self.meta.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not an engine artifact")
+        if self.meta.get('format_version') != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"{path} uses artifact format {self.meta.get('format_version')}, "
+                             f"expected {ARTIFACT_FORMAT_VERSION}")
+        self.version = self.meta['version']
+        self.vocabulary = StringColumn(self.file.array('vocab_offsets'), self.file.array('vocab_data'))
+        self.lexical_terms = StringColumn(self.file.array('lexical_terms_offsets'), self.file.array('lexical_terms_data'))
+        self.lexical_idf = self.file.array('lexical_idf')
+        self.embeddings = self.file.array('skill_embeddings') if 'skill_embeddings' in self.file else None
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def lexical_model(self) -> TfidfVectorizer:
+        """Rebuild the fitted TF-IDF vectorizer without refitting it"""
+        vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), min_df=1, max_df=1.0, stop_words=None)
+        vectorizer.vocabulary_ = {term: index for index, term in enumerate(self.lexical_terms)}
+        vectorizer.idf_ = np.asarray(self.lexical_idf, dtype=np.float64)
+        return vectorizer
+
+def open_artifact(path: str) -> EngineArtifact:
+    """Open an engine artifact without reading it into memory"""
+    return EngineArtifact(path)
+
+def install_artifact(artifact: Optional[EngineArtifact], engine=None, embeddings=None) -> None:
+    """Make the recommender (the process engine by default) use an artifact and its skill vectors"""
+    from . import recommender
+
+    (engine or recommender.ENGINE).install_artifact(artifact, embeddings)
+
+def build_artifact_arrays(competency_lists: List[List[str]]) -> Dict[str, np.ndarray]:
+    """Derive the vocabulary, lexical model and embeddings from competency lists"""
+    from . import recommender
+
+    vocabulary = sorted({competency for competencies in competency_lists for competency in competencies})
+
+    # Same lexical settings as calculate_tfidf_similarity, fitted on every record
+    vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), min_df=1, max_df=1.0, stop_words=None)
+    try:
+        vectorizer.fit([' '.join(competencies) for competencies in competency_lists])
+        lexical_terms = [term for term, _ in sorted(vectorizer.vocabulary_.items(), key=lambda item: item[1])]
+        idf = vectorizer.idf_.astype(np.float32)
+    except ValueError:
+        # Every record is empty: keep an empty lexical model
+        lexical_terms, idf = [], np.zeros(0, dtype=np.float32)
+
+    vocab_offsets, vocab_data = encode_strings(vocabulary)
+    lexical_terms_offsets, lexical_terms_data = encode_strings(lexical_terms)
+    arrays = {
+        'vocab_offsets': vocab_offsets,
+        'vocab_data': vocab_data,
+        'lexical_terms_offsets': lexical_terms_offsets,
+        'lexical_terms_data': lexical_terms_data,
+        'lexical_idf': idf,
+    }
+    if vocabulary and recommender.get_model() is not None:
+        arrays['skill_embeddings'] = recommender.get_skill_embeddings(vocabulary).astype(np.float32)
+    return arrays
+
+def artifact_version(arrays: Dict[str, np.ndarray]) -> str:
+    """Content hash of the arrays, so identical builds get identical versions"""
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        digest.update(name.encode('utf-8'))
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()[:12]
+
+def build_artifact(profile_paths: List[str], job_paths: List[str], path: str,
+                   version: Optional[str] = None) -> EngineArtifact:
+    """Build an artifact from JSON/JSONL files of user profiles and job offers"""
+    from . import recommender
+    from .batch import iter_records
+
+    competency_lists = []
+    for paths, extract in ((profile_paths, recommender.extract_competencies_from_user),
+                           (job_paths, recommender.extract_competencies_from_job)):
+        for source in paths:
+            competency_lists.extend(extract(record) for record in iter_records(source))
+
+    arrays = build_artifact_arrays(competency_lists)
+    meta: Dict[str, Any] = {
+        'format': ARTIFACT_FORMAT,
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'version': version or artifact_version(arrays),
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'records': len(competency_lists),
+        'skills': len(arrays['vocab_offsets']) - 1,
+        'model': recommender.MODEL_NAME if 'skill_embeddings' in arrays else None,
+        'dimension': int(arrays['skill_embeddings'].shape[1]) if 'skill_embeddings' in arrays else 0,
+    }
+    write_arrays(path, arrays, meta=meta)
+    return open_artifact(path)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Build versioned recommendation engine artifacts')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='Build an artifact from profile and job files')
+    build_parser.add_argument('--profiles', nargs='*', default=[], help='User profiles (JSON array or JSONL)')
+    build_parser.add_argument('--jobs', nargs='*', default=[], help='Job offers (JSON array or JSONL)')
+    build_parser.add_argument('--output', required=True, help='Artifact file to write')
+    build_parser.add_argument('--version', help='Version label (default: content hash)')
+    info_parser = subparsers.add_parser('info', help='Print the metadata of an artifact')
+    info_parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        artifact = build_artifact(args.profiles, args.jobs, args.output, args.version)
+        embeddings = 'with' if artifact.embeddings is not None else 'without'
+        print(f"✅ Wrote artifact {artifact.version} ({len(artifact)} skills, {embeddings} embeddings) to {args.output}")
+    elif args.command == 'info':
+        for key, value in open_artifact(args.path).meta.items():
+            print(f"{key}: {value}")
+
+if __name__ == '__main__':
+    main()
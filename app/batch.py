@@ -0,0 +1,252 @@
+"""
+In-process batch matching, without the HTTP server.
+
+Ranks every job offer of a file against every profile of another file and
+writes the matches to JSONL or CSV. Input files are JSON arrays (like
+``data/*.json``) or JSONL. The profiles are parsed once, before the workers
+are forked, so every worker shares the parent's copy and scores them in
+chunks. Jobs are streamed: they are read from the file as the workers take
+them, spread over all cores. An interrupted run continues where it stopped
+with ``--resume``; job ids must be unique for that.
+
+    python -m app.batch --jobs data/job_offers.json --profiles data/user_profiles.json \\
+        --output matches.jsonl --threshold 70
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
+
+from .catalog import record_id
+
+CSV_COLUMNS = ['job_id', 'titre_de_poste', 'rank', 'matricule', 'firstName', 'lastName', 'score']
+
+# Read size of the incremental JSON array parser
+READ_CHUNK_SIZE = 1 << 16
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from a JSON array file or a JSONL file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first != '[':
+            # JSONL: one record per line
+            line = first + f.readline()
+            while line:
+                if line.strip():
+                    yield json.loads(line)
+                line = f.readline()
+            return
+
+        # JSON array: decode one element at a time from a sliding buffer
+        decoder = json.JSONDecoder()
+        buffer = ''
+        exhausted = False
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+                chunk = f.read(READ_CHUNK_SIZE)
+                exhausted = not chunk
+                buffer += chunk
+                continue
+            yield record
+            buffer = buffer[end:]
+
+def match_rows(job: Dict[str, Any], job_id: str, results: List[Dict[str, Any]],
+               include_records: bool) -> List[Dict[str, Any]]:
+    rows = []
+    for rank, result in enumerate(results, 1):
+        user = result['userProfile']
+        row = {
+            'job_id': job_id,
+            'titre_de_poste': job.get('titre_de_poste', job.get('title', '')),
+            'rank': rank,
+            'matricule': user.get('matricule', ''),
+            'firstName': user.get('firstName', ''),
+            'lastName': user.get('lastName', ''),
+            'score': round(result['score'], 2),
+        }
+        if include_records:
+            row['userProfile'] = user
+        rows.append(row)
+    return rows
+
+# --- Worker side ---
+_WORKER_OPTIONS: Dict[str, Any] = {}
+
+def _init_worker(options: Dict[str, Any]) -> None:
+    # Forked workers inherit options, profile records included, without a copy
+    _WORKER_OPTIONS.update(options)
+
+def _match_job(task: Tuple[str, Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Rank all profiles for one job; runs in a pool worker"""
+    from .recommender import match_candidates_for_job
+    job_id, job = task
+    options = _WORKER_OPTIONS
+    # The recommender logs every pair; keep the batch output readable
+    with contextlib.redirect_stdout(io.StringIO()) if options['quiet'] else contextlib.nullcontext():
+        results = match_candidates_for_job(
+            job, options['profile_records'],
+            top_k=options['top_k'], chunk_size=options['chunk_size'],
+        )
+    results = [result for result in results if result['score'] >= options['threshold']]
+    return job_id, match_rows(job, job_id, results, options['include_records'])
+
+# --- Resumable output ---
+def read_progress(progress_path: str) -> Tuple[Set[str], int]:
+    """Completed job ids and the output size after the last completed job"""
+    done: Set[str] = set()
+    offset = 0
+    if os.path.exists(progress_path):
+        with open(progress_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                job_id, _, size = line.rstrip('\n').rpartition('\t')
+                if job_id:
+                    done.add(job_id)
+                    offset = int(size)
+    return done, offset
+
+class MatchWriter:
+    """Append match rows and record, after each job, how far the output is complete"""
+
+    def __init__(self, output: str, output_format: str, resume: bool):
+        self.output_format = output_format
+        self.progress_path = output + '.progress'
+        self.done, offset = read_progress(self.progress_path) if resume else (set(), 0)
+        if resume and offset > (os.path.getsize(output) if os.path.exists(output) else 0):
+            # The output was removed or cut short: the recorded jobs are not in it any more
+            print(f"⚠️ {output} is missing or shorter than {self.progress_path} records, starting over", file=sys.stderr)
+            resume = False
+            self.done, offset = set(), 0
+        mode = 'r+' if resume and os.path.exists(output) else 'w'
+        self.file = open(output, mode, encoding='utf-8', newline='')
+        # Drop rows of a job that was being written when the last run stopped
+        self.file.seek(offset)
+        self.file.truncate()
+        self.progress = open(self.progress_path, 'a' if resume else 'w', encoding='utf-8')
+        self.csv_writer = None
+        if output_format == 'csv':
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+            if offset == 0:
+                self.csv_writer.writeheader()
+
+    def write_job(self, job_id: str, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            if self.csv_writer is not None:
+                self.csv_writer.writerow(row)
+            else:
+                self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.progress.write(f"{job_id}\t{self.file.tell()}\n")
+        self.progress.flush()
+        self.done.add(job_id)
+
+    def close(self) -> None:
+        self.file.close()
+        self.progress.close()
+
+def run_batch(jobs_path: str, profiles_path: str, output: str, output_format: str = 'jsonl',
+              threshold: float = 0.0, top_k: Optional[int] = None, chunk_size: int = 1000,
+              workers: Optional[int] = None, resume: bool = False, include_records: bool = False,
+              quiet: bool = True) -> Dict[str, int]:
+    """
+    Rank every job of jobs_path against profiles_path and write the matches.
+    Raises ValueError when two jobs have the same id.
+    """
+    from . import recommender
+
+    # A first pass keeps only the job ids, so duplicates are rejected before any output
+    job_ids: Set[str] = set()
+    for index, job in enumerate(iter_records(jobs_path)):
+        job_id = record_id(job, 'jobs', index)
+        if job_id in job_ids:
+            raise ValueError(f"Duplicate job id {job_id!r} in {jobs_path}: job ids must be unique")
+        job_ids.add(job_id)
+
+    # Load the model and the profiles once in the parent, forked workers share them
+    recommender.get_model()
+    profile_records = list(iter_records(profiles_path))
+
+    writer = MatchWriter(output, output_format, resume)
+    skipped = len(job_ids & writer.done)
+    pending = len(job_ids) - skipped
+
+    def pending_jobs() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for index, job in enumerate(iter_records(jobs_path)):
+            job_id = record_id(job, 'jobs', index)
+            if job_id not in writer.done:
+                yield job_id, job
+
+    options = {
+        'profile_records': profile_records,
+        'threshold': threshold,
+        'top_k': top_k,
+        'chunk_size': chunk_size,
+        'include_records': include_records,
+        'quiet': quiet,
+    }
+
+    written = 0
+    start = time.time()
+    with contextlib.ExitStack() as stack:
+        stack.callback(writer.close)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            _init_worker(options)
+            completed = map(_match_job, pending_jobs())
+        else:
+            # Terminated on the way out, also when a job or the output fails
+            pool = stack.enter_context(multiprocessing.Pool(workers, initializer=_init_worker, initargs=(options,)))
+            completed = pool.imap_unordered(_match_job, pending_jobs())
+        for done_count, (job_id, rows) in enumerate(completed, 1):
+            writer.write_job(job_id, rows)
+            written += len(rows)
+            print(f"[{done_count}/{pending}] {job_id}: {len(rows)} matches ({time.time() - start:.1f}s)", file=sys.stderr)
+    return {'jobs': pending, 'skipped': skipped, 'matches': written}
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Rank candidates for every job offer without the HTTP server')
+    parser.add_argument('--jobs', required=True, help='Job offers (JSON array or JSONL)')
+    parser.add_argument('--profiles', required=True, help='User profiles (JSON array or JSONL)')
+    parser.add_argument('--output', required=True, help='Matches file (.jsonl or .csv)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='Output format (default: from the extension)')
+    parser.add_argument('--threshold', type=float, default=0.0,
+                        help='Only write matches scoring at least this (e.g. 70 for best matches)')
+    parser.add_argument('--top-k', type=int, help='Matches kept per job (default: 100)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Profiles scored at a time per job')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run')
+    parser.add_argument('--include-records', action='store_true', help='Embed the full profile in JSONL rows')
+    parser.add_argument('--verbose', action='store_true', help='Keep the per-pair scoring log')
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    try:
+        summary = run_batch(
+            args.jobs, args.profiles, args.output, output_format,
+            threshold=args.threshold, top_k=args.top_k, chunk_size=args.chunk_size,
+            workers=args.workers, resume=args.resume, include_records=args.include_records,
+            quiet=not args.verbose,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"✅ {summary['matches']} matches for {summary['jobs']} jobs written to {args.output}"
+          f" ({summary['skipped']} jobs already done)")
+
+if __name__ == '__main__':
+    main()
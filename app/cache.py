@@ -0,0 +1,57 @@
+"""
+Bounded, TTL-evicted cache of ranked result lists.
+
+A ranking requested with ``page_size`` is stored here under a random id and
+later pages are sliced from it instead of scoring the list again. Entries
+expire ``ttl`` seconds after they were stored and the least recently used one
+is dropped when the cache is full.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+class RankingCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return len(self._entries)
+
+    def _evict_expired(self, now: float) -> None:
+        # Entries are kept in insertion/usage order, expiry times are not sorted
+        for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+
+    def put(self, value: Any) -> str:
+        """Store value and return the id it can be fetched with"""
+        key = secrets.token_urlsafe(12)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            self._entries[key] = (now + self.ttl, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return key
+
+    def get(self, key: str) -> Optional[Any]:
+        """Stored value, or None when it is unknown, evicted or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
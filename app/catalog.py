@@ -0,0 +1,314 @@
+"""
+Columnar on-disk catalog of job offers or user profiles.
+
+A catalog file is a small JSON header followed by raw, 64-byte aligned arrays:
+record ids, the original records, interned competency ids stored as CSR arrays,
+the TF-IDF matrix of every record, department and location posting lists and
+(when the pre-trained model is available) one embedding per interned
+competency, with the model and dimension recorded in the header. Files are opened with
+``mmap`` so startup does not parse anything and several server processes on
+one host share the same physical pages.
+
+Build a catalog from the JSON files in ``data/``::
+
+    python -m app.catalog build data/user_profiles.json data/user_profiles.rcat --kind profiles
+    python -m app.catalog build data/job_offers.json data/job_offers.rcat --kind jobs
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+MAGIC = b'RCAT'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+# magic, format version, header length
+PREAMBLE = struct.Struct('<4sIQ')
+
+CATALOG_KINDS = ('profiles', 'jobs')
+
+# --- Raw array container ---
+def encode_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode strings as (offsets, utf-8 bytes) so they can be stored as raw arrays"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(item) for item in encoded])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return offsets, data
+
+def write_arrays(path: str, arrays: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None) -> None:
+    """Write named arrays to a single file readable by ``ArrayFile``"""
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({'arrays': layout, 'meta': meta or {}}, ensure_ascii=False).encode('utf-8')
+    data_start = -(-(PREAMBLE.size + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    # Write next to the target and rename, so readers never map a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+class ArrayFile:
+    """Read-only, memory-mapped view over a file written by ``write_arrays``"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} uses catalog format {version}, expected {FORMAT_VERSION}")
+        header = json.loads(self._mmap[PREAMBLE.size:PREAMBLE.size + header_length].decode('utf-8'))
+        self._layout = header['arrays']
+        self.meta = header['meta']
+        self._data_start = -(-(PREAMBLE.size + header_length) // ALIGNMENT) * ALIGNMENT
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._layout
+
+    def names(self) -> List[str]:
+        return list(self._layout)
+
+    def array(self, name: str) -> np.ndarray:
+        """Return a zero-copy array backed by the mapped file"""
+        spec = self._layout[name]
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+        array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=self._data_start + spec['offset'])
+        return array.reshape(spec['shape'])
+
+class StringColumn:
+    """Lazily decoded string column stored as offsets + utf-8 bytes"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._data[start:end].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+# --- Catalog ---
+def record_id(record: Dict[str, Any], kind: str, index: int) -> str:
+    """Stable identifier of a catalog record"""
+    key = 'matricule' if kind == 'profiles' else 'id'
+    value = record.get(key)
+    return str(value) if value not in (None, '') else f"{kind}-{index}"
+
+class Catalog:
+    """Memory-mapped catalog of job offers or user profiles"""
+
+    def __init__(self, path: str):
+        self.file = ArrayFile(path)
+        self.path = path
+        self.meta = self.file.meta
+        self.kind = self.meta['kind']
+        self.ids = StringColumn(self.file.array('ids_offsets'), self.file.array('ids_data'))
+        self.vocabulary = StringColumn(self.file.array('vocab_offsets'), self.file.array('vocab_data'))
+        self._records = StringColumn(self.file.array('records_offsets'), self.file.array('records_data'))
+        self.competency_indptr = self.file.array('comp_indptr')
+        self.competency_indices = self.file.array('comp_indices')
+        self.tfidf_terms = StringColumn(self.file.array('tfidf_terms_offsets'), self.file.array('tfidf_terms_data'))
+        self.tfidf_idf = self.file.array('tfidf_idf')
+        self.tfidf_matrix = csr_matrix(
+            (self.file.array('tfidf_data'), self.file.array('tfidf_indices'), self.file.array('tfidf_indptr')),
+            shape=(len(self), len(self.tfidf_terms)),
+            copy=False,
+        )
+        self.skill_embeddings = self.file.array('skill_embeddings') if 'skill_embeddings' in self.file else None
+        self._postings = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Decode the original JSON record at index"""
+        return json.loads(self._records[index])
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [self.record(index) for index in range(len(self))]
+
+    @property
+    def postings(self):
+        """Department and location posting lists (see app/filters.py)"""
+        from .filters import PostingLists, build_posting_arrays
+        if self._postings is None:
+            if 'post_department_indptr' in self.file:
+                arrays = {name: self.file.array(name) for name in self.file.names() if name.startswith('post_')}
+            else:
+                # Catalogs built before posting lists were stored
+                arrays = build_posting_arrays(self.records(), self.kind)
+            self._postings = PostingLists(arrays, len(self))
+        return self._postings
+
+    def select(self, filters: Optional[Dict[str, List[str]]] = None) -> np.ndarray:
+        """Indices of the records passing parsed filters, without decoding any record"""
+        return self.postings.select(filters)
+
+    def competency_ids(self, index: int) -> np.ndarray:
+        return self.competency_indices[self.competency_indptr[index]:self.competency_indptr[index + 1]]
+
+    def competencies(self, index: int) -> List[str]:
+        """Normalized competencies of the record at index"""
+        return [self.vocabulary[int(term_id)] for term_id in self.competency_ids(index)]
+
+def open_catalog(path: str) -> Catalog:
+    """Open a catalog file without reading it into memory"""
+    return Catalog(path)
+
+def build_catalog_arrays(records: List[Dict[str, Any]], kind: str) -> Dict[str, np.ndarray]:
+    """Derive every catalog column from a list of JSON records"""
+    from . import recommender
+    from .filters import build_posting_arrays
+
+    extract = recommender.extract_competencies_from_user if kind == 'profiles' else recommender.extract_competencies_from_job
+
+    # Intern competencies into a shared vocabulary and store them as CSR
+    vocabulary: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    competency_lists = []
+    for record in records:
+        competencies = sorted(extract(record))
+        competency_lists.append(competencies)
+        indices.extend(vocabulary.setdefault(competency, len(vocabulary)) for competency in competencies)
+        indptr.append(len(indices))
+    terms = list(vocabulary)
+
+    # Same lexical settings as calculate_tfidf_similarity, fitted on the whole catalog
+    vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), min_df=1, max_df=1.0, stop_words=None)
+    documents = [' '.join(competencies) for competencies in competency_lists]
+    try:
+        tfidf = vectorizer.fit_transform(documents).tocsr().astype(np.float32)
+        tfidf_terms = [term for term, _ in sorted(vectorizer.vocabulary_.items(), key=lambda item: item[1])]
+        idf = vectorizer.idf_.astype(np.float32)
+    except ValueError:
+        # Every record is empty: keep an empty lexical model
+        tfidf = csr_matrix((len(records), 0), dtype=np.float32)
+        tfidf_terms, idf = [], np.zeros(0, dtype=np.float32)
+
+    # scipy keeps indptr and indices in one dtype; matching it avoids copies on open
+    index_dtype = np.int32 if tfidf.nnz < np.iinfo(np.int32).max else np.int64
+
+    ids_offsets, ids_data = encode_strings([record_id(record, kind, i) for i, record in enumerate(records)])
+    records_offsets, records_data = encode_strings([json.dumps(record, ensure_ascii=False) for record in records])
+    vocab_offsets, vocab_data = encode_strings(terms)
+    tfidf_terms_offsets, tfidf_terms_data = encode_strings(tfidf_terms)
+
+    arrays = {
+        'ids_offsets': ids_offsets,
+        'ids_data': ids_data,
+        'records_offsets': records_offsets,
+        'records_data': records_data,
+        'vocab_offsets': vocab_offsets,
+        'vocab_data': vocab_data,
+        'comp_indptr': np.asarray(indptr, dtype=np.int64),
+        'comp_indices': np.asarray(indices, dtype=np.int32),
+        'tfidf_indptr': tfidf.indptr.astype(index_dtype),
+        'tfidf_indices': tfidf.indices.astype(index_dtype),
+        'tfidf_data': tfidf.data,
+        'tfidf_terms_offsets': tfidf_terms_offsets,
+        'tfidf_terms_data': tfidf_terms_data,
+        'tfidf_idf': idf,
+    }
+    arrays.update(build_posting_arrays(records, kind))
+    if terms and recommender.pretrained_available():
+        arrays['skill_embeddings'] = recommender.get_skill_embeddings(terms).astype(np.float32)
+    return arrays
+
+def build_catalog(records: List[Dict[str, Any]], kind: str, path: str) -> Catalog:
+    """Write records to a catalog file and return it opened"""
+    from . import recommender
+
+    if kind not in CATALOG_KINDS:
+        raise ValueError(f"kind must be one of {CATALOG_KINDS}")
+    arrays = build_catalog_arrays(records, kind)
+    write_arrays(path, arrays, meta={
+        'kind': kind,
+        'count': len(records),
+        'model': recommender.MODEL_NAME if 'skill_embeddings' in arrays else None,
+        'dimension': int(arrays['skill_embeddings'].shape[1]) if 'skill_embeddings' in arrays else 0,
+    })
+    return open_catalog(path)
+
+def convert_json_file(json_path: str, catalog_path: str, kind: str) -> Catalog:
+    """Convert a ``data/*.json`` file (a JSON array of records) to a catalog"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    if not isinstance(records, list):
+        raise ValueError(f"{json_path} must contain a JSON array of records")
+    return build_catalog(records, kind, catalog_path)
+
+def shard_of(record: Dict[str, Any], kind: str, index: int, shards: int) -> int:
+    """Stable shard number of a record, from a hash of its id"""
+    return zlib.crc32(record_id(record, kind, index).encode('utf-8')) % shards
+
+def split_catalog(records: List[Dict[str, Any]], kind: str, shards: int, prefix: str) -> List[str]:
+    """Split records into shard catalogs {prefix}-0.rcat ... and return their paths"""
+    if shards < 1:
+        raise ValueError('shards must be at least 1')
+    parts: List[List[Dict[str, Any]]] = [[] for _ in range(shards)]
+    for index, record in enumerate(records):
+        parts[shard_of(record, kind, index, shards)].append(record)
+    paths = []
+    for number, part in enumerate(parts):
+        path = f"{prefix}-{number}.rcat"
+        build_catalog(part, kind, path)
+        paths.append(path)
+    return paths
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Build memory-mapped recommendation catalogs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='Convert a JSON catalog file')
+    build_parser.add_argument('source', help='JSON array of job offers or user profiles')
+    build_parser.add_argument('target', help='Catalog file to write')
+    build_parser.add_argument('--kind', choices=CATALOG_KINDS, required=True)
+    split_parser = subparsers.add_parser('split', help='Convert a JSON catalog file into shard catalogs')
+    split_parser.add_argument('source', help='JSON array of job offers or user profiles')
+    split_parser.add_argument('prefix', help='Shard catalogs are written to PREFIX-<n>.rcat')
+    split_parser.add_argument('--kind', choices=CATALOG_KINDS, required=True)
+    split_parser.add_argument('--shards', type=int, required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        catalog = convert_json_file(args.source, args.target, args.kind)
+        embeddings = 'with' if catalog.skill_embeddings is not None else 'without'
+        print(f"✅ Wrote {len(catalog)} {catalog.kind} ({len(catalog.vocabulary)} competencies, {embeddings} embeddings) to {args.target}")
+    elif args.command == 'split':
+        with open(args.source, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        for path in split_catalog(records, args.kind, args.shards, args.prefix):
+            print(f"✅ Wrote {len(open_catalog(path))} {args.kind} to {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+Python client for the recommendation API.
+
+One ``RecommenderClient`` keeps a pooled ``requests.Session`` (connections are
+reused across calls and threads), retries throttled or failed calls with
+exponential backoff and returns typed results:
+
+    with RecommenderClient('http://127.0.0.1:5000', concurrency=8) as client:
+        ranking = client.candidates_for_job(job_offer, user_profiles, top_k=20)
+        rankings = client.candidates_for_jobs(job_offers, user_profiles)
+
+``candidates_for_jobs`` sends one request per job offer, ``concurrency`` at a
+time, or submits a single bulk job (``/jobs``) when there are at least
+``bulk_threshold`` offers and the server has the job API. Both ways keep the
+same ``top_k`` and report partial rankings. ``AsyncRecommenderClient``
+offers the same calls as coroutines for asyncio callers.
+"""
+
+import asyncio
+import gzip
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+# Statuses worth retrying: throttled, or the server (or a proxy) is briefly unavailable
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Statuses after which a call that is not idempotent was surely not carried out
+NOT_RECEIVED_STATUSES = (429,)
+
+# top_k of candidates_for_jobs when the caller sets none, sent on both the
+# concurrent and the bulk path so the batch size never changes the results
+DEFAULT_TOP_K = 100
+
+@dataclass
+class Recommendation:
+    """One ranked record (a userProfile or a jobOffer) and its score"""
+    record: Dict[str, Any]
+    score: float
+
+@dataclass
+class Ranking:
+    """A ranked list and the X-Recommendation-* headers describing it"""
+    results: List[Recommendation]
+    partial: bool = False
+    scored: Optional[int] = None
+    total: Optional[int] = None
+    cursor: Optional[str] = None
+    ranking_id: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def __iter__(self) -> Iterator[Recommendation]:
+        return iter(self.results)
+
+@dataclass
+class BulkJob:
+    """Status of a job submitted to /jobs"""
+    id: str
+    status: str
+    total: int
+    completed: int
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+class RecommenderError(Exception):
+    """The API answered with an error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+def _count(header: Optional[str], part: int) -> Optional[int]:
+    """One side of a 'done/total' header"""
+    if not header or '/' not in header:
+        return None
+    return int(header.split('/')[part])
+
+def connect_failed(error: requests.RequestException) -> bool:
+    """Whether a call failed before reaching the server, so sending it again cannot run it twice"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+def parse_ranking(results: List[Dict[str, Any]], headers: Optional[Dict[str, str]] = None) -> Ranking:
+    headers = dict(headers or {})
+    records = [Recommendation(result.get('userProfile', result.get('jobOffer')), result['score']) for result in results]
+    return Ranking(
+        results=records,
+        partial=headers.get('X-Recommendation-Partial') == 'true',
+        scored=_count(headers.get('X-Recommendation-Scored'), 0),
+        total=_count(headers.get('X-Recommendation-Scored'), 1),
+        cursor=headers.get('X-Recommendation-Cursor'),
+        ranking_id=headers.get('X-Recommendation-Ranking'),
+        headers={key: value for key, value in headers.items() if key.startswith('X-Recommendation-')},
+    )
+
+def parse_job_line(entry: Dict[str, Any]) -> Ranking:
+    """Ranking of one NDJSON line of bulk job results, which carries the counts the headers give otherwise"""
+    ranking = parse_ranking(entry['results'])
+    ranking.partial = bool(entry.get('partial', False))
+    ranking.scored = entry.get('scored')
+    ranking.total = entry.get('total')
+    return ranking
+
+class RecommenderClient:
+    """Pooled, retrying client of the recommendation API"""
+
+    def __init__(self, base_url: str = 'http://127.0.0.1:5000', timeout: float = 120.0,
+                 max_retries: int = 3, backoff: float = 0.5, concurrency: int = 4,
+                 bulk_threshold: Optional[int] = 50, compress_min_bytes: Optional[int] = 64 * 1024,
+                 stream_timeout: Optional[float] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        # Seconds between two lines of followed job results (None = no limit): a
+        # running job sends nothing until its next offer is done
+        self.stream_timeout = stream_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.concurrency = concurrency
+        self.bulk_threshold = bulk_threshold
+        # Request bodies at least this large are sent gzip compressed (None = never)
+        self.compress_min_bytes = compress_min_bytes
+        self.session = requests.Session()
+        # One pooled connection per concurrent call; retries are handled in _request
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(concurrency, 1), max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._bulk_supported: Optional[bool] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None,
+                 params: Optional[Dict[str, Any]] = None, stream: bool = False,
+                 idempotent: bool = True, timeout: Any = None) -> requests.Response:
+        """
+        Send a call, retrying connection errors and RETRY_STATUSES with
+        exponential backoff. A call that is not idempotent is only retried
+        when it surely did not reach the server: failed connections and 429.
+        """
+        headers = {}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+            if self.compress_min_bytes is not None and len(body) >= self.compress_min_bytes:
+                body = gzip.compress(body)
+                headers['Content-Encoding'] = 'gzip'
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                response = self.session.request(method, self.base_url + path, data=body, params=params,
+                                                headers=headers, timeout=timeout or self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries or not (idempotent or connect_failed(e)):
+                    raise
+            else:
+                retry_statuses = RETRY_STATUSES if idempotent else NOT_RECEIVED_STATUSES
+                if response.status_code not in retry_statuses or attempt == self.max_retries:
+                    return response
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.replace('.', '', 1).isdigit():
+                    delay = max(delay, float(retry_after))
+                response.close()
+            time.sleep(delay)
+
+    def _check(self, response: requests.Response) -> requests.Response:
+        if response.status_code >= 400:
+            try:
+                message = response.json().get('error', response.text)
+            except ValueError:
+                message = response.text
+            raise RecommenderError(response.status_code, message)
+        return response
+
+    def _rank(self, path: str, payload: Dict[str, Any]) -> Ranking:
+        response = self._check(self._request('POST', path, payload))
+        return parse_ranking(response.json(), response.headers)
+
+    def candidates_for_job(self, job_offer: Dict[str, Any], user_profiles: Optional[List[Dict[str, Any]]] = None,
+                           **options: Any) -> Ranking:
+        """Rank user profiles (the server's catalog when omitted) for a job offer; options as in the API payload"""
+        payload = {'jobOffer': job_offer, **options}
+        if user_profiles is not None:
+            payload['userProfiles'] = user_profiles
+        return self._rank('/recommend/candidates-for-job', payload)
+
+    def jobs_for_candidate(self, user_profile: Dict[str, Any], job_offers: Optional[List[Dict[str, Any]]] = None,
+                           **options: Any) -> Ranking:
+        """Rank job offers (the server's catalog when omitted) for a user profile"""
+        payload = {'userProfile': user_profile, **options}
+        if job_offers is not None:
+            payload['jobOffers'] = job_offers
+        return self._rank('/recommend/jobs-for-candidate', payload)
+
+    def next_page(self, ranking: Ranking, page_size: Optional[int] = None) -> Optional[Ranking]:
+        """Next page of a ranking requested with page_size, None after the last page"""
+        if ranking.cursor is None:
+            return None
+        params = {'cursor': ranking.cursor}
+        if page_size is not None:
+            params['page_size'] = page_size
+        response = self._check(self._request('GET', '/recommend/page', params=params))
+        return parse_ranking(response.json(), response.headers)
+
+    def rerank(self, ranking: Ranking, scoring: Optional[Dict[str, Any]] = None, **options: Any) -> Ranking:
+        """Rank a keep_components ranking again under new scoring settings, without scoring again"""
+        if ranking.ranking_id is None:
+            raise ValueError('Ranking was not requested with keep_components=True')
+        payload = {'ranking': ranking.ranking_id, **options}
+        if scoring is not None:
+            payload['scoring'] = scoring
+        return self._rank('/recommend/rerank', payload)
+
+    def candidates_for_jobs(self, job_offers: List[Dict[str, Any]], user_profiles: Optional[List[Dict[str, Any]]] = None,
+                            **options: Any) -> List[Ranking]:
+        """
+        Rank candidates for every job offer, in input order. Large batches go
+        through one bulk job when the server supports it, the others are sent
+        as concurrent requests over the pooled connections. Either way every
+        ranking keeps the top_k (DEFAULT_TOP_K by default) best candidates.
+        """
+        options.setdefault('top_k', DEFAULT_TOP_K)
+        if self.bulk_threshold is not None and len(job_offers) >= self.bulk_threshold and self._bulk_supported is not False:
+            try:
+                job = self.submit_job(job_offers, user_profiles, **options)
+                self._bulk_supported = True
+            except RecommenderError as e:
+                if e.status not in (404, 405):
+                    raise
+                # Server without the job API
+                self._bulk_supported = False
+            else:
+                rankings: List[Optional[Ranking]] = [None] * len(job_offers)
+                for index, ranking in self.job_results(job.id, follow=True):
+                    rankings[index] = ranking
+                status = self.job_status(job.id)
+                if status.status != 'done':
+                    raise RecommenderError(500, f"Bulk job {job.id} {status.status}: {status.error}")
+                return rankings
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(lambda job_offer: self.candidates_for_job(job_offer, user_profiles, **options),
+                                     job_offers))
+
+    def submit_job(self, job_offers: List[Dict[str, Any]], user_profiles: Optional[List[Dict[str, Any]]] = None,
+                   **options: Any) -> BulkJob:
+        """Submit a bulk job to /jobs; never sent twice unless the server surely did not get it"""
+        payload = {'jobOffers': job_offers, **options}
+        if user_profiles is not None:
+            payload['userProfiles'] = user_profiles
+        return self._bulk_job(self._check(self._request('POST', '/jobs', payload, idempotent=False)).json())
+
+    def job_status(self, job_id: str) -> BulkJob:
+        return self._bulk_job(self._check(self._request('GET', f'/jobs/{job_id}')).json())
+
+    def job_results(self, job_id: str, offset: int = 0, follow: bool = False) -> Iterator[Tuple[int, Ranking]]:
+        """(job offer index, ranking) of every finished offer, waiting for the rest when following"""
+        params = {'offset': offset, 'follow': '1' if follow else '0'}
+        timeout = (self.timeout, self.stream_timeout) if follow else None
+        response = self._check(self._request('GET', f'/jobs/{job_id}/results', params=params, stream=True, timeout=timeout))
+        with response:
+            for line in response.iter_lines():
+                if line:
+                    entry = json.loads(line)
+                    yield entry['index'], parse_job_line(entry)
+
+    @staticmethod
+    def _bulk_job(status: Dict[str, Any]) -> BulkJob:
+        return BulkJob(status['id'], status['status'], status['total'], status['completed'], status.get('error'))
+
+class AsyncRecommenderClient:
+    """asyncio front of RecommenderClient: calls run on its pooled session in worker threads"""
+
+    def __init__(self, base_url: str = 'http://127.0.0.1:5000', **kwargs: Any):
+        self.client = RecommenderClient(base_url, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=self.client.concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.client.close()
+
+    async def _run(self, function, *args: Any, **kwargs: Any):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: function(*args, **kwargs))
+
+    async def candidates_for_job(self, job_offer: Dict[str, Any], user_profiles: Optional[List[Dict[str, Any]]] = None,
+                                 **options: Any) -> Ranking:
+        return await self._run(self.client.candidates_for_job, job_offer, user_profiles, **options)
+
+    async def jobs_for_candidate(self, user_profile: Dict[str, Any], job_offers: Optional[List[Dict[str, Any]]] = None,
+                                 **options: Any) -> Ranking:
+        return await self._run(self.client.jobs_for_candidate, user_profile, job_offers, **options)
+
+    async def candidates_for_jobs(self, job_offers: List[Dict[str, Any]], user_profiles: Optional[List[Dict[str, Any]]] = None,
+                                  **options: Any) -> List[Ranking]:
+        return await self._run(self.client.candidates_for_jobs, job_offers, user_profiles, **options)
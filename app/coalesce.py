@@ -0,0 +1,83 @@
+"""
+Single-flight coalescing of identical in-flight recommendation requests.
+
+Requests are keyed by a hash of their canonical (key-sorted) JSON payload,
+leaving out the fields that only shape the response (``deadline_ms``,
+``page_size``), and of the snapshot version serving them. The first request with a key computes the ranking; identical
+requests arriving while it runs wait for it and share its results instead of
+scoring again. A result cut short by the first request's deadline is not
+shared: a waiting request with a longer budget scores on its own. Nothing is
+kept once the computation ends, so this is not a cache: a request arriving
+after the first one finished scores again.
+
+Coalescing works within one worker process.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+
+# Payload fields that do not change the ranking
+RESPONSE_ONLY_FIELDS = ('deadline_ms', 'page_size')
+
+def request_key(endpoint: str, data: Dict[str, Any], snapshot: int = 0) -> str:
+    """Canonical hash of a request: same endpoint, snapshot version and ranking inputs give the same key"""
+    payload = {key: value for key, value in data.items() if key not in RESPONSE_ONLY_FIELDS}
+    canonical = json.dumps([endpoint, snapshot, payload], sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Runs one computation per key at a time, sharing its result with concurrent callers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: str, compute: Callable[[], Any], on_wait: Optional[Callable[[], None]] = None,
+           timeout: Optional[float] = None, shareable: Optional[Callable[[Any], bool]] = None,
+           on_resume: Optional[Callable[[], None]] = None) -> Tuple[Any, bool]:
+        """
+        Result of compute for key and whether it was shared from another
+        caller. A caller that waits longer than timeout, or whose shared result
+        is not shareable, calls on_resume (which may raise) and computes on its
+        own; when the computation raises, every waiting caller gets the exception.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            try:
+                call.result = compute()
+                return call.result, False
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if on_wait is not None:
+            on_wait()
+        if call.done.wait(timeout):
+            if call.error is not None:
+                raise call.error
+            if shareable is None or shareable(call.result):
+                return call.result, True
+        if on_resume is not None:
+            on_resume()
+        return compute(), False
@@ -0,0 +1,106 @@
+"""
+Scatter-gather coordinator over sharded profile catalogs.
+
+The profile catalog is split into shards (``python -m app.catalog split``),
+each served by its own recommender instance. A coordinator started with
+``SHARD_URLS`` forwards a ``/recommend/candidates-for-job`` query without
+``userProfiles`` to every shard in parallel and merges their rankings, which
+are already sorted by score. Shards that fail or do not answer within the time
+budget are left out and the response is flagged as partial.
+
+    python -m app.catalog split data/user_profiles.json data/user_profiles --kind profiles --shards 2
+    python -m app.prefork --port 5001 --profile-catalog data/user_profiles-0.rcat
+    python -m app.prefork --port 5002 --profile-catalog data/user_profiles-1.rcat
+    python -m app.prefork --port 5000 --shard-url http://127.0.0.1:5001 --shard-url http://127.0.0.1:5002
+"""
+
+import heapq
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SHARD_ENDPOINT = '/recommend/candidates-for-job'
+
+# Keep-alive connections kept per shard, i.e. concurrent queries to a shard that reuse one
+SHARD_POOL_SIZE = 32
+
+# One pooled session shared by every thread of a worker process; connections
+# to the shards are reused across requests
+_session_lock = threading.Lock()
+_sessions: Dict[int, requests.Session] = {}
+
+def _session() -> requests.Session:
+    # Sockets must not be shared with a forked worker: one session per process
+    pid = os.getpid()
+    session = _sessions.get(pid)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(pid)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=SHARD_POOL_SIZE, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _sessions.clear()
+                _sessions[pid] = session
+    return session
+
+def query_shard(url: str, payload: Dict[str, Any], timeout: float) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """Ranking of one shard and its recommendation headers; raises on any failure"""
+    response = _session().post(url.rstrip('/') + SHARD_ENDPOINT, json=payload, timeout=timeout)
+    response.raise_for_status()
+    return response.json(), {key: value for key, value in response.headers.items() if key.startswith('X-Recommendation-')}
+
+def merge_rankings(rankings: List[List[Dict[str, Any]]], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Merge per-shard rankings sorted by descending score, ties in shard order"""
+    merged = heapq.merge(*rankings, key=lambda result: -result['score'])
+    return list(itertools.islice(merged, top_k)) if top_k is not None else list(merged)
+
+def _add_counts(total: Dict[str, int], header: Optional[str]) -> None:
+    """Sum 'done/total' headers such as X-Recommendation-Scored"""
+    if header and '/' in header:
+        done, _, count = header.partition('/')
+        total['done'] += int(done)
+        total['total'] += int(count)
+
+def scatter_gather(payload: Dict[str, Any], shard_urls: List[str], timeout: float,
+                   top_k: Optional[int] = None, stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Send payload to every shard at once and merge their top-k. Shards that
+    error or miss the timeout are skipped and stats['partial'] is set.
+    """
+    stats = stats if stats is not None else {}
+    executor = ThreadPoolExecutor(max_workers=len(shard_urls))
+    futures = {executor.submit(query_shard, url, payload, timeout): url for url in shard_urls}
+    done, _ = wait(futures, timeout=timeout)
+    # Do not wait for slow shards; their requests end with their own timeout
+    executor.shutdown(wait=False)
+
+    rankings = []
+    scored = {'done': 0, 'total': 0}
+    filtered = {'done': 0, 'total': 0}
+    partial = False
+    for future, url in futures.items():
+        if future not in done or future.exception() is not None:
+            reason = 'timed out' if future not in done else future.exception()
+            print(f"⚠️ Shard {url} left out: {reason}")
+            partial = True
+            continue
+        results, headers = future.result()
+        rankings.append(results)
+        partial = partial or headers.get('X-Recommendation-Partial') == 'true'
+        _add_counts(scored, headers.get('X-Recommendation-Scored'))
+        _add_counts(filtered, headers.get('X-Recommendation-Filtered'))
+
+    stats['partial'] = partial
+    stats['scored'] = scored['done']
+    stats['total'] = scored['total']
+    stats['shards'] = {'answered': len(rankings), 'total': len(shard_urls)}
+    if filtered['total']:
+        stats['filtered'] = {'selected': filtered['done'], 'total': filtered['total']}
+    return merge_rankings(rankings, top_k)
@@ -0,0 +1,208 @@
+"""
+Thread-safe recommendation engine state.
+
+A ``RecommenderEngine`` owns everything scoring reads besides the request
+itself: the pre-trained model, the installed engine artifact, the skill
+vectors of the serving snapshot (artifact and catalogs), the skill embedding
+cache and the field vector cache. One engine is shared by every thread of a
+process (``recommender.ENGINE``), and every snapshot (app/snapshot.py) has an
+engine derived from it that shares its model and caches:
+
+- the read path takes no lock: the model is loaded once, the artifact and the
+  snapshot skill vectors are replaced together by a single reference
+  assignment and never modified, and cache lookups are plain dictionary reads;
+- caches are written under their own lock, first writer wins, so readers
+  never see a half-built entry and a value never changes once cached;
+- the model encodes one batch at a time, and skills encoded by another thread
+  while a batch waited are not encoded again.
+
+So Flask's threaded server, a thread pool or the job workers can rank many
+requests at once in one process.
+"""
+
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+# Pre-trained model (optional). sentence_transformers and torch are imported on
+# first use only, so a process serving from an engine artifact (app/artifact.py)
+# starts without them and loads them only when an unseen skill must be encoded.
+MODEL_NAME = 'all-MiniLM-L6-v2'
+_MODEL_NOT_LOADED = object()
+
+# Skills whose vectors are kept; once full, new skills are encoded on every request
+SKILL_EMBEDDING_CACHE_SIZE = 200000
+
+class VectorCache:
+    """Key -> vector map with lock-free reads and serialized writes; once max_entries are kept, new ones are not"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+        self._vectors: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._vectors
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self._vectors.get(key, default)
+
+    def missing(self, keys: Iterable[Any]) -> List[Any]:
+        """Distinct keys without a vector, in first-seen order"""
+        return [key for key in dict.fromkeys(keys) if key not in self._vectors]
+
+    def put_many(self, items: Iterable[Tuple[Any, Any]]) -> None:
+        """Store vectors of keys not cached yet; a cached vector is never replaced"""
+        with self._lock:
+            for key, vector in items:
+                if key not in self._vectors and (self.max_entries is None or len(self._vectors) < self.max_entries):
+                    self._vectors[key] = vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = {}
+
+class RecommenderEngine:
+    """Model, engine artifact and caches of the recommender, shared by every thread of a process"""
+
+    def __init__(self, model_name: str = MODEL_NAME, model: Any = _MODEL_NOT_LOADED,
+                 skill_cache_size: Optional[int] = None, field_cache_size: Optional[int] = None):
+        from .fields import FIELD_VECTOR_CACHE_SIZE
+
+        self.model_name = model_name
+        # The model once loaded, None when it is not available
+        self._model = model
+        self._model_lock = threading.Lock()
+        # Serializes model.encode calls
+        self._encode_lock = threading.Lock()
+        # Engine artifact in use (app/artifact.py) and the skill vectors of the
+        # snapshot (views into its mapped files), replaced as a whole
+        self._installed: Tuple[Any, Dict[str, np.ndarray]] = (None, {})
+        # L2-normalized skill vectors, so a dot product is a cosine similarity
+        self.skill_embeddings = VectorCache(skill_cache_size if skill_cache_size is not None else SKILL_EMBEDDING_CACHE_SIZE)
+        # Normalized field text -> (feature indices, values) of its vector (see app/fields.py)
+        self.field_vectors = VectorCache(field_cache_size if field_cache_size is not None else FIELD_VECTOR_CACHE_SIZE)
+        # Length of the skill vectors once one is known
+        self.dimension = 0
+        # Engine owning the model, shared with the engines derived from it
+        self._root = self
+
+    @property
+    def artifact(self) -> Any:
+        return self._installed[0]
+
+    @property
+    def snapshot_embeddings(self) -> Dict[str, np.ndarray]:
+        """Skill vectors of the installed snapshot, kept apart from the bounded cache"""
+        return self._installed[1]
+
+    def derive(self) -> 'RecommenderEngine':
+        """Engine sharing this one's model, locks and caches, with nothing installed"""
+        engine = RecommenderEngine.__new__(RecommenderEngine)
+        engine.__dict__.update(self.__dict__)
+        engine._root = self._root
+        engine._installed = (None, {})
+        return engine
+
+    @property
+    def vocabulary(self) -> List[str]:
+        """Skills of the installed artifact"""
+        artifact = self.artifact
+        return list(artifact.vocabulary) if artifact is not None else []
+
+    def get_model(self):
+        """Load the pre-trained model on first use; None when it is not available"""
+        if self._root is not self:
+            return self._root.get_model()
+        if self._model is _MODEL_NOT_LOADED:
+            with self._model_lock:
+                if self._model is _MODEL_NOT_LOADED:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                        # Using a small, fast model that downloads quickly
+                        model = SentenceTransformer(self.model_name)
+                        print("✅ Pre-trained ML model loaded successfully")
+                    except Exception as e:
+                        print(f"⚠️ Could not load pre-trained model: {e}")
+                        print("🔄 Using enhanced TF-IDF mode instead")
+                        model = None
+                    self._model = model
+        return self._model
+
+    def pretrained_available(self) -> bool:
+        """Whether pre-trained similarity is scored; an artifact with embeddings avoids loading the model"""
+        artifact = self.artifact
+        if artifact is not None and artifact.embeddings is not None:
+            return True
+        return self.get_model() is not None
+
+    def install_artifact(self, artifact: Any, embeddings: Optional[Dict[str, np.ndarray]] = None) -> None:
+        """
+        Use an artifact (None = none) and its skill vectors, or the given
+        snapshot skill vectors; the previous ones are no longer referenced.
+        """
+        if embeddings is None:
+            embeddings = {}
+            if artifact is not None and artifact.embeddings is not None:
+                # Rows are read-only views into the mapped file, nothing is copied
+                embeddings = dict(zip(artifact.vocabulary, artifact.embeddings))
+        if artifact is not None and artifact.embeddings is not None and artifact.meta.get('model') != self.model_name:
+            raise ValueError(f"{artifact.path} was built with model {artifact.meta.get('model')}, "
+                             f"expected {self.model_name}")
+        if embeddings:
+            self.dimension = len(next(iter(embeddings.values())))
+        self._installed = (artifact, embeddings)
+
+    def add_skill_embeddings(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        """Cache already normalized skill vectors (from an artifact or a catalog)"""
+        items = list(items)
+        if items:
+            self.dimension = len(items[0][1])
+            self.skill_embeddings.put_many(items)
+
+    def missing_skills(self, skills: Iterable[str]) -> List[str]:
+        """Distinct skills neither the snapshot nor the cache has a vector for"""
+        known = self.snapshot_embeddings
+        return [skill for skill in self.skill_embeddings.missing(skills) if skill not in known]
+
+    def encode_skills(self, skills: List[str]) -> np.ndarray:
+        """Return normalized embeddings for skills, encoding only the unseen ones"""
+        # Vectors encoded for this call, used even when the cache is full
+        encoded: Dict[str, np.ndarray] = {}
+        known = self.snapshot_embeddings
+        if self.missing_skills(skills):
+            model = self.get_model()
+            if model is not None:
+                with self._encode_lock:
+                    # Another thread may have encoded some of them while this one waited
+                    missing = self.missing_skills(skills)
+                    if missing:
+                        vectors = np.asarray(model.encode(missing), dtype=np.float32)
+                        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                        norms[norms == 0] = 1.0
+                        encoded = dict(zip(missing, vectors / norms))
+                        self.add_skill_embeddings(encoded.items())
+        if not skills:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Without a model, skills missing from the artifact get a zero vector (no similarity)
+        vectors = [known[skill] if skill in known else self.skill_embeddings.get(skill, encoded.get(skill))
+                   for skill in skills]
+        dimension = next((len(vector) for vector in vectors if vector is not None), self.dimension)
+        zeros = np.zeros(dimension, dtype=np.float32)
+        return np.vstack([zeros if vector is None else vector for vector in vectors])
+
+    def match_candidates_for_job(self, job_offer: Dict[str, Any], user_profiles: Iterable[Dict[str, Any]],
+                                 **options: Any) -> List[Dict[str, Any]]:
+        """recommender.match_candidates_for_job with this engine"""
+        from . import recommender
+        return recommender.match_candidates_for_job(job_offer, user_profiles, engine=self, **options)
+
+    def match_jobs_for_candidate(self, user_profile: Dict[str, Any], job_offers: Iterable[Dict[str, Any]],
+                                 **options: Any) -> List[Dict[str, Any]]:
+        """recommender.match_jobs_for_candidate with this engine"""
+        from . import recommender
+        return recommender.match_jobs_for_candidate(user_profile, job_offers, engine=self, **options)
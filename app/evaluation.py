@@ -0,0 +1,146 @@
+"""
+Offline accuracy-vs-speed evaluation of approximate ranking modes.
+
+The exhaustive ranking (every pair scored in full, no cutoff on the number of
+results) is the ground truth. Every mode is a set of ranking options passed
+to ``match_candidates_for_job`` / ``match_jobs_for_candidate`` (a cascade, a
+chunk size, scoring settings...) and is compared to it on the same queries:
+
+- recall@k: share of the true top k the mode also returns in its top k,
+- NDCG@k: the mode's top k graded by the exhaustive scores,
+- score MAE: mean absolute score error of the results both rankings contain,
+- speed-up: exhaustive ranking time over the mode's ranking time.
+
+Every mode, the exhaustive ranking included, runs once untimed before it is
+timed, so no mode pays for the cold embedding and field caches.
+
+    python -m app.evaluation --queries 20 --candidates 2000 --k 10
+    python -m app.evaluation --jobs data/job_offers.json --profiles data/user_profiles.json \
+        --mode 'cascade={"cascade": {}}' --mode 'top50={"cascade": {"stage2_top_m": 50}}'
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from .batch import iter_records
+from .recommender import match_candidates_for_job, match_jobs_for_candidate
+from .synthetic import generate_job_offers, generate_user_profiles
+
+# Modes evaluated when none is given
+DEFAULT_MODES = {
+    'cascade': {'cascade': {}},
+    'cascade-m20': {'cascade': {'stage2_top_m': 20}},
+    'chunked': {'chunk_size': 256},
+}
+
+def recall_at_k(truth: List[Dict[str, Any]], ranked: List[Dict[str, Any]], result_key: str, k: int) -> float:
+    expected = {id(result[result_key]) for result in truth[:k]}
+    if not expected:
+        return 1.0
+    return sum(id(result[result_key]) in expected for result in ranked[:k]) / len(expected)
+
+def ndcg_at_k(truth: List[Dict[str, Any]], ranked: List[Dict[str, Any]], result_key: str, k: int) -> float:
+    """NDCG of the mode's top k, each result's gain being its exhaustive score"""
+    gains = {id(result[result_key]): result['score'] for result in truth}
+    ideal = sum(result['score'] / math.log2(rank + 2) for rank, result in enumerate(truth[:k]))
+    if ideal == 0:
+        return 1.0
+    actual = sum(gains.get(id(result[result_key]), 0.0) / math.log2(rank + 2) for rank, result in enumerate(ranked[:k]))
+    return actual / ideal
+
+def score_errors(truth: List[Dict[str, Any]], ranked: List[Dict[str, Any]], result_key: str) -> List[float]:
+    """Absolute score differences of the results present in both rankings"""
+    scores = {id(result[result_key]): result['score'] for result in truth}
+    return [abs(result['score'] - scores[id(result[result_key])]) for result in ranked if id(result[result_key]) in scores]
+
+def timed_rankings(queries: List[Dict[str, Any]], items: List[Dict[str, Any]], match, options: Dict[str, Any],
+                   repeat: int) -> Tuple[List[List[Dict[str, Any]]], float]:
+    """Rankings of every query and the best total time over repeat runs, after an untimed warm-up run"""
+    for query in queries:
+        match(query, items, **options)
+    best = math.inf
+    rankings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rankings = [match(query, items, **options) for query in queries]
+        best = min(best, time.perf_counter() - start)
+    return rankings, best
+
+def evaluate(queries: List[Dict[str, Any]], items: List[Dict[str, Any]], modes: Dict[str, Dict[str, Any]],
+             direction: str = 'candidates', k: int = 10, repeat: int = 1, verbose: bool = False) -> List[Dict[str, Any]]:
+    """One row of metrics per mode, the exhaustive ranking first"""
+    match, result_key = ((match_candidates_for_job, 'userProfile') if direction == 'candidates'
+                         else (match_jobs_for_candidate, 'jobOffer'))
+    rows = []
+    # The per-pair scoring log would dominate the timings
+    with contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO()):
+        truth, baseline_seconds = timed_rankings(queries, items, match, {}, repeat)
+        for name, options in {'exhaustive': {}, **modes}.items():
+            if name == 'exhaustive':
+                rankings, seconds = truth, baseline_seconds
+            else:
+                rankings, seconds = timed_rankings(queries, items, match, options, repeat)
+            errors = [error for expected, ranked in zip(truth, rankings) for error in score_errors(expected, ranked, result_key)]
+            rows.append({
+                'mode': name,
+                f'recall@{k}': sum(recall_at_k(t, r, result_key, k) for t, r in zip(truth, rankings)) / len(queries),
+                f'ndcg@{k}': sum(ndcg_at_k(t, r, result_key, k) for t, r in zip(truth, rankings)) / len(queries),
+                'score_mae': sum(errors) / len(errors) if errors else 0.0,
+                'seconds': seconds,
+                'speedup': baseline_seconds / seconds if seconds else math.inf,
+            })
+    return rows
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    columns = list(rows[0])
+    width = max(12, max(len(row['mode']) for row in rows) + 2)
+    print(f"{'mode':<{width}}" + ''.join(f"{column:>12}" for column in columns[1:]))
+    for row in rows:
+        cells = ''.join(f"{row[column]:>12.3f}" if column != 'speedup' else f"{row[column]:>11.2f}x" for column in columns[1:])
+        print(f"{row['mode']:<{width}}{cells}")
+
+def parse_mode(value: str) -> Tuple[str, Dict[str, Any]]:
+    name, separator, options = value.partition('=')
+    if not separator or not name:
+        raise argparse.ArgumentTypeError('modes are NAME=JSON, e.g. cascade={"cascade": {}}')
+    try:
+        parsed = json.loads(options)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"mode {name}: {e}")
+    if not isinstance(parsed, dict):
+        raise argparse.ArgumentTypeError(f"mode {name}: options must be a JSON object")
+    return name, parsed
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Compare approximate ranking modes with the exhaustive ranking')
+    parser.add_argument('--jobs', help='Job offers (JSON array or JSONL); generated when omitted')
+    parser.add_argument('--profiles', help='User profiles (JSON array or JSONL); generated when omitted')
+    parser.add_argument('--queries', type=int, default=10, help='Generated job offers (or profiles) to rank for')
+    parser.add_argument('--candidates', type=int, default=1000, help='Generated records to rank')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--direction', choices=['candidates', 'jobs'], default='candidates',
+                        help='candidates: rank profiles for each job offer; jobs: rank job offers for each profile')
+    parser.add_argument('--k', type=int, default=10, help='Cutoff of recall@k and NDCG@k')
+    parser.add_argument('--mode', type=parse_mode, action='append', default=None,
+                        help='NAME=JSON ranking options to evaluate (repeatable; default: %s)' % ', '.join(DEFAULT_MODES))
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per mode, the fastest is kept')
+    parser.add_argument('--verbose', action='store_true', help='Keep the per-pair scoring log')
+    args = parser.parse_args(argv)
+
+    candidates = args.direction == 'candidates'
+    query_count, item_count = (args.queries, args.candidates) if candidates else (args.candidates, args.queries)
+    job_offers = list(iter_records(args.jobs)) if args.jobs else generate_job_offers(query_count if candidates else item_count, args.seed)
+    profiles = list(iter_records(args.profiles)) if args.profiles else generate_user_profiles(item_count if candidates else query_count, args.seed)
+    queries, items = (job_offers, profiles) if candidates else (profiles, job_offers)
+    modes = dict(args.mode) if args.mode else DEFAULT_MODES
+
+    print(f"🚀 {len(queries)} queries over {len(items)} records, {len(modes)} modes against the exhaustive ranking")
+    print_table(evaluate(queries, items, modes, args.direction, args.k, max(1, args.repeat), args.verbose))
+
+if __name__ == '__main__':
+    main()
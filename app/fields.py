@@ -0,0 +1,118 @@
+"""
+Multi-field matching on the free-text fields of profiles and job offers.
+
+Besides competences, a profile has a position, experiences and formations and a
+job offer a title and a description. Each field text is normalized and turned
+into a sparse character n-gram vector (hashed, L2 normalized) once: when a
+catalog is loaded (see app/snapshot.py) or the first time a record is seen.
+Vectors are cached by text in the engine's field vector cache (see
+app/engine.py), so ranking only gathers cached vectors and computes one
+sparse product per field; no per-pair model runs.
+
+Field similarities (cosines as percentages, columns FIELD_COMPONENTS):
+
+- title: profile position / job title,
+- experiences: profile experiences / job title and description,
+- formations: profile formations / job title and description.
+
+They are blended into the hybrid score with the ``fields`` weights of the
+scoring settings (see recommender.blend_field_scores), all 0 by default.
+"""
+
+import re
+from typing import List, Dict, Any, Iterable, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# Columns of a field similarity matrix
+FIELD_COMPONENTS = ('title', 'experiences', 'formations')
+
+# Texts whose vectors are kept; once full, new texts are vectorized on every request
+FIELD_VECTOR_CACHE_SIZE = 500000
+
+# Stateless vectorizer: the vector of a text never depends on the other texts seen,
+# so vectors built at load time and at request time are comparable
+_FIELD_VECTORIZER = HashingVectorizer(
+    analyzer='char_wb',
+    ngram_range=(3, 4),
+    n_features=2 ** 18,
+    strip_accents='unicode',
+    lowercase=True,
+    norm='l2',
+    alternate_sign=False,
+    dtype=np.float32,
+)
+
+def _join(value: Any) -> str:
+    if isinstance(value, list):
+        return ' '.join(str(part) for part in value if part)
+    return str(value) if value else ''
+
+def normalize_field(text: str) -> str:
+    """Lowercase, punctuation removed and whitespace collapsed: the cache key of a field text"""
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', text.lower())).strip()
+
+def profile_field_text(profile: Dict[str, Any], field: str) -> str:
+    source = {'title': 'position', 'experiences': 'experiences', 'formations': 'formations'}[field]
+    return normalize_field(_join(profile.get(source)))
+
+def job_field_text(job: Dict[str, Any], field: str) -> str:
+    title = _join(job.get('titre_de_poste', job.get('title')))
+    if field == 'title':
+        return normalize_field(title)
+    return normalize_field(f"{title} {_join(job.get('description'))}")
+
+def _default_cache():
+    from . import recommender
+    return recommender.ENGINE.field_vectors
+
+def field_vectors(texts: List[str], cache: Optional[Any] = None) -> csr_matrix:
+    """
+    Vectors of normalized texts as CSR rows, vectorizing only the texts not in
+    cache (an engine's field_vectors, the serving engine's by default)
+    """
+    cache = cache if cache is not None else _default_cache()
+    missing = [text for text in cache.missing(texts) if text]
+    computed = {}
+    if missing:
+        matrix = _FIELD_VECTORIZER.transform(missing).tocsr()
+        for row, text in enumerate(missing):
+            start, end = matrix.indptr[row], matrix.indptr[row + 1]
+            computed[text] = (matrix.indices[start:end].copy(), matrix.data[start:end].copy())
+        cache.put_many(computed.items())
+    empty = (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+    rows = [computed.get(text) or cache.get(text, empty) for text in texts]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+    indices = np.concatenate([indices for indices, _ in rows]) if rows else empty[0]
+    data = np.concatenate([values for _, values in rows]) if rows else empty[1]
+    return csr_matrix((data, indices, indptr), shape=(len(rows), _FIELD_VECTORIZER.n_features))
+
+def field_similarities(profiles: List[Dict[str, Any]], jobs: List[Dict[str, Any]], cache: Optional[Any] = None) -> np.ndarray:
+    """
+    (pairs, FIELD_COMPONENTS) matrix of field similarities in percent between
+    profiles[i] and jobs[i]; a single profile or job is paired with every row
+    of the other side.
+    """
+    pairs = max(len(profiles), len(jobs)) if profiles and jobs else 0
+    similarities = np.zeros((pairs, len(FIELD_COMPONENTS)), dtype=np.float64)
+    if not pairs:
+        return similarities
+    for column, field in enumerate(FIELD_COMPONENTS):
+        profile_vectors = field_vectors([profile_field_text(profile, field) for profile in profiles], cache)
+        job_vectors = field_vectors([job_field_text(job, field) for job in jobs], cache)
+        if len(profiles) == 1 or len(jobs) == 1:
+            cosines = (profile_vectors @ job_vectors.T).toarray().ravel()
+        else:
+            cosines = np.asarray(profile_vectors.multiply(job_vectors).sum(axis=1)).ravel()
+        similarities[:, column] = np.clip(cosines, 0.0, 1.0) * 100
+    return similarities
+
+def warm_field_vectors(records: Iterable[Dict[str, Any]], kind: str, cache: Optional[Any] = None) -> int:
+    """Vectorize every field text of catalog records ('profiles' or 'jobs') ahead of requests"""
+    field_text = profile_field_text if kind == 'profiles' else job_field_text
+    texts = [field_text(record, field) for record in records for field in FIELD_COMPONENTS]
+    field_vectors(texts, cache)
+    return len(texts)
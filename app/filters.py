@@ -0,0 +1,107 @@
+"""
+Structured pre-filters on department and location.
+
+Catalogs store one posting list per attribute value: the sorted indices of the
+records holding that value, as CSR arrays next to the other catalog columns.
+A filter such as ``{"department": "Finance", "location": "Casablanca"}`` is the
+intersection of the union of the posting lists of each attribute, so a query
+only decodes and scores the matching slice of the catalog. Lists sent in the
+payload are filtered with the same rules before scoring.
+"""
+
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from .catalog import StringColumn, encode_strings
+from .recommender import normalize_text
+
+# Record fields holding each filterable attribute, by catalog kind
+FILTER_FIELDS = {
+    'profiles': {'department': ('department', 'departement'), 'location': ('localisation', 'location')},
+    'jobs': {'department': ('departement', 'department'), 'location': ('localisation', 'location')},
+}
+FILTER_ATTRIBUTES = ('department', 'location')
+
+def attribute_value(record: Dict[str, Any], kind: str, attribute: str) -> str:
+    """Normalized value of a filterable attribute, '' when the record has none"""
+    for field in FILTER_FIELDS[kind][attribute]:
+        value = record.get(field)
+        if isinstance(value, str) and value.strip():
+            return normalize_text(value)
+    return ''
+
+def parse_filters(filters: Any) -> Optional[Dict[str, List[str]]]:
+    """Validate payload filters: attribute -> value or list of accepted values"""
+    if filters is None:
+        return None
+    if not isinstance(filters, dict) or set(filters) - set(FILTER_ATTRIBUTES):
+        raise ValueError(f"filters must be an object with keys {list(FILTER_ATTRIBUTES)}")
+    parsed = {}
+    for attribute, values in filters.items():
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list) or not values or not all(isinstance(value, str) for value in values):
+            raise ValueError(f"filters.{attribute} must be a string or a non-empty list of strings")
+        parsed[attribute] = sorted({normalize_text(value) for value in values})
+    return parsed or None
+
+def matches_filters(record: Dict[str, Any], kind: str, filters: Dict[str, List[str]]) -> bool:
+    return all(attribute_value(record, kind, attribute) in values for attribute, values in filters.items())
+
+def filter_records(records: List[Dict[str, Any]], kind: str, filters: Optional[Dict[str, List[str]]]) -> List[Dict[str, Any]]:
+    """Keep the records of a payload list that pass every filter"""
+    if not filters:
+        return records
+    return [record for record in records if matches_filters(record, kind, filters)]
+
+# --- Posting lists ---
+def build_posting_arrays(records: List[Dict[str, Any]], kind: str) -> Dict[str, np.ndarray]:
+    """Posting lists of every attribute value as catalog arrays"""
+    arrays = {}
+    for attribute in FILTER_ATTRIBUTES:
+        postings: Dict[str, List[int]] = {}
+        for index, record in enumerate(records):
+            postings.setdefault(attribute_value(record, kind, attribute), []).append(index)
+        values = sorted(postings)
+        offsets, data = encode_strings(values)
+        indptr = np.zeros(len(values) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(postings[value]) for value in values])
+        indices = [index for value in values for index in postings[value]]
+        arrays[f'post_{attribute}_values_offsets'] = offsets
+        arrays[f'post_{attribute}_values_data'] = data
+        arrays[f'post_{attribute}_indptr'] = indptr
+        arrays[f'post_{attribute}_indices'] = np.asarray(indices, dtype=np.int64)
+    return arrays
+
+class PostingLists:
+    """Per-attribute posting lists of a catalog"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], count: int):
+        self.count = count
+        self._lists = {}
+        for attribute in FILTER_ATTRIBUTES:
+            values = StringColumn(arrays[f'post_{attribute}_values_offsets'], arrays[f'post_{attribute}_values_data'])
+            self._lists[attribute] = (
+                {value: position for position, value in enumerate(values)},
+                arrays[f'post_{attribute}_indptr'],
+                arrays[f'post_{attribute}_indices'],
+            )
+
+    def postings(self, attribute: str, value: str) -> np.ndarray:
+        """Sorted indices of the records whose attribute equals the normalized value"""
+        positions, indptr, indices = self._lists[attribute]
+        position = positions.get(value)
+        if position is None:
+            return np.zeros(0, dtype=np.int64)
+        return indices[indptr[position]:indptr[position + 1]]
+
+    def select(self, filters: Optional[Dict[str, List[str]]]) -> np.ndarray:
+        """Indices of the records passing every filter, in catalog order"""
+        selected = np.arange(self.count, dtype=np.int64)
+        for attribute, values in (filters or {}).items():
+            matching = np.unique(np.concatenate([self.postings(attribute, value) for value in values]))
+            selected = np.intersect1d(selected, matching, assume_unique=True)
+            if not len(selected):
+                break
+        return selected
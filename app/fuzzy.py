@@ -0,0 +1,81 @@
+"""
+Character-trigram index for close-spelling competency matching.
+
+Contained skills ("sql" / "postgresql", "excel" / "microsoft excel avance")
+are matched by the substring check of direct matching; this index adds the
+close spellings a substring check misses ("pyhton" / "python").
+
+Every competency is a sparse vector of its character trigrams (binary, L2
+normalized), so the cosine of two vectors is the share of trigrams they have
+in common. A whole request is resolved with one sparse matrix product: pairs
+sharing enough trigrams are candidates, and a candidate is kept when its
+spelling similarity (difflib ratio) reaches the threshold. A typo breaks a
+few trigrams but barely changes the spelling similarity.
+"""
+
+import math
+from difflib import SequenceMatcher
+from typing import List, Dict, FrozenSet, Iterable
+
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# Minimum spelling similarity (0-1) for two competencies to count as a close spelling
+FUZZY_MATCH_THRESHOLD = 0.8
+
+# Minimum trigram cosine for a pair to be compared at all
+FUZZY_CANDIDATE_THRESHOLD = 0.25
+
+# Stateless vectorizer: trigram vectors of a skill never depend on the vocabulary
+_TRIGRAM_VECTORIZER = HashingVectorizer(
+    analyzer='char_wb',
+    ngram_range=(3, 3),
+    n_features=2 ** 20,
+    binary=True,
+    norm='l2',
+    alternate_sign=False,
+)
+_TRIGRAMS = _TRIGRAM_VECTORIZER.build_analyzer()
+
+def spelling_similarity(first: str, second: str) -> float:
+    return SequenceMatcher(None, first, second).ratio()
+
+def is_close_spelling(first: str, second: str, threshold: float = FUZZY_MATCH_THRESHOLD) -> bool:
+    """The index's test for a single pair, without building an index"""
+    first_trigrams, second_trigrams = set(_TRIGRAMS(first)), set(_TRIGRAMS(second))
+    if not first_trigrams or not second_trigrams:
+        return False
+    cosine = len(first_trigrams & second_trigrams) / math.sqrt(len(first_trigrams) * len(second_trigrams))
+    return cosine >= FUZZY_CANDIDATE_THRESHOLD and spelling_similarity(first, second) >= threshold
+
+class SkillTrigramIndex:
+    """Sparse trigram matrix over a competency vocabulary"""
+
+    def __init__(self, vocabulary: Iterable[str]):
+        self.vocabulary = list(dict.fromkeys(vocabulary))
+        self.matrix = _TRIGRAM_VECTORIZER.transform(self.vocabulary)
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def neighbours(self, queries: List[str], threshold: float = FUZZY_MATCH_THRESHOLD) -> Dict[str, FrozenSet[str]]:
+        """Map every query to the vocabulary entries spelled closely enough"""
+        queries = list(dict.fromkeys(queries))
+        if not queries or not self.vocabulary:
+            return {query: frozenset() for query in queries}
+        similarity = (_TRIGRAM_VECTORIZER.transform(queries) @ self.matrix.T).tocoo()
+        candidates = similarity.data >= FUZZY_CANDIDATE_THRESHOLD
+        found: Dict[str, set] = {query: set() for query in queries}
+        for row, col in zip(similarity.row[candidates], similarity.col[candidates]):
+            query, entry = queries[row], self.vocabulary[col]
+            if spelling_similarity(query, entry) >= threshold:
+                found[query].add(entry)
+        return {query: frozenset(matches) for query, matches in found.items()}
+
+def resolve_fuzzy_matches(pairs: List[tuple], threshold: float = FUZZY_MATCH_THRESHOLD) -> Dict[str, FrozenSet[str]]:
+    """
+    Resolve close spellings for every (user competencies, job competencies)
+    pair of a request at once: job competency -> user competencies it matches.
+    """
+    user_vocabulary = (skill for user_competencies, _ in pairs for skill in user_competencies)
+    job_vocabulary = [skill for _, job_competencies in pairs for skill in job_competencies]
+    return SkillTrigramIndex(user_vocabulary).neighbours(job_vocabulary, threshold)
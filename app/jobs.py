@@ -0,0 +1,250 @@
+"""
+Asynchronous job API for bulk matching.
+
+A client submits many job offers at once and gets a job id back right away;
+background worker threads rank the candidates of every offer and append one
+NDJSON line per finished offer to ``JOB_DIR/<id>/results.ndjson``. Progress
+is kept in ``JOB_DIR/<id>/status.json``, so any server process sharing
+``JOB_DIR`` can answer polls and stream results.
+
+    POST /jobs                  {"jobOffers": [...], "userProfiles": [...]} -> 202 {"id": ...}
+    GET  /jobs/<id>             status and progress
+    GET  /jobs/<id>/results     finished offers as NDJSON (?offset=N to skip, ?follow=1 to wait)
+
+``JOB_WORKERS`` threads per process run the jobs, at most ``JOB_QUEUE_DEPTH``
+jobs wait in the queue (more get a 429) and finished jobs are deleted
+``JOB_RETENTION`` seconds after they ended.
+"""
+
+import json
+import os
+import queue
+import re
+import secrets
+import shutil
+import threading
+import time
+import traceback
+from typing import List, Dict, Any, Optional, Callable, Iterable
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from werkzeug.exceptions import HTTPException
+
+from .catalog import record_id
+from .filters import parse_filters, filter_records
+from .recommender import match_candidates_for_job, DEFAULT_CHUNK_TOP_K
+from .snapshot import current_snapshot
+from .transport import load_payload
+
+jobs_bp = Blueprint('jobs', __name__)
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+FINISHED_STATES = ('done', 'failed')
+
+# Seconds between two reads of a job that is still running, when following results
+FOLLOW_POLL_INTERVAL = 0.2
+
+def write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def read_status(job_dir: str, job_id: str) -> Optional[Dict[str, Any]]:
+    """Status of a job, None when the id is unknown, malformed or expired"""
+    if not JOB_ID_PATTERN.match(job_id):
+        return None
+    try:
+        with open(os.path.join(job_dir, job_id, 'status.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class JobQueue:
+    """Bounded queue of bulk matching jobs run by background threads"""
+
+    def __init__(self, job_dir: str, workers: int = 2, max_depth: int = 100, retention: float = 3600.0):
+        self.job_dir = job_dir
+        self.workers = workers
+        self.retention = retention
+        self.queue: 'queue.Queue' = queue.Queue(maxsize=max_depth)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._pid = None
+        os.makedirs(job_dir, exist_ok=True)
+
+    def _ensure_workers(self) -> None:
+        # Threads do not survive fork: start them in the process that serves the request
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [threading.Thread(target=self._work, daemon=True) for _ in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+
+    def submit(self, job_offers: List[Dict[str, Any]], profiles: Callable[[], Iterable[Dict[str, Any]]],
+               options: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job and return its status; raises queue.Full when the queue is full"""
+        self.sweep()
+        self._ensure_workers()
+        job_id = secrets.token_hex(8)
+        path = os.path.join(self.job_dir, job_id)
+        os.makedirs(path)
+        status = {
+            'id': job_id,
+            'status': 'queued',
+            'total': len(job_offers),
+            'completed': 0,
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'error': None,
+        }
+        write_json_atomic(os.path.join(path, 'status.json'), status)
+        try:
+            self.queue.put_nowait((status, job_offers, profiles, options))
+        except queue.Full:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        return status
+
+    def _work(self) -> None:
+        while True:
+            status, job_offers, profiles, options = self.queue.get()
+            try:
+                self.run(status, job_offers, profiles, options)
+            finally:
+                self.queue.task_done()
+            self.sweep()
+
+    def run(self, status: Dict[str, Any], job_offers: List[Dict[str, Any]],
+            profiles: Callable[[], Iterable[Dict[str, Any]]], options: Dict[str, Any]) -> None:
+        """Rank the candidates of every job offer, appending one NDJSON line per offer"""
+        path = os.path.join(self.job_dir, status['id'])
+        status_path = os.path.join(path, 'status.json')
+        status.update(status='running', started_at=time.time())
+        write_json_atomic(status_path, status)
+        try:
+            with open(os.path.join(path, 'results.ndjson'), 'w', encoding='utf-8') as f:
+                for index, job_offer in enumerate(job_offers):
+                    stats: Dict[str, Any] = {}
+                    results = match_candidates_for_job(job_offer, profiles(), stats=stats, **options)
+                    line = {
+                        'index': index,
+                        'jobId': record_id(job_offer, 'jobs', index),
+                        'results': results,
+                        'scored': stats['scored'],
+                        'total': stats['total'],
+                        'partial': stats['partial'],
+                    }
+                    f.write(json.dumps(line, ensure_ascii=False) + '\n')
+                    f.flush()
+                    status['completed'] = index + 1
+                    write_json_atomic(status_path, status)
+            status['status'] = 'done'
+        except Exception as e:
+            print(f"ERROR in bulk job {status['id']}: {e}")
+            traceback.print_exc()
+            status.update(status='failed', error=str(e))
+        status['finished_at'] = time.time()
+        try:
+            write_json_atomic(status_path, status)
+        except OSError as e:
+            # The job directory was removed while the job ran
+            print(f"ERROR in bulk job {status['id']}: {e}")
+
+    def sweep(self) -> None:
+        """Delete finished jobs older than the retention period"""
+        now = time.time()
+        for job_id in os.listdir(self.job_dir):
+            status = read_status(self.job_dir, job_id)
+            if status and status['status'] in FINISHED_STATES and status['finished_at'] + self.retention < now:
+                shutil.rmtree(os.path.join(self.job_dir, job_id), ignore_errors=True)
+
+def iter_results(job_dir: str, job_id: str, offset: int = 0, follow: bool = False):
+    """Yield complete NDJSON lines of a job from offset, waiting for new ones when following"""
+    path = os.path.join(job_dir, job_id, 'results.ndjson')
+    position = 0
+    line_number = 0
+    while True:
+        status = read_status(job_dir, job_id)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                f.seek(position)
+                while True:
+                    line = f.readline()
+                    # A line without newline is still being written
+                    if not line.endswith('\n'):
+                        break
+                    position = f.tell()
+                    if line_number >= offset:
+                        yield line
+                    line_number += 1
+        if not follow or status is None or status['status'] in FINISHED_STATES:
+            return
+        time.sleep(FOLLOW_POLL_INTERVAL)
+
+def profile_source(data: Dict[str, Any], filters: Optional[Dict[str, List[str]]]) -> Callable[[], Iterable[Dict[str, Any]]]:
+    """Profiles of a bulk job: the payload list or the selected slice of the profile catalog"""
+    if 'userProfiles' in data:
+        profiles = filter_records(data['userProfiles'], 'profiles', filters)
+        return lambda: profiles
+    catalog = current_snapshot().catalogs['profiles']
+    indices = catalog.select(filters)
+    return lambda: (catalog.record(int(index)) for index in indices)
+
+@jobs_bp.route('/jobs', methods=['POST'])
+def submit_job():
+    from .api import request_top_k, request_cascade, request_scoring
+    try:
+        data = load_payload()
+    except HTTPException as e:
+        return jsonify({'error': e.description}), e.code
+    has_catalog = 'profiles' in current_snapshot().catalogs
+    if not isinstance(data, dict) or 'jobOffers' not in data or ('userProfiles' not in data and not has_catalog):
+        return jsonify({'error': 'Payload must contain jobOffers and userProfiles'}), 400
+    job_offers = data['jobOffers']
+    if not isinstance(job_offers, list) or not job_offers or not all(isinstance(job, dict) for job in job_offers):
+        return jsonify({'error': 'jobOffers must be a non-empty list of objects'}), 400
+    if 'userProfiles' in data and not isinstance(data['userProfiles'], list):
+        return jsonify({'error': 'userProfiles must be a list'}), 400
+    try:
+        filters = parse_filters(data.get('filters'))
+        options = {
+            'top_k': request_top_k(data) or DEFAULT_CHUNK_TOP_K,
+            'cascade': request_cascade(data),
+            'scoring': request_scoring(data),
+            'chunk_size': current_app.config.get('CHUNK_SIZE'),
+            'memory_limit_mb': current_app.config.get('CHUNK_MEMORY_LIMIT_MB'),
+            'engine': current_snapshot().engine,
+        }
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        status = current_app.extensions['jobs'].submit(job_offers, profile_source(data, filters), options)
+    except queue.Full:
+        response = jsonify({'error': 'Job queue is full, retry later'})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    print(f"Queued bulk job {status['id']} with {status['total']} job offers")
+    response = jsonify(status)
+    response.headers['Location'] = f"/jobs/{status['id']}"
+    return response, 202
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id: str):
+    status = read_status(current_app.extensions['jobs'].job_dir, job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(status)
+
+@jobs_bp.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id: str):
+    job_dir = current_app.extensions['jobs'].job_dir
+    if read_status(job_dir, job_id) is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    offset = request.args.get('offset', 0, type=int)
+    follow = request.args.get('follow', '') in ('1', 'true')
+    return Response(iter_results(job_dir, job_id, max(0, offset), follow), mimetype='application/x-ndjson')
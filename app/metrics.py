@@ -0,0 +1,93 @@
+"""
+In-process metrics exposed in the Prometheus text format at ``GET /metrics``.
+
+Counters only go up; summaries keep the count, sum, minimum and maximum of the
+observed values. Every worker process keeps its own registry, so behind the
+pre-fork launcher each scrape sees the worker that answered it.
+"""
+
+import math
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from flask import Blueprint, Response, current_app
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in (labels or {}).items()))
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in key)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + '}'
+
+class Metrics:
+    """Thread-safe registry of counters and summaries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._summaries: Dict[str, Dict[LabelKey, Dict[str, float]]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+
+    def increment(self, name: str, labels: Optional[Dict[str, Any]] = None, amount: float = 1.0) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        if value is None or math.isnan(value):
+            return
+        key = _label_key(labels)
+        with self._lock:
+            summary = self._summaries.setdefault(name, {}).setdefault(
+                key, {'count': 0, 'sum': 0.0, 'min': math.inf, 'max': -math.inf})
+            summary['count'] += 1
+            summary['sum'] += value
+            summary['min'] = min(summary['min'], value)
+            summary['max'] = max(summary['max'], value)
+
+    def counter(self, name: str, labels: Optional[Dict[str, Any]] = None) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def summary(self, name: str, labels: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, float]]:
+        """count, sum, min, max and mean of a summary, None when nothing was observed"""
+        with self._lock:
+            summary = self._summaries.get(name, {}).get(_label_key(labels))
+            if summary is None:
+                return None
+            return {**summary, 'mean': summary['sum'] / summary['count']}
+
+    def render(self) -> str:
+        """Prometheus text exposition of every metric"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                kind, help_text = self._help.get(name, ('counter', ''))
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+                lines += [f'{name}{_format_labels(key)} {value:g}' for key, value in sorted(series.items())]
+            for name, series in sorted(self._summaries.items()):
+                _, help_text = self._help.get(name, ('summary', ''))
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} summary']
+                for key, summary in sorted(series.items()):
+                    labels = _format_labels(key)
+                    lines.append(f"{name}_count{labels} {summary['count']}")
+                    lines.append(f"{name}_sum{labels} {summary['sum']:g}")
+                # Extremes as separate gauges, a summary has no min/max samples
+                for bound in ('min', 'max'):
+                    lines += [f'# TYPE {name}_{bound} gauge']
+                    lines += [f'{name}_{bound}{_format_labels(key)} {summary[bound]:g}' for key, summary in sorted(series.items())]
+        return '\n'.join(lines) + '\n'
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(current_app.extensions['metrics'].render(), mimetype='text/plain; version=0.0.4')
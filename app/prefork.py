@@ -0,0 +1,161 @@
+"""
+Pre-fork production launcher.
+
+The parent process loads the model and the read-only catalogs once with
+``create_prefork_app``, binds the listening socket and forks the workers.
+Workers inherit everything copy-on-write, so the model and indexes are held in
+memory once per host instead of once per worker.
+
+    python -m app.prefork --workers 4 --port 5000 --profile-catalog data/user_profiles.rcat
+
+With ``--threaded`` every worker also serves its requests in threads, sharing
+one engine (see app/engine.py); MAX_CONCURRENT_REQUESTS still bounds the
+requests scoring at once in a worker.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+from typing import List, Dict, Optional
+
+from werkzeug.serving import make_server
+
+from . import create_prefork_app
+
+def worker_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    Return memory usage of a process in kB: rss, pss (proportional share of
+    shared pages) and uss (pages private to the process). Linux only.
+    """
+    fields = {}
+    for path in (f"/proc/{pid}/smaps_rollup", f"/proc/{pid}/smaps"):
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 3 and parts[2] == 'kB':
+                        fields[parts[0].rstrip(':')] = fields.get(parts[0].rstrip(':'), 0) + int(parts[1])
+            break
+        except OSError:
+            continue
+    if not fields:
+        return None
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+def report_memory(workers: List[int]) -> None:
+    """Print per-worker memory, so copy-on-write sharing can be checked"""
+    parent = worker_memory(os.getpid())
+    if parent is None:
+        print("⚠️ Per-worker memory is only available on Linux")
+        return
+    print(f"📊 parent {os.getpid()}: rss={parent['rss'] / 1024:.1f}MB pss={parent['pss'] / 1024:.1f}MB")
+    for pid in workers:
+        memory = worker_memory(pid)
+        if memory:
+            print(f"📊 worker {pid}: uss={memory['uss'] / 1024:.1f}MB pss={memory['pss'] / 1024:.1f}MB rss={memory['rss'] / 1024:.1f}MB")
+    sys.stdout.flush()
+
+class PreforkServer:
+    """Fork a fixed number of workers that all accept on one shared socket"""
+
+    def __init__(self, app, host: str, port: int, workers: int, threaded: bool = False):
+        self.server = make_server(host, port, app, threaded=threaded)
+        self.workers = workers
+        self.children: List[int] = []
+        self.running = True
+
+    def spawn_worker(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            # Worker: default signal handling, collector back on for new objects
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            gc.enable()
+            try:
+                self.server.serve_forever()
+            finally:
+                os._exit(0)
+        self.children.append(pid)
+        return pid
+
+    def stop(self, *_args) -> None:
+        self.running = False
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def serve(self, report_interval: float = 0.0) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn_worker()
+        print(f"✅ Serving on http://{self.server.host}:{self.server.port} with {self.workers} workers: {self.children}")
+        sys.stdout.flush()
+
+        next_report = time.monotonic() + 1.0
+        while self.running:
+            # Replace workers that died, report memory on schedule
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid and pid in self.children:
+                self.children.remove(pid)
+                if self.running:
+                    print(f"⚠️ Worker {pid} exited with status {status}, restarting")
+                    self.spawn_worker()
+            if time.monotonic() >= next_report:
+                report_memory(self.children)
+                next_report = time.monotonic() + report_interval if report_interval > 0 else float('inf')
+            time.sleep(0.2)
+
+        for pid in self.children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.server.server_close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Run the recommendation API with pre-forked workers')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('RECOMMENDER_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--profile-catalog', default=os.environ.get('PROFILE_CATALOG'))
+    parser.add_argument('--job-catalog', default=os.environ.get('JOB_CATALOG'))
+    parser.add_argument('--artifact', default=os.environ.get('RECOMMENDER_ARTIFACT'), help='Engine artifact file')
+    parser.add_argument('--shard-url', action='append', default=None,
+                        help='Run as coordinator over this shard (repeat for every shard)')
+    parser.add_argument('--reload-watch-interval', type=float, default=None,
+                        help='Seconds between checks of the catalog and artifact files; changed files are reloaded')
+    parser.add_argument('--threaded', action='store_true',
+                        help='Serve the requests of each worker in threads sharing its engine')
+    parser.add_argument('--report-interval', type=float, default=0.0,
+                        help='Seconds between memory reports (0 reports once after startup)')
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, 'fork'):
+        parser.error('the pre-fork launcher needs os.fork (Linux/macOS)')
+
+    config = {
+        'PROFILE_CATALOG': args.profile_catalog,
+        'JOB_CATALOG': args.job_catalog,
+        'ENGINE_ARTIFACT': args.artifact,
+        'RELOAD_WATCH_INTERVAL': args.reload_watch_interval,
+    }
+    if args.shard_url:
+        config['SHARD_URLS'] = args.shard_url
+    app = create_prefork_app(config)
+    PreforkServer(app, args.host, args.port, max(1, args.workers), args.threaded).serve(args.report_interval)
+
+if __name__ == '__main__':
+    main()
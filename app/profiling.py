@@ -0,0 +1,152 @@
+"""
+Opt-in profiling of single API requests.
+
+An admin adds ``?profile=1`` (sampling profiler, flamegraph-ready collapsed
+stacks) or ``?profile=cprofile`` (deterministic profiler, pstats file) to a
+recommendation request. Allocations are traced with ``tracemalloc`` in both
+modes. The artifacts are written to ``PROFILE_DIR/<id>/`` and the id is
+returned in the ``X-Profile-Id`` header; only the newest
+``PROFILE_RETENTION`` profiles are kept.
+
+Render a sampled profile with flamegraph.pl or speedscope::
+
+    flamegraph.pl profiles/<id>/stacks.collapsed > profile.svg
+"""
+
+import cProfile
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from functools import wraps
+from typing import Dict, Any
+
+from flask import current_app, request, jsonify
+
+from .admin import is_admin_request
+
+PROFILE_MODES = {'1': 'sample', 'sample': 'sample', 'cprofile': 'cprofile'}
+
+# tracemalloc and the profilers are process-wide: profile one request at a time
+_PROFILE_LOCK = threading.Lock()
+
+class StackSampler(threading.Thread):
+    """Sample the stack of one thread at a fixed interval and count collapsed stacks"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+def write_allocations(start: tracemalloc.Snapshot, end: tracemalloc.Snapshot, path: str,
+                      limit: int = 50) -> Dict[str, int]:
+    """
+    Write the top allocation sites of the request and return the totals:
+    the blocks allocated between the two snapshots and still alive at the
+    end (freed ones only show in peak_traced_bytes).
+    """
+    statistics = end.compare_to(start, 'lineno')
+    totals = {
+        'allocation_count': sum(stat.count_diff for stat in statistics),
+        'allocated_bytes': sum(stat.size_diff for stat in statistics),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"# {totals['allocation_count']} allocations surviving the request, {totals['allocated_bytes']} bytes\n")
+        for stat in statistics[:limit]:
+            frame = stat.traceback[0]
+            f.write(f"{stat.size_diff:>+12} B {stat.count_diff:>+8} blocks  {frame.filename}:{frame.lineno}\n")
+    return totals
+
+def enforce_retention(profile_dir: str, retention: int) -> None:
+    """Delete the oldest stored profiles beyond the retention limit"""
+    entries = [os.path.join(profile_dir, name) for name in os.listdir(profile_dir)]
+    entries = sorted((path for path in entries if os.path.isdir(path)), key=os.path.getmtime, reverse=True)
+    for path in entries[retention:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def profiled(view):
+    """Run the view under a profiler when an admin asks for it with ?profile="""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        requested = request.args.get('profile')
+        if not requested:
+            return view(*args, **kwargs)
+        if not is_admin_request():
+            return jsonify({'error': 'Profiling requires a valid X-Admin-Token'}), 403
+        mode = PROFILE_MODES.get(requested)
+        if mode is None:
+            return jsonify({'error': f"profile must be one of {sorted(PROFILE_MODES)}"}), 400
+
+        profile_id = uuid.uuid4().hex[:16]
+        profile_dir = current_app.config['PROFILE_DIR']
+        target = os.path.join(profile_dir, profile_id)
+        with _PROFILE_LOCK:
+            print(f"🔬 Profiling {request.path} ({mode}) as {profile_id}")
+            tracemalloc.start()
+            start_snapshot = tracemalloc.take_snapshot()
+            profiler = cProfile.Profile() if mode == 'cprofile' else None
+            sampler = None
+            if mode == 'sample':
+                sampler = StackSampler(threading.get_ident(), current_app.config['PROFILE_SAMPLE_INTERVAL_MS'] / 1000.0)
+                sampler.start()
+            start = time.perf_counter()
+            try:
+                if profiler is not None:
+                    response = current_app.make_response(profiler.runcall(view, *args, **kwargs))
+                else:
+                    response = current_app.make_response(view(*args, **kwargs))
+            finally:
+                duration = time.perf_counter() - start
+                if sampler is not None:
+                    sampler.stop()
+                end_snapshot = tracemalloc.take_snapshot()
+                _, peak_traced_bytes = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            os.makedirs(target, exist_ok=True)
+            meta: Dict[str, Any] = {
+                'id': profile_id,
+                'mode': mode,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 3),
+                'peak_traced_bytes': peak_traced_bytes,
+                'created_at': time.time(),
+            }
+            if profiler is not None:
+                profiler.dump_stats(os.path.join(target, 'profile.pstats'))
+            if sampler is not None:
+                with open(os.path.join(target, 'stacks.collapsed'), 'w', encoding='utf-8') as f:
+                    for stack, count in sampler.stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+                meta['samples'] = sum(sampler.stacks.values())
+            meta.update(write_allocations(start_snapshot, end_snapshot, os.path.join(target, 'allocations.txt')))
+            with open(os.path.join(target, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+            enforce_retention(profile_dir, current_app.config['PROFILE_RETENTION'])
+
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+    return wrapper
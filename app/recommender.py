@@ -1,22 +1,28 @@
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+import heapq
+import itertools
 import re
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, Tuple, Callable, FrozenSet, Iterable
 import numpy as np
+from .engine import MODEL_NAME, RecommenderEngine
+from .fields import FIELD_COMPONENTS, field_similarities
+from .fuzzy import resolve_fuzzy_matches, is_close_spelling, FUZZY_MATCH_THRESHOLD
 import warnings
 warnings.filterwarnings('ignore')
 
-# Try to load pre-trained model (optional)
-ML_MODEL = None
-try:
-    from sentence_transformers import SentenceTransformer
-    # Using a small, fast model that downloads quickly
-    ML_MODEL = SentenceTransformer('all-MiniLM-L6-v2')
-    print("✅ Pre-trained ML model loaded successfully")
-except Exception as e:
-    print(f"⚠️ Could not load pre-trained model: {e}")
-    print("🔄 Using enhanced TF-IDF mode instead")
-    ML_MODEL = None
+# Model, engine artifact and caches shared by every thread of the process.
+# Ranking functions take an ``engine`` argument and use this one by default.
+ENGINE = RecommenderEngine()
+
+def get_model():
+    """Pre-trained model of the serving engine, loaded on first use; None when it is not available"""
+    return ENGINE.get_model()
+
+def pretrained_available() -> bool:
+    """Whether pre-trained similarity is scored; an artifact with embeddings avoids loading the model"""
+    return ENGINE.pretrained_available()
 
 # --- Helper functions for competency matching ---
 def normalize_text(text: str) -> str:
@@ -58,69 +64,198 @@ def extract_competencies_from_job(job: Dict[str, Any]) -> List[str]:
     
     return list(set(competencies))  # Remove duplicates
 
-def calculate_competency_match(user_competencies: List[str], job_competencies: List[str]) -> float:
-    """Calculate competency match score using HYBRID approach with pre-trained ML model"""
+def calculate_direct_matches(user_competencies: List[str], job_competencies: List[str],
+                             fuzzy_matches: Optional[Dict[str, FrozenSet[str]]] = None) -> float:
+    """
+    Count direct matches: 1 per exact match, 0.8 per containment or close
+    spelling, 0.5 per word overlap. Close spellings come from the request's
+    resolved ``fuzzy_matches`` (see app/fuzzy.py); without them each pair is
+    checked on its own.
+    """
+    direct_matches = 0
+    
+    for job_comp in job_competencies:
+        for user_comp in user_competencies:
+            job_normalized = normalize_text(job_comp)
+            user_normalized = normalize_text(user_comp)
+            
+            # Check for exact match
+            if job_normalized == user_normalized:
+                direct_matches += 1
+                break
+            # Check if one contains the other
+            elif job_normalized in user_normalized or user_normalized in job_normalized:
+                direct_matches += 0.8
+                break
+            # Check for a close spelling (typo)
+            elif (user_normalized in fuzzy_matches.get(job_normalized, ()) if fuzzy_matches is not None
+                  else FUZZY_MATCH_THRESHOLD is not None
+                  and is_close_spelling(job_normalized, user_normalized, FUZZY_MATCH_THRESHOLD)):
+                direct_matches += 0.8
+                break
+            # Check for word overlap
+            else:
+                job_words = set(job_normalized.split())
+                user_words = set(user_normalized.split())
+                if job_words.intersection(user_words):
+                    direct_matches += 0.5
+                    break
+    
+    return direct_matches
+
+# Results scoring below this percentage are not returned
+MIN_MATCH_SCORE = 10.0
+
+# Hybrid score settings; requests and the SCORING config override them (see resolve_scoring)
+DEFAULT_SCORING = {
+    'weights': {
+        'direct': 0.4,      # Direct matching is most reliable
+        'pretrained': 0.4,  # Pre-trained model provides semantic understanding
+        'tfidf': 0.2,       # TF-IDF as backup
+    },
+    'no_direct_cap': 0.8,   # Cap at 80% without direct matches
+    'no_model_cap': 0.6,    # Lower confidence without ML model
+    'min_score': MIN_MATCH_SCORE,
+    # Share of the final score given to each free-text field similarity
+    # (see app/fields.py); the competency score keeps the rest. 0 = not used
+    'fields': dict.fromkeys(FIELD_COMPONENTS, 0.0),
+}
+
+# Columns of a component score matrix (see combine_hybrid_scores), followed by
+# FIELD_COMPONENTS when field similarities were kept
+SCORE_COMPONENTS = ('direct', 'tfidf', 'pretrained')
+
+def resolve_scoring(*overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """DEFAULT_SCORING with each override applied in turn, raises ValueError when invalid"""
+    scoring = {**DEFAULT_SCORING, 'weights': dict(DEFAULT_SCORING['weights']), 'fields': dict(DEFAULT_SCORING['fields'])}
+    for override in overrides:
+        if override is None:
+            continue
+        if not isinstance(override, dict) or set(override) - set(DEFAULT_SCORING):
+            raise ValueError(f"scoring must be an object with keys {sorted(DEFAULT_SCORING)}")
+        for key, value in override.items():
+            if key in ('weights', 'fields'):
+                if not isinstance(value, dict) or set(value) - set(DEFAULT_SCORING[key]):
+                    raise ValueError(f"scoring.{key} must be an object with keys {sorted(DEFAULT_SCORING[key])}")
+                for name, weight in value.items():
+                    if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+                        raise ValueError(f'scoring.{key}.{name} must be a non-negative number')
+                scoring[key].update(value)
+            elif isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f'scoring.{key} must be a non-negative number')
+            else:
+                scoring[key] = value
+    if sum(scoring['fields'].values()) > 1:
+        raise ValueError('scoring.fields weights must add up to at most 1')
+    return scoring
+
+def fields_enabled(scoring: Optional[Dict[str, Any]] = None) -> bool:
+    """Whether field similarities take part in the score"""
+    return any((scoring or DEFAULT_SCORING).get('fields', {}).values())
+
+def blend_field_scores(scores, field_scores: np.ndarray, scoring: Optional[Dict[str, Any]] = None):
+    """
+    Give each field similarity (columns FIELD_COMPONENTS, a row or a matrix)
+    its weight in the final score and the competency score the rest.
+    """
+    scoring = scoring or DEFAULT_SCORING
+    if not fields_enabled(scoring):
+        return scores
+    weights = np.array([scoring['fields'][name] for name in FIELD_COMPONENTS], dtype=np.float64)
+    blended = scores * (1.0 - weights.sum()) + field_scores @ weights
+    return float(blended) if np.ndim(blended) == 0 else blended
+
+def combine_hybrid_score(direct_matches: float, total_job_competencies: int,
+                         tfidf_score: float, pretrained_score: float,
+                         scoring: Optional[Dict[str, Any]] = None) -> float:
+    """Combine direct, TF-IDF and pre-trained scores into the final hybrid score"""
+    scoring = scoring or DEFAULT_SCORING
+    direct_percentage = (direct_matches / total_job_competencies) * 100 if total_job_competencies > 0 else 0.0
+    
+    # HYBRID SCORING: Combine all three approaches
+    if direct_matches == 0:
+        # If no direct matches, rely on ML models
+        if pretrained_score > 0:
+            return max(tfidf_score, pretrained_score) * scoring['no_direct_cap']
+        else:
+            return tfidf_score * scoring['no_model_cap']
+    
+    # Weighted combination of all three methods
+    weights = scoring['weights']
+    
+    # Calculate weighted score
+    final_score = (
+        direct_percentage * weights['direct'] +
+        pretrained_score * weights['pretrained'] +
+        tfidf_score * weights['tfidf']
+    )
+    
+    # Ensure score doesn't exceed 100%
+    return min(final_score, 100.0)
+
+def combine_hybrid_scores(components: np.ndarray, scoring: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """
+    Vectorized combine_hybrid_score over a (pairs, 3) matrix of direct match
+    percentage, TF-IDF and pre-trained scores (columns SCORE_COMPONENTS),
+    blended with the field similarities of extra FIELD_COMPONENTS columns.
+    Re-weighting stored components gives the scores a full scoring run with
+    the same settings would give, without recomputing any component.
+    """
+    scoring = scoring or DEFAULT_SCORING
+    weights = scoring['weights']
+    direct, tfidf, pretrained = (components[:, column] for column in range(len(SCORE_COMPONENTS)))
+    without_direct = np.where(pretrained > 0,
+                              np.maximum(tfidf, pretrained) * scoring['no_direct_cap'],
+                              tfidf * scoring['no_model_cap'])
+    weighted = np.minimum(direct * weights['direct'] + pretrained * weights['pretrained'] + tfidf * weights['tfidf'], 100.0)
+    scores = np.where(direct > 0, weighted, without_direct)
+    if components.shape[1] > len(SCORE_COMPONENTS):
+        scores = blend_field_scores(scores, components[:, len(SCORE_COMPONENTS):], scoring)
+    return scores
+
+def rerank_components(items: List[Dict[str, Any]], result_key: str, components: np.ndarray,
+                      scoring: Optional[Dict[str, Any]] = None, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Rank items again from their stored component scores under new scoring settings"""
+    scoring = scoring or DEFAULT_SCORING
+    scores = combine_hybrid_scores(components, scoring)
+    kept = np.flatnonzero(scores >= scoring['min_score'])
+    # Highest score first, ties in input order, as in rank_matches
+    ranked = kept[np.lexsort((kept, -scores[kept]))][:top_k]
+    return [{result_key: items[index], 'score': float(scores[index])} for index in ranked]
+
+def calculate_competency_match(user_competencies: List[str], job_competencies: List[str],
+                               pretrained_score: Optional[float] = None,
+                               tfidf_score: Optional[float] = None,
+                               fuzzy_matches: Optional[Dict[str, FrozenSet[str]]] = None,
+                               scoring: Optional[Dict[str, Any]] = None,
+                               components: Optional[Dict[str, float]] = None,
+                               engine: Optional[RecommenderEngine] = None) -> float:
+    """
+    Calculate competency match score using HYBRID approach with pre-trained ML model.
+    The direct match percentage, TF-IDF and pre-trained scores are stored in
+    ``components`` when given, so the pair can be re-weighted later.
+    """
+    if components is not None:
+        components.update(dict.fromkeys(SCORE_COMPONENTS, 0.0))
     if not user_competencies or not job_competencies:
         return 0.0
     
     try:
         # First, calculate direct matching (more reliable for short lists)
-        direct_matches = 0
-        total_job_competencies = len(job_competencies)
+        direct_matches = calculate_direct_matches(user_competencies, job_competencies, fuzzy_matches)
         
-        for job_comp in job_competencies:
-            for user_comp in user_competencies:
-                job_normalized = normalize_text(job_comp)
-                user_normalized = normalize_text(user_comp)
-                
-                # Check for exact match
-                if job_normalized == user_normalized:
-                    direct_matches += 1
-                    break
-                # Check if one contains the other
-                elif job_normalized in user_normalized or user_normalized in job_normalized:
-                    direct_matches += 0.8
-                    break
-                # Check for word overlap
-                else:
-                    job_words = set(job_normalized.split())
-                    user_words = set(user_normalized.split())
-                    if job_words.intersection(user_words):
-                        direct_matches += 0.5
-                        break
+        # Calculate TF-IDF similarity (unless already computed)
+        if tfidf_score is None:
+            tfidf_score = calculate_tfidf_similarity(user_competencies, job_competencies)
         
-        direct_percentage = (direct_matches / total_job_competencies) * 100 if total_job_competencies > 0 else 0.0
+        # Calculate pre-trained ML model similarity (unless precomputed in batch)
+        if pretrained_score is None:
+            pretrained_score = calculate_pretrained_similarity(user_competencies, job_competencies, engine)
         
-        # Calculate TF-IDF similarity
-        tfidf_score = calculate_tfidf_similarity(user_competencies, job_competencies)
-        
-        # Calculate pre-trained ML model similarity
-        pretrained_score = calculate_pretrained_similarity(user_competencies, job_competencies)
-        
-        # HYBRID SCORING: Combine all three approaches
-        if direct_matches == 0:
-            # If no direct matches, rely on ML models
-            if pretrained_score > 0:
-                return max(tfidf_score, pretrained_score) * 0.8  # Cap at 80% without direct matches
-            else:
-                return tfidf_score * 0.6  # Lower confidence without ML model
-        
-        # Weighted combination of all three methods
-        weights = {
-            'direct': 0.4,      # Direct matching is most reliable
-            'pretrained': 0.4,   # Pre-trained model provides semantic understanding
-            'tfidf': 0.2         # TF-IDF as backup
-        }
-        
-        # Calculate weighted score
-        final_score = (
-            direct_percentage * weights['direct'] +
-            pretrained_score * weights['pretrained'] +
-            tfidf_score * weights['tfidf']
-        )
-        
-        # Ensure score doesn't exceed 100%
-        return min(final_score, 100.0)
+        if components is not None:
+            components.update(direct=direct_matches / len(job_competencies) * 100,
+                              tfidf=tfidf_score, pretrained=pretrained_score)
+        return combine_hybrid_score(direct_matches, len(job_competencies), tfidf_score, pretrained_score, scoring)
         
     except Exception as e:
         print(f"Error calculating competency match: {e}")
@@ -156,30 +291,72 @@ def calculate_tfidf_similarity(user_competencies: List[str], job_competencies: L
         print(f"Error calculating TF-IDF similarity: {e}")
         return 0.0
 
-def calculate_pretrained_similarity(user_competencies: List[str], job_competencies: List[str]) -> float:
+# Number of pairs whose similarity matrices are computed in one NumPy product
+PRETRAINED_BATCH_SIZE = 512
+
+def get_skill_embeddings(skills: List[str], engine: Optional[RecommenderEngine] = None) -> np.ndarray:
+    """Return normalized embeddings for skills, encoding only the unseen ones (see RecommenderEngine.encode_skills)"""
+    return (engine or ENGINE).encode_skills(skills)
+
+def calculate_pretrained_similarity(user_competencies: List[str], job_competencies: List[str],
+                                    engine: Optional[RecommenderEngine] = None) -> float:
     """Calculate similarity using pre-trained sentence transformer model"""
-    if ML_MODEL is None:
-        return 0.0
+    return float(calculate_pretrained_similarity_batch([(user_competencies, job_competencies)], engine)[0])
+
+def calculate_pretrained_similarity_batch(pairs: List[Tuple[List[str], List[str]]],
+                                          engine: Optional[RecommenderEngine] = None) -> np.ndarray:
+    """
+    Calculate pre-trained similarity for many (user, job) competency pairs at once.
+    Every distinct skill is encoded once, then all skill-by-skill similarity
+    matrices are computed in a single padded NumPy product.
+    """
+    engine = engine or ENGINE
+    scores = np.zeros(len(pairs), dtype=np.float64)
+    if not pairs or not engine.pretrained_available():
+        return scores
     
     try:
-        # Combine competencies into meaningful text
-        user_text = ' '.join(user_competencies)
-        job_text = ' '.join(job_competencies)
-        
-        # Get embeddings from pre-trained model
-        embeddings = ML_MODEL.encode([user_text, job_text])
+        vocabulary = list(dict.fromkeys(skill for user_comps, job_comps in pairs for skill in (*user_comps, *job_comps)))
+        if not vocabulary:
+            return scores
+        skill_index = {skill: i for i, skill in enumerate(vocabulary)}
+        embeddings = engine.encode_skills(vocabulary)
         
-        # Calculate cosine similarity
-        similarity = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
-        
-        # Convert to percentage (0-100)
-        return similarity * 100
+        # Pad every pair to the same shape; index -1 points at a zero vector
+        padded = np.vstack([embeddings, np.zeros((1, embeddings.shape[1]), dtype=embeddings.dtype)])
+        for start in range(0, len(pairs), PRETRAINED_BATCH_SIZE):
+            block = pairs[start:start + PRETRAINED_BATCH_SIZE]
+            max_user = max(1, max(len(user_comps) for user_comps, _ in block))
+            max_job = max(1, max(len(job_comps) for _, job_comps in block))
+            user_ids = np.full((len(block), max_user), -1, dtype=np.int64)
+            job_ids = np.full((len(block), max_job), -1, dtype=np.int64)
+            for row, (user_comps, job_comps) in enumerate(block):
+                user_ids[row, :len(user_comps)] = [skill_index[skill] for skill in user_comps]
+                job_ids[row, :len(job_comps)] = [skill_index[skill] for skill in job_comps]
+            
+            similarity = np.einsum('bud,bjd->buj', padded[user_ids], padded[job_ids])
+            
+            # Padded user skills must never win the max; padded job skills are not averaged
+            similarity[user_ids < 0] = -np.inf
+            best_per_job_skill = np.clip(similarity.max(axis=1), 0.0, 1.0)
+            job_mask = job_ids >= 0
+            job_counts = job_mask.sum(axis=1)
+            valid = (job_counts > 0) & (user_ids >= 0).any(axis=1)
+            totals = np.where(job_mask, best_per_job_skill, 0.0).sum(axis=1)
+            scores[start:start + len(block)][valid] = totals[valid] / job_counts[valid] * 100
+        return scores
         
     except Exception as e:
         print(f"Error calculating pre-trained similarity: {e}")
-        return 0.0
+        return scores
 
-def calculate_user_job_score(user_profile: Dict[str, Any], job_offer: Dict[str, Any]) -> float:
+def calculate_user_job_score(user_profile: Dict[str, Any], job_offer: Dict[str, Any],
+                             pretrained_score: Optional[float] = None,
+                             tfidf_score: Optional[float] = None,
+                             fuzzy_matches: Optional[Dict[str, FrozenSet[str]]] = None,
+                             scoring: Optional[Dict[str, Any]] = None,
+                             components: Optional[Dict[str, float]] = None,
+                             engine: Optional[RecommenderEngine] = None) -> float:
     """
     Calculate match score between user and job offer.
     Uses HYBRID approach: Direct matching + TF-IDF + Pre-trained ML model
@@ -208,67 +385,349 @@ def calculate_user_job_score(user_profile: Dict[str, Any], job_offer: Dict[str,
                 break
     
     direct_percentage = (direct_matches / total_job_competencies) * 100 if total_job_competencies > 0 else 0.0
-    tfidf_score = calculate_tfidf_similarity(user_competencies, job_competencies)
-    pretrained_score = calculate_pretrained_similarity(user_competencies, job_competencies)
+    if tfidf_score is None:
+        tfidf_score = calculate_tfidf_similarity(user_competencies, job_competencies)
+    if pretrained_score is None:
+        pretrained_score = calculate_pretrained_similarity(user_competencies, job_competencies, engine)
     
     print(f"Direct match: {direct_percentage:.1f}%")
     print(f"TF-IDF score: {tfidf_score:.1f}%")
     print(f"Pre-trained ML score: {pretrained_score:.1f}%")
     
     # Calculate final hybrid score
-    competency_score = calculate_competency_match(user_competencies, job_competencies)
+    competency_score = calculate_competency_match(user_competencies, job_competencies, pretrained_score, tfidf_score,
+                                                  fuzzy_matches, scoring, components, engine)
     
     print(f"🎯 FINAL HYBRID SCORE: {competency_score:.1f}%")
     print("=" * 50)
     
     return competency_score
 
-def match_jobs_for_candidate(user_profile: Dict[str, Any], job_offers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# Pairs scored between two deadline checks of the anytime ranking
+ANYTIME_BLOCK_SIZE = 32
+
+# Cascade ranking settings (see run_cascade_filters)
+DEFAULT_CASCADE = {
+    'stage1_min_score': MIN_MATCH_SCORE,  # Pairs whose cheap estimate is below this are dropped
+    'stage2_top_m': 100,                  # Best remaining pairs sent to the sentence-transformer
+    'ambiguous_margin': 5.0,              # Pairs this close to the M-th estimate are kept too
+}
+
+def run_cascade_filters(pairs: List[Tuple[List[str], List[str]]], cascade: Dict[str, Any],
+                        deadline: Optional[float] = None,
+                        fuzzy_matches: Optional[Dict[str, FrozenSet[str]]] = None,
+                        scoring: Optional[Dict[str, Any]] = None,
+                        field_scores: Optional[np.ndarray] = None,
+                        engine: Optional[RecommenderEngine] = None
+                        ) -> Tuple[List[int], Dict[int, float], bool, Dict[str, int]]:
     """
-    Find matching jobs for a candidate using ADVANCED competency-based scoring.
+    Cheap stages of the cascade ranking.
+
+    Stage 1 runs direct matching and TF-IDF on every pair and estimates the
+    hybrid score (TF-IDF stands in for the pre-trained score), blended with the
+    pair's ``field_scores`` row when given. Pairs below ``stage1_min_score``
+    are dropped. Stage 2 keeps the ``stage2_top_m`` best
+    estimates plus the ambiguous pairs within ``ambiguous_margin`` of the
+    M-th one; only those survivors get the sentence-transformer and the final
+    hybrid score.
+
+    Returns the surviving pair indices, their TF-IDF scores, whether the
+    deadline interrupted stage 1, and per-stage counts.
     """
-    print(f"\n=== JOBS FOR CANDIDATE: {user_profile.get('matricule', '')} ===")
-    print(f"Processing {len(job_offers)} job offers")
+    settings = {**DEFAULT_CASCADE, **cascade}
+    pretrained = (engine or ENGINE).pretrained_available()
+    estimates: Dict[int, float] = {}
+    tfidf_scores: Dict[int, float] = {}
+    partial = False
+    
+    for index, (user_competencies, job_competencies) in enumerate(pairs):
+        if index % ANYTIME_BLOCK_SIZE == 0 and deadline is not None and time.monotonic() >= deadline:
+            partial = True
+            break
+        if not user_competencies or not job_competencies:
+            estimates[index] = 0.0
+        else:
+            direct_matches = calculate_direct_matches(user_competencies, job_competencies, fuzzy_matches)
+            tfidf_scores[index] = calculate_tfidf_similarity(user_competencies, job_competencies)
+            pretrained_estimate = tfidf_scores[index] if pretrained else 0.0
+            estimates[index] = combine_hybrid_score(direct_matches, len(job_competencies), tfidf_scores[index],
+                                                    pretrained_estimate, scoring)
+        if field_scores is not None:
+            estimates[index] = blend_field_scores(estimates[index], field_scores[index], scoring)
+    
+    stage1 = sorted((index for index, estimate in estimates.items() if estimate >= settings['stage1_min_score']),
+                    key=lambda index: (-estimates[index], index))
+    
+    top_m = settings['stage2_top_m']
+    survivors = stage1
+    if top_m is not None and len(stage1) > top_m:
+        cutoff = estimates[stage1[top_m - 1]] - settings['ambiguous_margin']
+        survivors = stage1[:top_m] + [index for index in stage1[top_m:] if estimates[index] >= cutoff]
+    
+    cascade_stats = {
+        'pairs': len(pairs),
+        'stage1_scored': len(estimates),
+        'stage1_removed': len(estimates) - len(stage1),
+        'stage2_removed': len(stage1) - len(survivors),
+        'survivors': len(survivors),
+    }
+    print(f"🪜 Cascade: {cascade_stats['pairs']} pairs, stage 1 removed {cascade_stats['stage1_removed']}, "
+          f"stage 2 removed {cascade_stats['stage2_removed']}, {cascade_stats['survivors']} scored in full")
+    return sorted(survivors), tfidf_scores, partial, cascade_stats
+
+def rank_matches(items: List[Dict[str, Any]], result_key: str,
+                 pair_competencies: Callable[[Dict[str, Any]], Tuple[List[str], List[str]]],
+                 score_item: Callable[..., float],
+                 deadline: Optional[float] = None, top_k: Optional[int] = None,
+                 stats: Optional[Dict[str, Any]] = None,
+                 cascade: Optional[Dict[str, Any]] = None,
+                 scoring: Optional[Dict[str, Any]] = None,
+                 keep_components: bool = False,
+                 pair_fields: Optional[Callable[[List[Dict[str, Any]]], np.ndarray]] = None,
+                 engine: Optional[RecommenderEngine] = None) -> List[Dict[str, Any]]:
+    """
+    Score items block by block and keep the best results.
+
+    The ranking is "anytime": when ``deadline`` (a ``time.monotonic()``
+    timestamp) passes, scoring stops and the best results found so far are
+    returned, with ``stats['partial']`` set. With ``top_k`` only the k best
+    results are kept while scoring. With ``cascade`` (settings overriding
+    ``DEFAULT_CASCADE``) only the pairs surviving the cheap stages are
+    scored in full. ``scoring`` overrides DEFAULT_SCORING (see resolve_scoring).
+    ``pair_fields`` gives the field similarities of a list of items (see
+    app/fields.py); they are blended in when ``scoring`` weighs fields.
+    ``engine`` (the process ENGINE by default) provides the model and caches.
+
+    With ``keep_components`` and ``stats``, the component scores of every
+    scored pair are returned in ``stats['components']`` (the result key, the
+    scored items and a matrix with columns SCORE_COMPONENTS, then
+    FIELD_COMPONENTS with ``pair_fields``) for rerank_components.
+    """
+    scoring = scoring or DEFAULT_SCORING
+    # Min-heap of (score, -index, index): the weakest kept result is on top,
+    # and among equal scores the later item is dropped first
+    heap: List[Tuple[float, int, int]] = []
+    scored = 0
+    partial = False
+    order = list(range(len(items)))
+    tfidf_scores: Dict[int, float] = {}
+    pairs = [pair_competencies(item) for item in items]
+    component_rows: List[Tuple[int, Dict[str, float]]] = []
     
-    results = []
+    # Resolve close competency spellings of the whole request in one sparse product
+    fuzzy_matches = resolve_fuzzy_matches(pairs, FUZZY_MATCH_THRESHOLD) if FUZZY_MATCH_THRESHOLD is not None else None
+    # Field similarities of every item from the cached field vectors, kept for re-ranking too
+    field_scores = None
+    if pair_fields is not None and (fields_enabled(scoring) or keep_components):
+        field_scores = pair_fields(items)
     
-    for job in job_offers:
-        score = calculate_user_job_score(user_profile, job)
-        results.append({
-            'jobOffer': job,
-            'score': score
-        })
+    if cascade is not None:
+        order, tfidf_scores, partial, cascade_stats = run_cascade_filters(
+            pairs, cascade, deadline, fuzzy_matches, scoring, field_scores if fields_enabled(scoring) else None, engine)
+        if stats is not None:
+            stats['cascade'] = cascade_stats
+        if partial:
+            order = []
+    
+    for start in range(0, len(order), ANYTIME_BLOCK_SIZE):
+        if deadline is not None and time.monotonic() >= deadline:
+            partial = True
+            break
+        block = order[start:start + ANYTIME_BLOCK_SIZE]
+        # Encode every distinct skill once and score the block's pairs in one batch
+        pretrained_scores = calculate_pretrained_similarity_batch([pairs[index] for index in block], engine)
+        
+        for index, pretrained_score in zip(block, pretrained_scores):
+            if deadline is not None and time.monotonic() >= deadline:
+                partial = True
+                break
+            components = {} if keep_components else None
+            score = score_item(items[index], pretrained_score, tfidf_scores.get(index), fuzzy_matches, scoring, components)
+            if field_scores is not None:
+                score = blend_field_scores(score, field_scores[index], scoring)
+                if keep_components:
+                    components.update(zip(FIELD_COMPONENTS, field_scores[index]))
+            scored += 1
+            if keep_components:
+                component_rows.append((index, components))
+            # Filter out very low scores (below 10% by default)
+            if score < scoring['min_score']:
+                continue
+            if top_k is None or len(heap) < top_k:
+                heapq.heappush(heap, (score, -index, index))
+            elif (score, -index) > heap[0][:2]:
+                heapq.heapreplace(heap, (score, -index, index))
+        if partial:
+            break
+    
+    if stats is not None:
+        stats.update({'total': len(items), 'scored': scored, 'partial': partial})
+        if keep_components:
+            columns = SCORE_COMPONENTS + (FIELD_COMPONENTS if field_scores is not None else ())
+            stats['components'] = {
+                'result_key': result_key,
+                'items': [items[index] for index, _ in component_rows],
+                'matrix': np.array([[row[name] for name in columns] for _, row in component_rows],
+                                   dtype=np.float64).reshape(-1, len(columns)),
+            }
+    if partial:
+        print(f"⏱️ Deadline reached after scoring {scored}/{len(items)} items, returning partial results")
     
     # Sort by score (highest first)
-    results.sort(key=lambda x: x['score'], reverse=True)
+    ranked = sorted(heap, key=lambda entry: (-entry[0], entry[2]))
+    return [{result_key: items[index], 'score': score} for score, _, index in ranked]
+
+# Results kept by the chunked ranking when no top_k is given
+DEFAULT_CHUNK_TOP_K = 100
+
+# Rough working set of one pair while its chunk is scored: trigram rows,
+# gathered skill embeddings, similarity matrices and Python objects
+CHUNK_BYTES_PER_PAIR = 64 * 1024
+
+def chunk_size_for_memory_limit(memory_limit_mb: float) -> int:
+    """Largest chunk whose estimated working set fits in memory_limit_mb"""
+    return max(ANYTIME_BLOCK_SIZE, int(memory_limit_mb * 1024 * 1024 // CHUNK_BYTES_PER_PAIR))
+
+def rank_matches_chunked(items: Iterable[Dict[str, Any]], result_key: str,
+                         pair_competencies: Callable[[Dict[str, Any]], Tuple[List[str], List[str]]],
+                         score_item: Callable[..., float], chunk_size: int,
+                         deadline: Optional[float] = None, top_k: Optional[int] = None,
+                         stats: Optional[Dict[str, Any]] = None,
+                         cascade: Optional[Dict[str, Any]] = None,
+                         scoring: Optional[Dict[str, Any]] = None,
+                         pair_fields: Optional[Callable[[List[Dict[str, Any]]], np.ndarray]] = None,
+                         engine: Optional[RecommenderEngine] = None) -> List[Dict[str, Any]]:
+    """
+    Rank items in fixed-size chunks with bounded peak memory.
+
+    Items may be any iterable (e.g. a generator streaming a file). Each chunk
+    goes through ``rank_matches`` on its own, so competency lists, fuzzy
+    matches and score matrices only exist for one chunk at a time, and only a
+    running top-k of results (with their records) is kept across chunks.
+    With a cascade, the stage-2 top-M applies per chunk.
+    """
+    top_k = top_k or DEFAULT_CHUNK_TOP_K
+    # Min-heap of (score, -sequence, sequence, result); sequence follows input order
+    heap: List[Tuple[float, int, int, Dict[str, Any]]] = []
+    totals = {'total': 0, 'scored': 0, 'partial': False}
+    cascade_totals: Dict[str, int] = {}
+    iterator = iter(items)
+    chunk_start = 0
+    
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            break
+        chunk_stats: Dict[str, Any] = {}
+        ranked = rank_matches(chunk, result_key, pair_competencies, score_item, deadline, top_k, chunk_stats, cascade, scoring,
+                              pair_fields=pair_fields, engine=engine)
+        # Within a chunk ties are already in input order, so position keeps it globally
+        for position, result in enumerate(ranked):
+            sequence = chunk_start + position
+            entry = (result['score'], -sequence, sequence, result)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        
+        totals['total'] += chunk_stats['total']
+        totals['scored'] += chunk_stats['scored']
+        for key, value in chunk_stats.get('cascade', {}).items():
+            cascade_totals[key] = cascade_totals.get(key, 0) + value
+        chunk_start += len(chunk)
+        # Release this chunk's records before loading the next one
+        del chunk, ranked
+        if chunk_stats['partial']:
+            totals['partial'] = True
+            break
     
-    # Filter out very low scores (below 10%)
-    results = [r for r in results if r['score'] >= 10.0]
+    if stats is not None:
+        if hasattr(items, '__len__'):
+            totals['total'] = len(items)
+        stats.update(totals)
+        if cascade_totals:
+            stats['cascade'] = cascade_totals
+    
+    return [result for _, _, _, result in sorted(heap, key=lambda entry: (-entry[0], entry[2]))]
+
+def rank_with_options(items: Iterable[Dict[str, Any]], result_key: str,
+                      pair_competencies: Callable[[Dict[str, Any]], Tuple[List[str], List[str]]],
+                      score_item: Callable[..., float],
+                      deadline: Optional[float], top_k: Optional[int], stats: Optional[Dict[str, Any]],
+                      cascade: Optional[Dict[str, Any]], chunk_size: Optional[int],
+                      memory_limit_mb: Optional[float], scoring: Optional[Dict[str, Any]] = None,
+                      keep_components: bool = False,
+                      pair_fields: Optional[Callable[[List[Dict[str, Any]]], np.ndarray]] = None,
+                      engine: Optional[RecommenderEngine] = None) -> List[Dict[str, Any]]:
+    """
+    Run the chunked ranking when a chunk size or memory limit is set, the in-memory one otherwise.
+    Component scores can only be kept in memory, chunks are dropped once ranked.
+    """
+    if chunk_size is None and memory_limit_mb is None:
+        return rank_matches(list(items), result_key, pair_competencies, score_item, deadline, top_k, stats, cascade,
+                            scoring, keep_components, pair_fields, engine)
+    if keep_components:
+        raise ValueError('keep_components is not available with chunked ranking')
+    sizes = [size for size in (chunk_size, memory_limit_mb and chunk_size_for_memory_limit(memory_limit_mb)) if size]
+    return rank_matches_chunked(items, result_key, pair_competencies, score_item, min(sizes),
+                                deadline, top_k, stats, cascade, scoring, pair_fields, engine)
+
+def match_jobs_for_candidate(user_profile: Dict[str, Any], job_offers: Iterable[Dict[str, Any]],
+                             deadline: Optional[float] = None, top_k: Optional[int] = None,
+                             stats: Optional[Dict[str, Any]] = None,
+                             cascade: Optional[Dict[str, Any]] = None,
+                             chunk_size: Optional[int] = None,
+                             memory_limit_mb: Optional[float] = None,
+                             scoring: Optional[Dict[str, Any]] = None,
+                             keep_components: bool = False,
+                             engine: Optional[RecommenderEngine] = None) -> List[Dict[str, Any]]:
+    """
+    Find matching jobs for a candidate using ADVANCED competency-based scoring.
+    """
+    engine = engine or ENGINE
+    print(f"\n=== JOBS FOR CANDIDATE: {user_profile.get('matricule', '')} ===")
+    print(f"Processing {len(job_offers) if hasattr(job_offers, '__len__') else 'streamed'} job offers")
+    
+    user_competencies = extract_competencies_from_user(user_profile)
+    results = rank_with_options(
+        job_offers, 'jobOffer',
+        lambda job: (user_competencies, extract_competencies_from_job(job)),
+        lambda job, *scores: calculate_user_job_score(user_profile, job, *scores, engine=engine),
+        deadline, top_k, stats, cascade, chunk_size, memory_limit_mb, scoring, keep_components,
+        lambda jobs: field_similarities([user_profile], jobs, engine.field_vectors),
+        engine,
+    )
     
     print(f"Returning {len(results)} job recommendations (filtered)")
     return results
 
-def match_candidates_for_job(job_offer: Dict[str, Any], user_profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def match_candidates_for_job(job_offer: Dict[str, Any], user_profiles: Iterable[Dict[str, Any]],
+                             deadline: Optional[float] = None, top_k: Optional[int] = None,
+                             stats: Optional[Dict[str, Any]] = None,
+                             cascade: Optional[Dict[str, Any]] = None,
+                             chunk_size: Optional[int] = None,
+                             memory_limit_mb: Optional[float] = None,
+                             scoring: Optional[Dict[str, Any]] = None,
+                             keep_components: bool = False,
+                             engine: Optional[RecommenderEngine] = None) -> List[Dict[str, Any]]:
     """
     Find matching candidates for a job using ADVANCED competency-based scoring.
+    With ``chunk_size`` or ``memory_limit_mb`` the profiles may be streamed and
+    are scored in chunks, keeping only the ``top_k`` best.
     """
+    engine = engine or ENGINE
     print(f"\n=== CANDIDATES FOR JOB: {job_offer.get('title', job_offer.get('titre_de_poste', ''))} ===")
-    print(f"Processing {len(user_profiles)} user profiles")
+    print(f"Processing {len(user_profiles) if hasattr(user_profiles, '__len__') else 'streamed'} user profiles")
     
-    results = []
-    
-    for user in user_profiles:
-        score = calculate_user_job_score(user, job_offer)
-        results.append({
-            'userProfile': user,
-            'score': score
-        })
-    
-    # Sort by score (highest first)
-    results.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Filter out very low scores (below 10%)
-    results = [r for r in results if r['score'] >= 10.0]
+    job_competencies = extract_competencies_from_job(job_offer)
+    results = rank_with_options(
+        user_profiles, 'userProfile',
+        lambda user: (extract_competencies_from_user(user), job_competencies),
+        lambda user, *scores: calculate_user_job_score(user, job_offer, *scores, engine=engine),
+        deadline, top_k, stats, cascade, chunk_size, memory_limit_mb, scoring, keep_components,
+        lambda users: field_similarities(users, [job_offer], engine.field_vectors),
+        engine,
+    )
     
     print(f"Returning {len(results)} candidate recommendations (filtered)")
-    return results 
\ No newline at end of file
+    return results
@@ -0,0 +1,141 @@
+"""
+Shadow-mode comparison of two ranking engines.
+
+The response is always served by the primary engine (the request's own
+ranking options). On a sampled fraction of requests the same candidates are
+ranked again in a background thread by the shadow engine, the primary options
+overridden by ``SHADOW_ENGINE`` (e.g. ``{"cascade": {}}`` or new ``scoring``),
+and both rankings are compared:
+
+- score deltas of the results both engines returned,
+- Spearman rank correlation of those common results,
+- top-k overlap: share of the primary results the shadow also ranks in its top k,
+- latency of both engines.
+
+Each comparison is logged and recorded in the metrics registry (``GET /metrics``).
+Only ``SHADOW_WORKERS`` comparisons run at a time; samples arriving while all of
+them are busy are skipped, so the shadow never queues up behind production.
+"""
+
+import os
+import random
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+from scipy.stats import spearmanr
+
+from .metrics import Metrics
+from .recommender import resolve_scoring
+
+# Ranking options a shadow engine may override
+SHADOW_OPTIONS = ('cascade', 'scoring', 'chunk_size', 'memory_limit_mb', 'top_k')
+
+def compare_rankings(primary: List[Dict[str, Any]], shadow: List[Dict[str, Any]], result_key: str) -> Dict[str, Any]:
+    """Agreement of two rankings of the same records (matched by identity)"""
+    top_k = len(primary)
+    shadow_scores = {id(result[result_key]): result['score'] for result in shadow}
+    shadow_top = {id(result[result_key]) for result in shadow[:top_k]}
+    shadow_rank = {id(result[result_key]): rank for rank, result in enumerate(shadow)}
+    common = [(rank, result) for rank, result in enumerate(primary) if id(result[result_key]) in shadow_scores]
+    deltas = [abs(result['score'] - shadow_scores[id(result[result_key])]) for _, result in common]
+
+    correlation = None
+    if len(common) >= 2:
+        coefficient = spearmanr([rank for rank, _ in common], [shadow_rank[id(result[result_key])] for _, result in common])[0]
+        correlation = None if np.isnan(coefficient) else float(coefficient)
+    return {
+        'primary_results': len(primary),
+        'shadow_results': len(shadow),
+        'common': len(common),
+        'mean_score_delta': float(np.mean(deltas)) if deltas else None,
+        'max_score_delta': float(np.max(deltas)) if deltas else None,
+        'rank_correlation': correlation,
+        'topk_overlap': sum(id(result[result_key]) in shadow_top for result in primary) / top_k if top_k else 1.0,
+    }
+
+class ShadowRunner:
+    """Runs the shadow engine on sampled requests and records how it compares"""
+
+    def __init__(self, engine: Dict[str, Any], sample_rate: float, metrics: Metrics, workers: int = 1):
+        unknown = set(engine) - set(SHADOW_OPTIONS)
+        if unknown:
+            raise ValueError(f"SHADOW_ENGINE may only override {list(SHADOW_OPTIONS)}, got {sorted(unknown)}")
+        resolve_scoring(engine.get('scoring'))
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self.metrics = metrics
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = None
+        metrics.describe('recommender_shadow_runs_total', 'counter', 'Requests compared against the shadow engine')
+        metrics.describe('recommender_shadow_skipped_total', 'counter', 'Sampled requests skipped because every shadow worker was busy')
+        metrics.describe('recommender_shadow_errors_total', 'counter', 'Shadow runs that raised')
+        metrics.describe('recommender_shadow_latency_seconds', 'summary', 'Ranking time of the primary and shadow engines')
+        metrics.describe('recommender_shadow_score_delta', 'summary', 'Mean absolute score difference of common results')
+        metrics.describe('recommender_shadow_rank_correlation', 'summary', 'Spearman correlation of the ranks of common results')
+        metrics.describe('recommender_shadow_topk_overlap', 'summary', 'Share of primary results also in the shadow top k')
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # Threads do not survive fork: create the pool in the process serving the request
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='shadow')
+            return self._executor
+
+    def submit(self, endpoint: str, match: Callable[..., List[Dict[str, Any]]], subject: Dict[str, Any],
+               items: List[Dict[str, Any]], options: Dict[str, Any], primary: List[Dict[str, Any]],
+               primary_seconds: float, result_key: str):
+        """Compare the shadow engine on this request in the background, None when skipped"""
+        if not self._slots.acquire(blocking=False):
+            self.metrics.increment('recommender_shadow_skipped_total', {'endpoint': endpoint})
+            return None
+        shadow_options = {**options, **self.engine, 'deadline': None, 'keep_components': False}
+        if 'scoring' in self.engine:
+            # Scoring overrides apply on top of the request's settings
+            shadow_options['scoring'] = resolve_scoring(options.get('scoring'), self.engine['scoring'])
+        try:
+            return self._pool().submit(self.run, endpoint, match, subject, items, shadow_options,
+                                       primary, primary_seconds, result_key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def run(self, endpoint: str, match: Callable[..., List[Dict[str, Any]]], subject: Dict[str, Any],
+            items: List[Dict[str, Any]], options: Dict[str, Any], primary: List[Dict[str, Any]],
+            primary_seconds: float, result_key: str) -> Optional[Dict[str, Any]]:
+        labels = {'endpoint': endpoint}
+        try:
+            start = time.perf_counter()
+            shadow = match(subject, items, **options)
+            shadow_seconds = time.perf_counter() - start
+            comparison = compare_rankings(primary, shadow, result_key)
+            comparison.update(primary_seconds=primary_seconds, shadow_seconds=shadow_seconds)
+
+            self.metrics.increment('recommender_shadow_runs_total', labels)
+            self.metrics.observe('recommender_shadow_latency_seconds', primary_seconds, {**labels, 'engine': 'primary'})
+            self.metrics.observe('recommender_shadow_latency_seconds', shadow_seconds, {**labels, 'engine': 'shadow'})
+            self.metrics.observe('recommender_shadow_score_delta', comparison['mean_score_delta'], labels)
+            self.metrics.observe('recommender_shadow_rank_correlation', comparison['rank_correlation'], labels)
+            self.metrics.observe('recommender_shadow_topk_overlap', comparison['topk_overlap'], labels)
+            print(f"🔍 Shadow {endpoint}: overlap {comparison['topk_overlap']:.2f}, "
+                  f"rank correlation {comparison['rank_correlation']}, "
+                  f"mean delta {comparison['mean_score_delta']}, "
+                  f"primary {primary_seconds * 1000:.0f} ms vs shadow {shadow_seconds * 1000:.0f} ms")
+            return comparison
+        except Exception as e:
+            self.metrics.increment('recommender_shadow_errors_total', labels)
+            print(f"ERROR in shadow run of {endpoint}: {e}")
+            traceback.print_exc()
+            return None
+        finally:
+            self._slots.release()
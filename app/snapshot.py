@@ -0,0 +1,274 @@
+"""
+Hot-swappable snapshots of the catalogs and the engine artifact.
+
+Everything a request reads from disk (the profile and job catalogs and the
+engine artifact) lives in one immutable ``Snapshot``. A request takes the
+current snapshot once (``current_snapshot``) and keeps it to the end, so a
+reload never changes data under a request in flight. A reload builds the next
+snapshot in the background (opening the files, building posting lists,
+encoding unseen skills) and then swaps it in with a single reference
+assignment; the read path takes no lock.
+
+Every snapshot ranks with its own engine (``Snapshot.engine``, see
+app/engine.py) holding its artifact and the skill vectors of its files. It
+shares the model and the bounded caches of the process engine, but the
+vectors read from the snapshot files stay out of them: they are only
+referenced by the snapshot's engine and, for callers outside requests, by the
+process engine until the next swap. So once the last request holding an old
+snapshot finishes, nothing references its mapped files any more and they are
+released.
+
+Reloads are triggered by ``POST /admin/reload`` (admin token) or, with
+``RELOAD_WATCH_INTERVAL`` set, by a watcher thread noticing that a snapshot
+file changed. Under the pre-fork launcher every worker has its own snapshot:
+the watcher reloads all of them, the admin endpoint only the worker answering.
+
+The skill embedding cache of encoded skills is shared by all snapshots: an
+artifact must be built with the running model (``install_artifact`` checks
+it) and catalog vectors of another model are re-encoded (``warm_embeddings``
+checks them), so a skill always has the same vector whichever snapshot asked
+for it.
+"""
+
+import os
+import threading
+import time
+import traceback
+from typing import Dict, Any, Optional, Tuple
+
+from flask import Blueprint, Flask, current_app, g, jsonify, request
+
+from .admin import is_admin_request
+
+snapshot_bp = Blueprint('snapshot', __name__)
+
+# Config keys of the files a snapshot is built from
+SNAPSHOT_SOURCES = ('PROFILE_CATALOG', 'JOB_CATALOG', 'ENGINE_ARTIFACT')
+
+class Snapshot:
+    """Catalogs and engine artifact serving requests, never modified once built"""
+
+    def __init__(self, version: int, sources: Dict[str, Optional[str]], catalogs: Dict[str, Any], artifact: Any,
+                 engine: Any = None):
+        from . import recommender
+
+        self.version = version
+        self.sources = sources
+        self.catalogs = catalogs
+        self.artifact = artifact
+        # Engine of the requests served by this snapshot
+        self.engine = engine if engine is not None else recommender.ENGINE.derive()
+        self.loaded_at = time.time()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+            'sources': self.sources,
+            'catalogs': {kind: len(catalog) for kind, catalog in self.catalogs.items()},
+            'artifact': self.artifact.version if self.artifact is not None else None,
+        }
+
+def build_snapshot(sources: Dict[str, Optional[str]], version: int) -> Snapshot:
+    """Open every file of a snapshot and build its posting lists; the serving snapshot is not touched"""
+    from . import recommender
+    from .artifact import open_artifact
+    from .catalog import open_catalog
+
+    artifact = open_artifact(sources['ENGINE_ARTIFACT']) if sources.get('ENGINE_ARTIFACT') else None
+    engine = recommender.ENGINE.derive()
+    # Checks that the artifact was built with the running model
+    engine.install_artifact(artifact)
+    catalogs = {}
+    for kind, key in (('profiles', 'PROFILE_CATALOG'), ('jobs', 'JOB_CATALOG')):
+        if sources.get(key):
+            catalog = open_catalog(sources[key])
+            # Build the posting lists now rather than on the first filtered request
+            catalog.postings
+            catalogs[kind] = catalog
+    return Snapshot(version, dict(sources), catalogs, artifact, engine)
+
+def catalog_embeddings(catalog: Any, engine: Any) -> Optional[Any]:
+    """Skill vectors stored in a catalog, None when it has none or they come from another model than the engine's"""
+    if catalog.skill_embeddings is None:
+        return None
+    model, dimension = catalog.meta.get('model'), catalog.meta.get('dimension')
+    if (model != engine.model_name or dimension != catalog.skill_embeddings.shape[1]
+            or (engine.dimension and dimension != engine.dimension)):
+        expected = f"{engine.model_name} ({engine.dimension} dimensions)" if engine.dimension else engine.model_name
+        print(f"⚠️ Ignoring the skill vectors of {catalog.path}: built with model {model} ({dimension} dimensions), "
+              f"expected {expected}")
+        return None
+    return catalog.skill_embeddings
+
+def warm_embeddings(snapshot: Snapshot) -> None:
+    """Give the snapshot's engine the skill vectors of its catalogs, encoding only the skills no file provides"""
+    engine = snapshot.engine
+    artifact = snapshot.artifact
+    if not (artifact is not None and artifact.embeddings is not None) and engine.get_model() is None:
+        return
+    embeddings = dict(engine.snapshot_embeddings)
+    for catalog in snapshot.catalogs.values():
+        vocabulary = list(catalog.vocabulary)
+        vectors = catalog_embeddings(catalog, engine)
+        if vectors is not None:
+            embeddings.update(zip(vocabulary, vectors))
+        elif engine.get_model() is not None:
+            embeddings.update(zip(vocabulary, engine.encode_skills(vocabulary)))
+    engine.install_artifact(artifact, embeddings)
+
+def publish_engine(snapshot: Snapshot) -> None:
+    """Point the process engine, used by callers outside requests, at the snapshot's artifact and skill vectors"""
+    from .artifact import install_artifact
+
+    install_artifact(snapshot.artifact, embeddings=snapshot.engine.snapshot_embeddings)
+
+def warm_fields(snapshot: Snapshot) -> None:
+    """Vectorize the free-text fields of every catalog record (see app/fields.py)"""
+    from .fields import warm_field_vectors
+
+    for kind, catalog in snapshot.catalogs.items():
+        count = warm_field_vectors(catalog.records(), kind)
+        print(f"🧾 Vectorized {count} field texts of the {kind} catalog")
+
+class SnapshotManager:
+    """Holds the serving snapshot of an app and replaces it on reload"""
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.current: Optional[Snapshot] = None
+        # Serializes reloads only; requests read self.current without locking
+        self._reload_lock = threading.Lock()
+        self._watch_lock = threading.Lock()
+        self._watcher_pid = None
+        self.last_error: Optional[str] = None
+
+    def fields_enabled(self) -> bool:
+        """Whether the server's scoring settings use field similarities"""
+        from . import recommender
+        return recommender.fields_enabled(recommender.resolve_scoring(self.app.config.get('SCORING')))
+
+    def sources(self, overrides: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Optional[str]]:
+        base = self.current.sources if self.current is not None else {key: self.app.config.get(key) for key in SNAPSHOT_SOURCES}
+        return {**base, **(overrides or {})}
+
+    def reload(self, overrides: Optional[Dict[str, Optional[str]]] = None, warm: bool = True) -> Snapshot:
+        """
+        Build a snapshot from the current sources (with overrides) and swap it in.
+        With warm, the skills of the new catalogs are encoded before the swap.
+        Their field texts are vectorized (no model needed) whenever the SCORING
+        config weighs fields.
+        """
+        with self._reload_lock:
+            version = self.current.version + 1 if self.current is not None else 1
+            try:
+                snapshot = build_snapshot(self.sources(overrides), version)
+                if self.fields_enabled():
+                    warm_fields(snapshot)
+                if warm:
+                    warm_embeddings(snapshot)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            # The swap: new requests see the new snapshot, running ones keep theirs
+            self.current = snapshot
+            publish_engine(snapshot)
+            self.last_error = None
+            print(f"🔄 Snapshot {snapshot.version} in service: {snapshot.describe()['catalogs']}")
+            return snapshot
+
+    def reload_in_background(self, overrides: Optional[Dict[str, Optional[str]]] = None) -> threading.Thread:
+        def run():
+            try:
+                self.reload(overrides)
+            except Exception as e:
+                print(f"ERROR reloading snapshot: {e}")
+                traceback.print_exc()
+        thread = threading.Thread(target=run, name='snapshot-reload', daemon=True)
+        thread.start()
+        return thread
+
+    def file_state(self) -> Dict[str, Optional[Tuple[float, int]]]:
+        """(mtime, size) of every snapshot file, None when missing"""
+        state = {}
+        for key, path in (self.current.sources if self.current is not None else {}).items():
+            if path:
+                try:
+                    stat = os.stat(path)
+                    state[key] = (stat.st_mtime, stat.st_size)
+                except OSError:
+                    state[key] = None
+        return state
+
+    def ensure_watcher(self, interval: Optional[float]) -> None:
+        # Threads do not survive fork: start the watcher in the process serving requests
+        if not interval or self._watcher_pid == os.getpid():
+            return
+        with self._watch_lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            threading.Thread(target=self._watch, args=(interval,), name='snapshot-watcher', daemon=True).start()
+
+    def _watch(self, interval: float) -> None:
+        seen = self.file_state()
+        while True:
+            time.sleep(interval)
+            state = self.file_state()
+            if state == seen:
+                continue
+            # Wait one more interval so a file still being written is not opened half done
+            time.sleep(interval)
+            if self.file_state() != state:
+                continue
+            print("🔄 Snapshot files changed, reloading")
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"ERROR reloading snapshot: {e}")
+            seen = self.file_state()
+
+def current_snapshot() -> Snapshot:
+    """Snapshot serving this request, the same one from its start to its end"""
+    if 'snapshot' not in g:
+        g.snapshot = current_app.extensions['snapshots'].current
+    return g.snapshot
+
+@snapshot_bp.before_app_request
+def start_watcher():
+    current_app.extensions['snapshots'].ensure_watcher(current_app.config.get('RELOAD_WATCH_INTERVAL'))
+
+@snapshot_bp.route('/admin/snapshot', methods=['GET'])
+def snapshot_status():
+    if not is_admin_request():
+        return jsonify({'error': 'Requires a valid X-Admin-Token'}), 403
+    manager = current_app.extensions['snapshots']
+    return jsonify({**manager.current.describe(), 'last_error': manager.last_error})
+
+@snapshot_bp.route('/admin/reload', methods=['POST'])
+def reload_snapshot():
+    """
+    Reload the snapshot files, optionally switching to other paths
+    ({"PROFILE_CATALOG": "...", ...}). Answers 202 at once, or with
+    {"wait": true} once the new snapshot is in service.
+    """
+    if not is_admin_request():
+        return jsonify({'error': 'Reloading requires a valid X-Admin-Token'}), 403
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Payload must be an object'}), 400
+    overrides = {key: value for key, value in data.items() if key in SNAPSHOT_SOURCES}
+    if set(data) - set(SNAPSHOT_SOURCES) - {'wait'}:
+        return jsonify({'error': f"Payload may only contain {list(SNAPSHOT_SOURCES)} and wait"}), 400
+    if not all(value is None or isinstance(value, str) for value in overrides.values()):
+        return jsonify({'error': 'Snapshot paths must be strings or null'}), 400
+
+    manager = current_app.extensions['snapshots']
+    if not data.get('wait'):
+        manager.reload_in_background(overrides)
+        return jsonify({'status': 'reloading', 'version': manager.current.version}), 202
+    try:
+        snapshot = manager.reload(overrides)
+    except Exception as e:
+        return jsonify({'error': f"Reload failed, still serving snapshot {manager.current.version}: {e}"}), 500
+    return jsonify(snapshot.describe())
@@ -0,0 +1,99 @@
+"""
+Synthetic job offers and user profiles with the same layout as ``data/*.json``.
+
+Generation is deterministic for a given seed, so load tests and evaluations can
+replay exactly the same population.
+"""
+
+import random
+from typing import List, Dict, Any, Optional, Iterator
+
+DEPARTMENTS = {
+    'IT': {
+        'titles': ['Développeur Python', 'Développeur Full Stack', 'Chef de Projet IT', 'Data Scientist', 'Ingénieur DevOps'],
+        'skills': ['Python', 'Django', 'Flask', 'API REST', 'React', 'Angular', 'JavaScript', 'Java', 'Spring Boot',
+                   'PostgreSQL', 'MySQL', 'Docker', 'Kubernetes', 'Git', 'Scrum', 'Machine Learning', 'SQL', 'Linux'],
+        'formations': ['Master Informatique', 'Ingénieur Génie Logiciel', 'Licence Informatique'],
+    },
+    'Finance': {
+        'titles': ['Analyste Financier', 'Contrôleur de Gestion', 'Auditeur Interne', 'Comptable'],
+        'skills': ['Excel', 'Audit', 'Comptabilité', 'PowerBI', 'Contrôle de gestion', 'Reporting financier',
+                   'SAP', 'Fiscalité', 'Analyse financière', 'Trésorerie'],
+        'formations': ['Master Finance', 'Licence Comptabilité', 'Expertise Comptable'],
+    },
+    'Ressources Humaines': {
+        'titles': ['Responsable RH', 'Chargé de Recrutement', 'Gestionnaire Paie'],
+        'skills': ['Gestion RH', 'Recrutement', 'Communication', 'Paie', 'Droit du travail', 'Formation',
+                   'Gestion des talents', 'SIRH'],
+        'formations': ['Master RH', 'Licence Psychologie du Travail'],
+    },
+    'Marketing': {
+        'titles': ['Chef de Produit', 'Responsable Marketing Digital', 'Community Manager'],
+        'skills': ['Marketing digital', 'SEO', 'Google Analytics', 'Communication', 'Gestion de projet',
+                   'Réseaux sociaux', 'Branding', 'Études de marché'],
+        'formations': ['Master Marketing', 'École de Commerce'],
+    },
+}
+
+LOCATIONS = ['Casablanca', 'Rabat', 'Marrakech', 'Tanger', 'Fès', 'Agadir']
+FIRST_NAMES = ['Ali', 'Fatima', 'Youssef', 'Sara', 'Omar', 'Khadija', 'Mehdi', 'Imane', 'Hamza', 'Salma']
+LAST_NAMES = ['Ben Salah', 'El Amrani', 'Kabbaj', 'Mouline', 'Alami', 'Benali', 'Tazi', 'Chraibi', 'Idrissi']
+
+def _typo(skill: str, rng: random.Random) -> str:
+    """Spell a skill the way people do in free-text profiles"""
+    variants = [skill.lower(), skill.upper(), skill[:-1] if len(skill) > 4 else skill, skill.replace(' ', '')]
+    return rng.choice(variants)
+
+def iter_user_profiles(count: int, seed: int = 0, typo_rate: float = 0.1,
+                       skills_per_profile: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream user profiles shaped like data/user_profiles.json, one at a time"""
+    rng = random.Random(seed)
+    departments = list(DEPARTMENTS)
+    for index in range(count):
+        department = rng.choice(departments)
+        pool = DEPARTMENTS[department]
+        # Mostly skills of the own department, a few from another one
+        other = DEPARTMENTS[rng.choice(departments)]
+        size = skills_per_profile or rng.randint(3, 9)
+        skills = rng.sample(pool['skills'], min(size, len(pool['skills'])))
+        skills += rng.sample(other['skills'], rng.randint(0, 2))
+        skills = [_typo(skill, rng) if rng.random() < typo_rate else skill for skill in skills]
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            'matricule': f"S{seed}-{index:06d}",
+            'firstName': first_name,
+            'lastName': last_name,
+            'email': f"{first_name.lower()}.{last_name.lower().replace(' ', '')}{index}@example.com",
+            'position': rng.choice(pool['titles']),
+            'department': department,
+            'localisation': rng.choice(LOCATIONS),
+            'experiences': [f"{rng.choice(pool['titles'])} {rng.randint(1, 10)} ans"],
+            'formations': [rng.choice(pool['formations'])],
+            'competences': skills,
+        }
+
+def generate_user_profiles(count: int, seed: int = 0, typo_rate: float = 0.1,
+                           skills_per_profile: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Generate user profiles shaped like data/user_profiles.json"""
+    return list(iter_user_profiles(count, seed, typo_rate, skills_per_profile))
+
+def iter_job_offers(count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Stream job offers shaped like data/job_offers.json, one at a time"""
+    rng = random.Random(seed + 1_000_003)
+    departments = list(DEPARTMENTS)
+    for index in range(count):
+        department = rng.choice(departments)
+        pool = DEPARTMENTS[department]
+        title = rng.choice(pool['titles'])
+        yield {
+            'id': f"J{seed}-{index:06d}",
+            'titre_de_poste': title,
+            'description': f"{title} au sein du département {department}.",
+            'localisation': rng.choice(LOCATIONS),
+            'departement': department,
+            'competences_requises': rng.sample(pool['skills'], rng.randint(3, 6)),
+        }
+
+def generate_job_offers(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate job offers shaped like data/job_offers.json"""
+    return list(iter_job_offers(count, seed))
@@ -0,0 +1,105 @@
+"""
+Content negotiation for the recommendation endpoints.
+
+Request bodies may be sent gzip or deflate compressed (``Content-Encoding``)
+and as MessagePack (``Content-Type: application/msgpack``) instead of JSON.
+Responses are encoded as MessagePack when the client lists it in ``Accept``
+and compressed when ``Accept-Encoding`` allows gzip or deflate. Plain JSON
+stays the default, so existing clients see no change.
+
+MessagePack needs the optional ``msgpack`` package; without it MessagePack
+request bodies get a 415 and responses fall back to JSON.
+"""
+
+import gzip
+import json
+import zlib
+from typing import Any, Optional
+
+from flask import Response, current_app, request
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+def decompress(body: bytes, encoding: str, limit: Optional[int]) -> bytes:
+    """Inflate a gzip or deflate body, refusing to expand beyond limit bytes"""
+    # wbits: 16 + MAX_WBITS reads the gzip container, MAX_WBITS a zlib stream
+    wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+    decompressor = zlib.decompressobj(wbits)
+    try:
+        data = decompressor.decompress(body, limit or 0)
+    except zlib.error:
+        if encoding != 'deflate':
+            raise BadRequest(f'Request body is not valid {encoding} data')
+        # Some clients send raw deflate without the zlib header
+        try:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            data = decompressor.decompress(body, limit or 0)
+        except zlib.error:
+            raise BadRequest('Request body is not valid deflate data')
+    if decompressor.unconsumed_tail:
+        raise RequestEntityTooLarge(f'Decompressed payload must not exceed {limit} bytes')
+    return data
+
+def load_payload() -> Any:
+    """Decode the request body according to its Content-Encoding and Content-Type"""
+    body = request.get_data(cache=False)
+    encoding = request.headers.get('Content-Encoding', 'identity').strip().lower()
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        body = decompress(body, 'gzip' if encoding != 'deflate' else 'deflate',
+                          current_app.config.get('MAX_DECOMPRESSED_LENGTH'))
+    elif encoding != 'identity':
+        raise UnsupportedMediaType(f'Unsupported Content-Encoding: {encoding}')
+
+    if request.mimetype in MSGPACK_TYPES:
+        if msgpack is None:
+            raise UnsupportedMediaType('MessagePack is not available on this server')
+        try:
+            return msgpack.unpackb(body, raw=False)
+        except Exception:
+            raise BadRequest('Request body is not valid MessagePack')
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise BadRequest('Request body is not valid JSON')
+
+def wants_msgpack() -> bool:
+    if msgpack is None:
+        return False
+    best = request.accept_mimetypes.best_match(['application/json', *MSGPACK_TYPES], default='application/json')
+    return best in MSGPACK_TYPES
+
+def encode_response(payload: Any) -> Response:
+    """JSON response, or MessagePack when the client asked for it"""
+    if wants_msgpack():
+        response = Response(msgpack.packb(payload, use_bin_type=True), mimetype='application/msgpack')
+    else:
+        response = current_app.json.response(payload)
+    response.vary.add('Accept')
+    return response
+
+def compress_response(response: Response) -> Response:
+    """Compress a buffered response with gzip or deflate when the client accepts it"""
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    accepted = request.accept_encodings
+    encoding = next((name for name in ('gzip', 'deflate') if accepted[name]), None)
+    body = response.get_data()
+    if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return response
+    level = current_app.config.get('COMPRESSION_LEVEL', 6)
+    if encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=level, mtime=0)
+    else:
+        body = zlib.compress(body, level)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
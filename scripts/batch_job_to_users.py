@@ -1,10 +1,16 @@
-import requests
 import json
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 
 # Adjust paths for new structure
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 data_dir = os.path.join(base_dir, 'data')
+sys.path.insert(0, base_dir)
+
+from app.client import RecommenderClient, RecommenderError
 
 with open(os.path.join(data_dir, "user_profiles.json"), "r", encoding="utf-8") as f:
     user_profiles = json.load(f)
@@ -12,31 +18,37 @@ with open(os.path.join(data_dir, "user_profiles.json"), "r", encoding="utf-8") a
 with open(os.path.join(data_dir, "job_offers.json"), "r", encoding="utf-8") as f:
     job_offers = json.load(f)
 
-url = "http://127.0.0.1:5000/recommend/candidates-for-job"
+url = os.environ.get("RECOMMENDER_URL", "http://127.0.0.1:5000")
 
 BEST_MATCH_THRESHOLD = 70.0  # percent
 
-for job in job_offers:
-    payload = {
-        "jobOffer": job,
-        "userProfiles": user_profiles
-    }
-    response = requests.post(url, json=payload)
+def rank(job):
+    """Ranking of one job offer, or the error that stopped it"""
+    try:
+        return client.candidates_for_job(job, user_profiles)
+    except (RecommenderError, requests.RequestException) as e:
+        return e
+
+# One pooled client: job offers are ranked 4 at a time over reused connections,
+# a failed offer is reported and the others go on
+with RecommenderClient(url, concurrency=4) as client, ThreadPoolExecutor(max_workers=4) as executor:
+    rankings = list(executor.map(rank, job_offers))
+
+for job, ranking in zip(job_offers, rankings):
     print(f"\n=== {job['titre_de_poste']} ({job['departement']}) ===")
-    if response.status_code == 200:
-        results = response.json()
-        print("-- All Scores --")
-        for rec in results:
-            user = rec['userProfile']
-            print(f"  - {user['matricule']} | {user['firstName']} {user['lastName']} | Score: {rec['score']}%")
-        print("-- Best Matches (score >= 70%) --")
-        
-        best_matches = [rec for rec in results if rec['score'] >= BEST_MATCH_THRESHOLD]
-        if best_matches:
-            for rec in best_matches:
-                user = rec['userProfile']
-                print(f"  - {user['matricule']} | {user['firstName']} {user['lastName']} | Score: {rec['score']}%")
-        else:
-            print("  Aucun profil fortement compatible trouvé (score >= 70%)")
+    if isinstance(ranking, Exception):
+        print(f"  Error: {ranking}")
+        continue
+    print("-- All Scores --")
+    for rec in ranking:
+        user = rec.record
+        print(f"  - {user['matricule']} | {user['firstName']} {user['lastName']} | Score: {rec.score}%")
+    print("-- Best Matches (score >= 70%) --")
+    
+    best_matches = [rec for rec in ranking if rec.score >= BEST_MATCH_THRESHOLD]
+    if best_matches:
+        for rec in best_matches:
+            user = rec.record
+            print(f"  - {user['matricule']} | {user['firstName']} {user['lastName']} | Score: {rec.score}%")
     else:
-        print(f"  Error: {response.status_code} {response.text}") 
\ No newline at end of file
+        print("  Aucun profil fortement compatible trouvé (score >= 70%)")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Local HTTP load test for the recommendation endpoints.
+
+Starts the API with the pre-fork launcher (or targets --url), replays a payload
+profile at a target request rate and concurrency and reports throughput,
+p50/p95/p99 latency and error rate per endpoint.
+
+    python scripts/load_test.py --payloads sample --rps 20 --concurrency 8 --duration 30
+    python scripts/load_test.py --payloads synthetic-large --compare "--workers 1" "--workers 4"
+    python scripts/load_test.py --payloads synthetic-small --save payloads.jsonl
+    python scripts/load_test.py --replay payloads.jsonl --url http://127.0.0.1:5000
+"""
+
+import argparse
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import requests
+
+# Adjust paths for new structure
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_dir = os.path.join(base_dir, 'data')
+sys.path.insert(0, base_dir)
+
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+ENDPOINTS = {
+    'candidates': '/recommend/candidates-for-job',
+    'jobs': '/recommend/jobs-for-candidate',
+}
+
+# Named payload profiles: where the records come from and how big a request is
+PAYLOAD_PROFILES = {
+    'sample': {'source': 'data', 'candidates': None, 'jobs': None},
+    'synthetic-small': {'source': 'synthetic', 'profiles': 200, 'job_offers': 50, 'candidates': 20, 'jobs': 10},
+    'synthetic-large': {'source': 'synthetic', 'profiles': 5000, 'job_offers': 500, 'candidates': 500, 'jobs': 100},
+}
+
+def load_records(profile: Dict[str, Any], seed: int):
+    if profile['source'] == 'data':
+        with open(os.path.join(data_dir, 'user_profiles.json'), 'r', encoding='utf-8') as f:
+            user_profiles = json.load(f)
+        with open(os.path.join(data_dir, 'job_offers.json'), 'r', encoding='utf-8') as f:
+            job_offers = json.load(f)
+        return user_profiles, job_offers
+    return generate_user_profiles(profile['profiles'], seed), generate_job_offers(profile['job_offers'], seed)
+
+def build_payloads(profile_name: str, count: int, endpoints: List[str], seed: int = 0) -> List[Dict[str, Any]]:
+    """Build a deterministic list of {endpoint, body} requests for a payload profile"""
+    profile = PAYLOAD_PROFILES[profile_name]
+    user_profiles, job_offers = load_records(profile, seed)
+    rng = random.Random(seed)
+    payloads = []
+    for index in range(count):
+        endpoint = endpoints[index % len(endpoints)]
+        if endpoint == 'candidates':
+            size = profile['candidates'] or len(user_profiles)
+            body = {'jobOffer': rng.choice(job_offers), 'userProfiles': rng.sample(user_profiles, min(size, len(user_profiles)))}
+        else:
+            size = profile['jobs'] or len(job_offers)
+            body = {'userProfile': rng.choice(user_profiles), 'jobOffers': rng.sample(job_offers, min(size, len(job_offers)))}
+        payloads.append({'endpoint': endpoint, 'body': body})
+    return payloads
+
+def save_payloads(payloads: List[Dict[str, Any]], path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        for payload in payloads:
+            f.write(json.dumps(payload, ensure_ascii=False) + '\n')
+
+def load_payloads(path: str) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# --- Local server ---
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class LocalServer:
+    """Run the API with the pre-fork launcher for the duration of a test"""
+
+    def __init__(self, server_args: str = ''):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.command = [sys.executable, '-m', 'app.prefork', '--port', str(self.port)] + shlex.split(server_args)
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, cwd=base_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {self.process.returncode}: {' '.join(self.command)}")
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=0.5):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError('Server did not start within 120s')
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+# --- Load generation ---
+def run_load(url: str, payloads: List[Dict[str, Any]], rps: float, concurrency: int, duration: float,
+             timeout: float = 60.0) -> Dict[str, Any]:
+    """
+    Replay payloads against url. With rps > 0 requests are sent on a fixed
+    schedule (open loop) and latency is measured from the scheduled time, so
+    queueing behind a saturated server is counted. With rps = 0 every worker
+    sends its next request as soon as the previous one finished (closed loop).
+    """
+    local = threading.local()
+    samples: Dict[str, List[float]] = {endpoint: [] for endpoint in ENDPOINTS}
+    errors: Dict[str, int] = {endpoint: 0 for endpoint in ENDPOINTS}
+    lock = threading.Lock()
+
+    def send(payload: Dict[str, Any], scheduled: float) -> None:
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        endpoint = payload['endpoint']
+        try:
+            response = local.session.post(url + ENDPOINTS[endpoint], json=payload['body'], timeout=timeout)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        latency = time.perf_counter() - scheduled
+        with lock:
+            if ok:
+                samples[endpoint].append(latency)
+            else:
+                errors[endpoint] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if rps > 0:
+            for index in range(int(duration * rps)):
+                scheduled = start + index / rps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(send, payloads[index % len(payloads)], scheduled)
+        else:
+            counter = iter(range(sys.maxsize))
+            def worker():
+                while time.perf_counter() - start < duration:
+                    with lock:
+                        index = next(counter)
+                    send(payloads[index % len(payloads)], time.perf_counter())
+            for _ in range(concurrency):
+                executor.submit(worker)
+    elapsed = time.perf_counter() - start
+
+    report = {}
+    for endpoint in ENDPOINTS:
+        latencies = np.array(samples[endpoint]) * 1000
+        total = len(latencies) + errors[endpoint]
+        if total == 0:
+            continue
+        report[endpoint] = {
+            'requests': total,
+            'throughput': len(latencies) / elapsed,
+            'p50': float(np.percentile(latencies, 50)) if len(latencies) else float('nan'),
+            'p95': float(np.percentile(latencies, 95)) if len(latencies) else float('nan'),
+            'p99': float(np.percentile(latencies, 99)) if len(latencies) else float('nan'),
+            'error_rate': errors[endpoint] / total * 100,
+        }
+    return report
+
+def print_report(reports: Dict[str, Dict[str, Any]]) -> None:
+    """Print one column per server configuration, one block per endpoint"""
+    labels = list(reports)
+    width = max(18, *(len(label) + 2 for label in labels))
+    metrics = [('requests', '{:.0f}'), ('throughput', '{:.1f} req/s'), ('p50', '{:.1f} ms'),
+               ('p95', '{:.1f} ms'), ('p99', '{:.1f} ms'), ('error_rate', '{:.1f} %')]
+    print('\n' + ' ' * 26 + ''.join(label.rjust(width) for label in labels))
+    for endpoint in ENDPOINTS:
+        if not any(endpoint in report for report in reports.values()):
+            continue
+        print(f"-- {ENDPOINTS[endpoint]}")
+        for metric, fmt in metrics:
+            cells = []
+            for label in labels:
+                stats = reports[label].get(endpoint)
+                cells.append((fmt.format(stats[metric]) if stats else '-').rjust(width))
+            print(f"   {metric:<23}" + ''.join(cells))
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Load test the recommendation API')
+    parser.add_argument('--payloads', choices=sorted(PAYLOAD_PROFILES), default='sample')
+    parser.add_argument('--replay', help='Replay payloads saved with --save instead of building them')
+    parser.add_argument('--save', help='Write the generated payloads to a JSONL file and exit')
+    parser.add_argument('--endpoint', choices=['candidates', 'jobs', 'both'], default='both')
+    parser.add_argument('--count', type=int, default=200, help='Number of distinct payloads to generate')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rps', type=float, default=10.0, help='Target requests per second (0 = as fast as possible)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of load per configuration')
+    parser.add_argument('--url', help='Test an already running server instead of starting one')
+    parser.add_argument('--server-args', default='--workers 1', help='Launcher arguments of the local server')
+    parser.add_argument('--compare', nargs=2, metavar=('ARGS_A', 'ARGS_B'),
+                        help='Launcher arguments of two local server configurations to compare')
+    args = parser.parse_args(argv)
+
+    endpoints = ['candidates', 'jobs'] if args.endpoint == 'both' else [args.endpoint]
+    if args.replay:
+        payloads = load_payloads(args.replay)
+    else:
+        payloads = build_payloads(args.payloads, args.count, endpoints, args.seed)
+    if args.save:
+        save_payloads(payloads, args.save)
+        print(f"Saved {len(payloads)} payloads to {args.save}")
+        return
+
+    print(f"🚀 {len(payloads)} payloads, {args.rps or 'max'} req/s, concurrency {args.concurrency}, {args.duration:.0f}s")
+    reports = {}
+    if args.url:
+        reports[args.url] = run_load(args.url, payloads, args.rps, args.concurrency, args.duration)
+    else:
+        for server_args in (args.compare or [args.server_args]):
+            print(f"   Starting server: {server_args}")
+            with LocalServer(server_args) as server:
+                reports[server_args] = run_load(server.url, payloads, args.rps, args.concurrency, args.duration)
+    print_report(reports)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Compare the transport encodings of the recommendation endpoints.
+
+Builds a candidates-for-job request with N synthetic profiles and a response
+echoing them, then measures serialize and parse time and bytes on the wire for
+plain JSON, gzip/deflate compressed JSON and MessagePack.
+
+    python scripts/transport_benchmark.py --profiles 500 --repeat 20
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import zlib
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+# Adjust paths for new structure
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from app.synthetic import generate_user_profiles, generate_job_offers
+from app.transport import msgpack
+
+def json_encode(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def json_decode(body: bytes) -> Any:
+    return json.loads(body)
+
+def encodings(level: int) -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    """Name -> (serialize, parse) of every transport the API negotiates"""
+    codecs = {
+        'json': (json_encode, json_decode),
+        'json+gzip': (lambda p: gzip.compress(json_encode(p), compresslevel=level, mtime=0),
+                      lambda b: json_decode(gzip.decompress(b))),
+        'json+deflate': (lambda p: zlib.compress(json_encode(p), level),
+                         lambda b: json_decode(zlib.decompress(b))),
+    }
+    if msgpack is not None:
+        codecs['msgpack'] = (lambda p: msgpack.packb(p, use_bin_type=True), lambda b: msgpack.unpackb(b, raw=False))
+        codecs['msgpack+gzip'] = (lambda p: gzip.compress(msgpack.packb(p, use_bin_type=True), compresslevel=level, mtime=0),
+                                  lambda b: msgpack.unpackb(gzip.decompress(b), raw=False))
+    return codecs
+
+def build_messages(profiles: int, seed: int = 0) -> Dict[str, Any]:
+    """A request with `profiles` candidates and the ranking response echoing them"""
+    user_profiles = generate_user_profiles(profiles, seed)
+    job_offer = generate_job_offers(1, seed)[0]
+    response = [{'userProfile': profile, 'score': 100.0 * (profiles - i) / profiles} for i, profile in enumerate(user_profiles)]
+    return {'request': {'jobOffer': job_offer, 'userProfiles': user_profiles}, 'response': response}
+
+def run_benchmark(profiles: int, repeat: int, level: int = 6, seed: int = 0) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Median serialize/parse milliseconds and size per message and encoding"""
+    results = {}
+    for message, payload in build_messages(profiles, seed).items():
+        results[message] = {}
+        for name, (serialize, parse) in encodings(level).items():
+            encode_times, decode_times = [], []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                body = serialize(payload)
+                encode_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                decoded = parse(body)
+                decode_times.append(time.perf_counter() - start)
+            assert decoded == payload, f"{name} does not round-trip"
+            results[message][name] = {
+                'bytes': len(body),
+                'serialize_ms': sorted(encode_times)[len(encode_times) // 2] * 1000,
+                'parse_ms': sorted(decode_times)[len(decode_times) // 2] * 1000,
+            }
+    return results
+
+def print_report(results: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+    for message, rows in results.items():
+        baseline = rows['json']['bytes']
+        print(f"\n-- {message}")
+        print(f"   {'encoding':<14}{'bytes':>12}{'vs json':>10}{'serialize':>14}{'parse':>12}")
+        for name, row in rows.items():
+            print(f"   {name:<14}{row['bytes']:>12}{row['bytes'] / baseline * 100:>9.0f}%"
+                  f"{row['serialize_ms']:>11.2f} ms{row['parse_ms']:>9.2f} ms")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Benchmark JSON, compressed JSON and MessagePack transport')
+    parser.add_argument('--profiles', type=int, default=500, help='Candidates in the request and the response')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--level', type=int, default=6, help='gzip/deflate compression level')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if msgpack is None:
+        print("⚠️ msgpack is not installed, MessagePack rows are skipped")
+    print(f"🚀 {args.profiles} profiles, median of {args.repeat} runs")
+    print_report(run_benchmark(args.profiles, args.repeat, args.level, args.seed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Deterministic stand-in for the pre-trained model, shared by the test scripts
+so they run without downloading a model
+"""
+
+import contextlib
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import app.recommender as recommender
+from app.engine import RecommenderEngine
+
+class FakeEncoder:
+    """Stand-in for SentenceTransformer that records what it encodes and how many calls overlap"""
+
+    def __init__(self, dimension: int = 16, delay: float = 0.0):
+        self.dimension = dimension
+        # Seconds every call takes, to widen the window in which threads could race
+        self.delay = delay
+        self.encoded = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def encode(self, texts):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        if self.delay:
+            time.sleep(self.delay)
+        vectors = np.array([np.random.default_rng(sum(ord(c) * (i + 1) for i, c in enumerate(text))).normal(size=self.dimension)
+                            for text in texts]).reshape(len(texts), self.dimension)
+        with self._lock:
+            self.active -= 1
+            self.encoded.extend(texts)
+        return vectors
+
+@contextlib.contextmanager
+def fake_engine(encoder=None, **options):
+    """Serve the block from a fresh engine whose model is encoder (a new FakeEncoder by default)"""
+    previous_engine = recommender.ENGINE
+    recommender.ENGINE = RecommenderEngine(model=encoder or FakeEncoder(), **options)
+    try:
+        yield recommender.ENGINE
+    finally:
+        recommender.ENGINE = previous_engine
+
+def with_encoder(test):
+    """Run a test on a fresh engine with a FakeEncoder"""
+    def wrapper(*args):
+        with fake_engine():
+            return test(*args)
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for deadlines and admission control
+Uses the Flask test client, no running server needed
+"""
+
+import sys
+import os
+import json
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.recommender import match_candidates_for_job
+
+job_offer = {
+    "titre_de_poste": "Développeur Python",
+    "competences_requises": ["Python", "Django", "API REST"],
+    "departement": "IT"
+}
+
+def make_profiles(count):
+    skills = [["Python", "Django", "API REST"], ["Python", "Flask"], ["Java", "Spring Boot"], ["Django"]]
+    return [{"matricule": f"U{i:04d}", "competences": skills[i % len(skills)]} for i in range(count)]
+
+def test_payload_too_large_is_rejected():
+    """Bodies above MAX_CONTENT_LENGTH get a 413 before parsing"""
+    client = create_app({'MAX_CONTENT_LENGTH': 1024}).test_client()
+    payload = {"jobOffer": job_offer, "userProfiles": make_profiles(100)}
+    response = client.post('/recommend/candidates-for-job', data=json.dumps(payload), content_type='application/json')
+    print(f"Oversized payload: {response.status_code}")
+    assert response.status_code == 413
+
+def test_too_many_candidates_is_rejected():
+    """Candidate lists above MAX_CANDIDATES get a 413"""
+    client = create_app({'MAX_CANDIDATES': 5}).test_client()
+    response = client.post('/recommend/candidates-for-job', json={"jobOffer": job_offer, "userProfiles": make_profiles(6)})
+    assert response.status_code == 413
+    response = client.post('/recommend/jobs-for-candidate', json={"userProfile": make_profiles(1)[0], "jobOffers": [job_offer] * 6})
+    assert response.status_code == 413
+
+def test_busy_server_returns_429():
+    """Requests beyond the concurrent scoring slots are rejected immediately"""
+    app = create_app({'MAX_CONCURRENT_REQUESTS': 1})
+    slots = app.extensions['admission']
+    slots.acquire()
+    try:
+        response = app.test_client().post('/recommend/candidates-for-job', json={"jobOffer": job_offer, "userProfiles": make_profiles(2)})
+        print(f"Busy server: {response.status_code}, Retry-After={response.headers.get('Retry-After')}")
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        slots.release()
+
+def test_expired_deadline_flags_partial_response():
+    """A zero deadline returns immediately with a partial flag"""
+    client = create_app().test_client()
+    response = client.post('/recommend/candidates-for-job', json={"jobOffer": job_offer, "userProfiles": make_profiles(50), "deadline_ms": 0})
+    print(f"Partial: {response.headers['X-Recommendation-Partial']}, scored {response.headers['X-Recommendation-Scored']}")
+    assert response.status_code == 200
+    assert response.headers['X-Recommendation-Partial'] == 'true'
+
+    response = client.post('/recommend/candidates-for-job', json={"jobOffer": job_offer, "userProfiles": make_profiles(8), "deadline_ms": 60000})
+    assert response.headers['X-Recommendation-Partial'] == 'false'
+    assert response.headers['X-Recommendation-Scored'] == '8/8'
+
+    response = client.post('/recommend/candidates-for-job', json={"jobOffer": job_offer, "userProfiles": make_profiles(2), "deadline_ms": "soon"})
+    assert response.status_code == 400
+
+def test_top_k_matches_full_ranking():
+    """Keeping only the top k while scoring gives the head of the full ranking"""
+    profiles = make_profiles(40)
+    full = match_candidates_for_job(job_offer, profiles)
+    top = match_candidates_for_job(job_offer, profiles, top_k=5)
+    assert [r['userProfile']['matricule'] for r in top] == [r['userProfile']['matricule'] for r in full[:5]]
+
+def test_anytime_ranking_stops_at_deadline():
+    """Scoring stops at the deadline and reports how much was scored"""
+    stats = {}
+    results = match_candidates_for_job(job_offer, make_profiles(200), deadline=time.monotonic() - 1, stats=stats)
+    assert stats == {'total': 200, 'scored': 0, 'partial': True}
+    assert results == []
+
+if __name__ == "__main__":
+    print("Testing Deadlines and Admission Control")
+    print("=" * 50)
+
+    test_payload_too_large_is_rejected()
+    test_too_many_candidates_is_rejected()
+    test_busy_server_returns_429()
+    test_expired_deadline_flags_partial_response()
+    test_top_k_matches_full_ranking()
+    test_anytime_ranking_stops_at_deadline()
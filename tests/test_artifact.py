@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for versioned engine artifacts
+Uses a small deterministic encoder so it runs without downloading a model
+"""
+
+import sys
+import os
+import json
+import contextlib
+import io
+import subprocess
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import app.recommender as recommender
+from app.artifact import build_artifact, open_artifact
+from app.synthetic import generate_user_profiles, generate_job_offers
+from encoders import with_encoder
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+profiles = generate_user_profiles(40, seed=9)
+jobs = generate_job_offers(3, seed=9)
+
+# Ranks in a fresh process that only has the artifact, and reports imported modules
+COLD_START_PROBE = """
+import contextlib, io, json, sys, time
+sys.path.insert(0, {base_dir!r})
+start = time.perf_counter()
+from app import create_app
+create_app({{'ENGINE_ARTIFACT': {artifact!r}}})
+startup = time.perf_counter() - start
+from app.recommender import match_candidates_for_job, calculate_pretrained_similarity_batch
+with open({data!r}) as f:
+    data = json.load(f)
+with contextlib.redirect_stdout(io.StringIO()):
+    match_candidates_for_job(data['job'], data['profiles'])
+print(json.dumps({{
+    'startup': startup,
+    'pretrained': calculate_pretrained_similarity_batch(data['pairs']).tolist(),
+    'imported': [name for name in ('sentence_transformers', 'torch') if name in sys.modules],
+}}))
+"""
+
+def with_directory(test):
+    def wrapper():
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+def write_inputs(directory: str):
+    profiles_path = os.path.join(directory, 'profiles.json')
+    jobs_path = os.path.join(directory, 'jobs.json')
+    for path, records in ((profiles_path, profiles), (jobs_path, jobs)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False)
+    return profiles_path, jobs_path
+
+@with_encoder
+@with_directory
+def test_artifact_contents_and_version(directory):
+    """The artifact holds every skill, its embedding and the fitted lexical model"""
+    profiles_path, jobs_path = write_inputs(directory)
+    artifact = build_artifact([profiles_path], [jobs_path], os.path.join(directory, 'a.artifact'))
+    again = build_artifact([profiles_path], [jobs_path], os.path.join(directory, 'b.artifact'))
+    print(f"Artifact {artifact.version}: {len(artifact)} skills")
+    assert artifact.version == again.version
+    assert artifact.meta['model'] == recommender.MODEL_NAME
+
+    skills = {skill for record in profiles for skill in recommender.extract_competencies_from_user(record)}
+    skills |= {skill for record in jobs for skill in recommender.extract_competencies_from_job(record)}
+    assert sorted(artifact.vocabulary) == sorted(skills)
+    assert np.allclose(artifact.embeddings, recommender.get_skill_embeddings(list(artifact.vocabulary)))
+
+    document = ' '.join(sorted(skills)[:5])
+    vector = artifact.lexical_model().transform([document])
+    assert vector.nnz > 0 and abs(vector.multiply(vector).sum() - 1.0) < 1e-6
+
+@with_encoder
+@with_directory
+def test_cold_start_from_artifact_skips_the_model(directory):
+    """A fresh process scores known skills from the artifact without importing torch"""
+    profiles_path, jobs_path = write_inputs(directory)
+    artifact_path = os.path.join(directory, 'engine.artifact')
+    build_artifact([profiles_path], [jobs_path], artifact_path)
+    job_competencies = sorted(recommender.extract_competencies_from_job(jobs[0]))
+    pairs = [(sorted(recommender.extract_competencies_from_user(profile)), job_competencies) for profile in profiles]
+    expected = recommender.calculate_pretrained_similarity_batch(pairs)
+
+    data_path = os.path.join(directory, 'request.json')
+    with open(data_path, 'w', encoding='utf-8') as f:
+        json.dump({'job': jobs[0], 'profiles': profiles, 'pairs': pairs}, f)
+    probe = COLD_START_PROBE.format(base_dir=base_dir, artifact=artifact_path, data=data_path)
+    output = json.loads(subprocess.check_output([sys.executable, '-c', probe], text=True).strip().splitlines()[-1])
+    print(f"Cold start from artifact: {output['startup'] * 1000:.0f} ms")
+    assert output['imported'] == []
+    assert expected.max() > 0
+    assert np.allclose(output['pretrained'], expected)
+
+def test_rejects_other_files():
+    """Catalog files and unknown formats are not accepted as artifacts"""
+    with tempfile.TemporaryDirectory() as directory:
+        from app.catalog import build_catalog
+        path = os.path.join(directory, 'profiles.rcat')
+        build_catalog(profiles[:3], 'profiles', path)
+        try:
+            open_artifact(path)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+        else:
+            raise AssertionError('a catalog file was opened as an artifact')
+
+if __name__ == "__main__":
+    print("Testing Engine Artifacts")
+    print("=" * 50)
+
+    test_artifact_contents_and_version()
+    test_cold_start_from_artifact_skips_the_model()
+    test_rejects_other_files()
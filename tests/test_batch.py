@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process batch command (python -m app.batch)
+"""
+
+import sys
+import os
+import csv
+import json
+import contextlib
+import io
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.batch import iter_records, run_batch
+from app.recommender import match_candidates_for_job
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+profiles = generate_user_profiles(60, seed=8)
+jobs = generate_job_offers(6, seed=8)
+
+def write_inputs(directory: str):
+    profiles_path = os.path.join(directory, 'profiles.json')
+    jobs_path = os.path.join(directory, 'jobs.jsonl')
+    with open(profiles_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, ensure_ascii=False, indent=2)
+    with open(jobs_path, 'w', encoding='utf-8') as f:
+        for job in jobs:
+            f.write(json.dumps(job, ensure_ascii=False) + '\n')
+    return jobs_path, profiles_path
+
+def read_jsonl(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_iter_records_streams_json_and_jsonl():
+    """JSON arrays and JSONL files give the same records as json.load"""
+    with tempfile.TemporaryDirectory() as directory:
+        jobs_path, profiles_path = write_inputs(directory)
+        assert list(iter_records(profiles_path)) == profiles
+        assert list(iter_records(jobs_path)) == jobs
+        data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'job_offers.json')
+        with open(data_path, 'r', encoding='utf-8') as f:
+            assert list(iter_records(data_path)) == json.load(f)
+
+def test_batch_matches_engine_and_threshold():
+    """Rows equal the engine ranking above the threshold, for every job"""
+    with tempfile.TemporaryDirectory() as directory:
+        jobs_path, profiles_path = write_inputs(directory)
+        output = os.path.join(directory, 'matches.jsonl')
+        summary = run_batch(jobs_path, profiles_path, output, threshold=30, top_k=10, chunk_size=25, workers=2)
+        rows = read_jsonl(output)
+        assert summary == {'jobs': 6, 'skipped': 0, 'matches': len(rows)}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for job in jobs:
+                expected = [(r['userProfile']['matricule'], round(r['score'], 2))
+                            for r in match_candidates_for_job(job, profiles, top_k=10) if r['score'] >= 30]
+                got = [(row['matricule'], row['score']) for row in rows if row['job_id'] == job['id']]
+                assert got == expected
+
+        output = os.path.join(directory, 'matches.csv')
+        run_batch(jobs_path, profiles_path, output, 'csv', threshold=30, top_k=10, workers=1)
+        with open(output, 'r', encoding='utf-8', newline='') as f:
+            assert len(list(csv.DictReader(f))) == len(rows)
+
+def test_resume_skips_done_jobs_and_drops_partial_rows():
+    """An interrupted run resumes after the last completed job without duplicates"""
+    with tempfile.TemporaryDirectory() as directory:
+        jobs_path, profiles_path = write_inputs(directory)
+        output = os.path.join(directory, 'matches.jsonl')
+        run_batch(jobs_path, profiles_path, output, top_k=5, workers=1)
+        expected = read_jsonl(output)
+
+        # Keep the first two completed jobs and a half-written row of the third
+        with open(output + '.progress', 'r', encoding='utf-8') as f:
+            progress = f.readlines()[:2]
+        offset = int(progress[-1].rsplit('\t', 1)[1])
+        with open(output + '.progress', 'w', encoding='utf-8') as f:
+            f.writelines(progress)
+        with open(output, 'r+', encoding='utf-8') as f:
+            f.seek(offset)
+            f.truncate()
+            f.write('{"job_id": "J8-0000')
+
+        summary = run_batch(jobs_path, profiles_path, output, top_k=5, workers=2, resume=True)
+        assert summary['skipped'] == 2 and summary['jobs'] == 4
+        resumed = read_jsonl(output)
+        key = lambda row: (row['job_id'], row['rank'])
+        assert sorted(resumed, key=key) == sorted(expected, key=key)
+
+def test_resume_without_output_and_duplicate_ids():
+    """A resume whose output is gone starts over; duplicate job ids are rejected before any output"""
+    with tempfile.TemporaryDirectory() as directory:
+        jobs_path, profiles_path = write_inputs(directory)
+        output = os.path.join(directory, 'matches.jsonl')
+        run_batch(jobs_path, profiles_path, output, top_k=5, workers=1)
+        expected = read_jsonl(output)
+        os.remove(output)
+        summary = run_batch(jobs_path, profiles_path, output, top_k=5, workers=1, resume=True)
+        assert summary['skipped'] == 0 and summary['jobs'] == 6
+        with open(output, 'r', encoding='utf-8') as f:
+            assert '\0' not in f.read()
+        assert read_jsonl(output) == expected
+
+        duplicated = os.path.join(directory, 'duplicated.jsonl')
+        with open(duplicated, 'w', encoding='utf-8') as f:
+            for job in jobs + jobs[:1]:
+                f.write(json.dumps(job, ensure_ascii=False) + '\n')
+        with pytest.raises(ValueError):
+            run_batch(duplicated, profiles_path, os.path.join(directory, 'other.jsonl'), workers=1)
+        assert not os.path.exists(os.path.join(directory, 'other.jsonl'))
+
+if __name__ == "__main__":
+    print("Testing Batch Command")
+    print("=" * 50)
+
+    test_iter_records_streams_json_and_jsonl()
+    test_batch_matches_engine_and_threshold()
+    test_resume_skips_done_jobs_and_drops_partial_rows()
+    test_resume_without_output_and_duplicate_ids()
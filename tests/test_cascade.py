@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the cascade ranking
+Cheap stages first, full hybrid scoring only on the survivors
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.engine import RecommenderEngine
+from app import create_app
+from app.recommender import match_candidates_for_job
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+job_offer = generate_job_offers(1, seed=7)[0]
+user_profiles = generate_user_profiles(300, seed=7)
+
+def ids(results):
+    return [r['userProfile']['matricule'] for r in results]
+
+def test_cascade_keeps_the_head_of_the_ranking():
+    """The best pairs survive the cascade with their exhaustive scores"""
+    # Without the transformer the stage-1 estimate is the final score
+    engine = RecommenderEngine(model=None)
+    exhaustive = match_candidates_for_job(job_offer, user_profiles, engine=engine)
+    stats = {}
+    cascaded = match_candidates_for_job(job_offer, user_profiles, stats=stats, cascade={'stage2_top_m': 20, 'ambiguous_margin': 0.0},
+                                        engine=engine)
+
+    print(f"Cascade stats: {stats['cascade']}")
+    assert ids(cascaded)[:20] == ids(exhaustive)[:20]
+    assert [r['score'] for r in cascaded[:20]] == [r['score'] for r in exhaustive[:20]]
+    assert stats['scored'] == stats['cascade']['survivors'] < len(user_profiles)
+
+def test_cascade_stage_counts_add_up():
+    """Every pair is either removed by a stage or scored in full"""
+    stats = {}
+    match_candidates_for_job(job_offer, user_profiles, stats=stats, cascade={'stage1_min_score': 20.0, 'stage2_top_m': 10})
+    cascade = stats['cascade']
+    assert cascade['pairs'] == cascade['stage1_scored'] == len(user_profiles)
+    assert cascade['stage1_removed'] + cascade['stage2_removed'] + cascade['survivors'] == cascade['pairs']
+    assert cascade['stage1_removed'] > 0
+
+def test_cascade_through_the_api():
+    """Requests enable the cascade with an object of cutoffs and get per-stage counts back"""
+    client = create_app().test_client()
+    payload = {"jobOffer": job_offer, "userProfiles": user_profiles[:50], "cascade": {"stage2_top_m": 5}}
+    response = client.post('/recommend/candidates-for-job', json=payload)
+    print(f"Cascade header: {response.headers.get('X-Recommendation-Cascade')}")
+    assert response.status_code == 200
+    assert 'stage1_removed=' in response.headers['X-Recommendation-Cascade']
+
+    payload['cascade'] = {"stage2_top_m": 0}
+    assert client.post('/recommend/candidates-for-job', json=payload).status_code == 400
+    payload['cascade'] = {"unknown": 1}
+    assert client.post('/recommend/candidates-for-job', json=payload).status_code == 400
+
+if __name__ == "__main__":
+    print("Testing Cascade Ranking")
+    print("=" * 50)
+
+    test_cascade_keeps_the_head_of_the_ranking()
+    test_cascade_stage_counts_add_up()
+    test_cascade_through_the_api()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the memory-mapped catalog format
+Converts the sample data files and checks the columns round-trip
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from app.catalog import convert_json_file, open_catalog, build_catalog
+from app.recommender import extract_competencies_from_user, extract_competencies_from_job
+from app.snapshot import Snapshot, warm_embeddings
+from app.synthetic import generate_user_profiles
+from encoders import FakeEncoder, fake_engine
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_dir = os.path.join(base_dir, 'data')
+
+def test_profiles_round_trip():
+    """Profiles converted from data/user_profiles.json keep ids, records and competencies"""
+    with open(os.path.join(data_dir, 'user_profiles.json'), 'r', encoding='utf-8') as f:
+        profiles = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = convert_json_file(os.path.join(data_dir, 'user_profiles.json'), os.path.join(tmp, 'profiles.rcat'), 'profiles')
+        print(f"Catalog: {len(catalog)} profiles, {len(catalog.vocabulary)} competencies")
+
+        assert len(catalog) == len(profiles)
+        assert list(catalog.ids) == [profile['matricule'] for profile in profiles]
+        for index, profile in enumerate(profiles):
+            assert catalog.record(index) == profile
+            assert sorted(catalog.competencies(index)) == sorted(extract_competencies_from_user(profile))
+        assert catalog.tfidf_matrix.shape == (len(profiles), len(catalog.tfidf_terms))
+
+def test_jobs_round_trip_and_zero_copy():
+    """Job catalogs are readable from a fresh open and arrays point into the mapping"""
+    with open(os.path.join(data_dir, 'job_offers.json'), 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.rcat')
+        convert_json_file(os.path.join(data_dir, 'job_offers.json'), path, 'jobs')
+        catalog = open_catalog(path)
+
+        assert catalog.kind == 'jobs'
+        assert list(catalog.ids) == [f"jobs-{i}" for i in range(len(jobs))]
+        for index, job in enumerate(jobs):
+            assert sorted(catalog.competencies(index)) == sorted(extract_competencies_from_job(job))
+
+        # TF-IDF rows are L2-normalized and the sparse matrix shares the mapped buffers
+        norms = np.sqrt(catalog.tfidf_matrix.multiply(catalog.tfidf_matrix).sum(axis=1)).A1
+        assert np.allclose(norms[norms > 0], 1.0, atol=1e-5)
+        assert np.shares_memory(catalog.tfidf_matrix.data, catalog.file.array('tfidf_data'))
+        assert not catalog.tfidf_matrix.data.flags.writeable
+
+def test_empty_catalog():
+    """An empty catalog is still a valid file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = build_catalog([], 'profiles', os.path.join(tmp, 'empty.rcat'))
+        assert len(catalog) == 0
+        assert catalog.tfidf_matrix.shape[0] == 0
+
+def test_catalog_embeddings_of_another_model_are_re_encoded():
+    """Warming keeps catalog vectors of the running model and re-encodes those of another one"""
+    profiles = generate_user_profiles(20, seed=5)
+    with tempfile.TemporaryDirectory() as tmp:
+        with fake_engine():
+            catalog = build_catalog(profiles, 'profiles', os.path.join(tmp, 'profiles.rcat'))
+        print(f"Catalog meta: {catalog.meta}")
+        assert catalog.meta['model'] and catalog.meta['dimension'] == 16
+
+        with fake_engine() as engine:
+            snapshot = Snapshot(1, {}, {'profiles': catalog}, None, engine.derive())
+            warm_embeddings(snapshot)
+            assert engine.get_model().encoded == []
+            assert np.array_equal(snapshot.engine.snapshot_embeddings[catalog.vocabulary[0]], catalog.skill_embeddings[0])
+
+        with fake_engine(model_name='other-model') as engine:
+            snapshot = Snapshot(1, {}, {'profiles': catalog}, None, engine.derive())
+            warm_embeddings(snapshot)
+            assert sorted(engine.get_model().encoded) == sorted(catalog.vocabulary)
+
+        with fake_engine(FakeEncoder(dimension=8)) as engine:
+            engine.encode_skills(['python'])
+            snapshot = Snapshot(1, {}, {'profiles': catalog}, None, engine.derive())
+            warm_embeddings(snapshot)
+            assert all(len(vector) == 8 for vector in snapshot.engine.snapshot_embeddings.values())
+
+if __name__ == "__main__":
+    print("Testing Memory-Mapped Catalog Format")
+    print("=" * 50)
+
+    test_profiles_round_trip()
+    test_jobs_round_trip_and_zero_copy()
+    test_empty_catalog()
+    test_catalog_embeddings_of_another_model_are_re_encoded()
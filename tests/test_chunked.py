@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for chunked scoring with bounded peak memory
+"""
+
+import sys
+import os
+import subprocess
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.recommender import match_candidates_for_job, match_jobs_for_candidate, chunk_size_for_memory_limit
+from app.synthetic import generate_user_profiles, generate_job_offers, iter_user_profiles
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+job_offer = generate_job_offers(1, seed=4)[0]
+
+# Measures the peak RSS growth of one streamed, chunked ranking in a fresh process
+RSS_PROBE = """
+import contextlib, os, resource, sys
+sys.path.insert(0, {base_dir!r})
+from app.recommender import match_candidates_for_job
+from app.synthetic import iter_user_profiles, generate_job_offers
+job_offer = generate_job_offers(1, seed=4)[0]
+with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+    match_candidates_for_job(job_offer, iter_user_profiles(100), chunk_size=100, top_k=10)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    match_candidates_for_job(job_offer, iter_user_profiles({count}), chunk_size=100, top_k=10)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(after - before)
+"""
+
+def peak_rss_growth_kb(count: int) -> int:
+    output = subprocess.check_output([sys.executable, '-c', RSS_PROBE.format(base_dir=base_dir, count=count)], text=True)
+    return int(output.strip().splitlines()[-1])
+
+def test_chunked_matches_in_memory_ranking():
+    """Chunked top-k equals the head of the in-memory ranking, ties included"""
+    profiles = generate_user_profiles(230, seed=4)
+    expected = match_candidates_for_job(job_offer, profiles, top_k=15)
+    stats = {}
+    chunked = match_candidates_for_job(job_offer, iter(profiles), top_k=15, chunk_size=40, stats=stats)
+    assert [(r['userProfile']['matricule'], r['score']) for r in chunked] == \
+        [(r['userProfile']['matricule'], r['score']) for r in expected]
+    assert stats['total'] == stats['scored'] == 230
+
+    jobs = generate_job_offers(90, seed=4)
+    expected = match_jobs_for_candidate(profiles[0], jobs, top_k=5)
+    assert match_jobs_for_candidate(profiles[0], jobs, top_k=5, memory_limit_mb=1) == expected
+
+def test_memory_limit_sets_chunk_size():
+    """A lower memory ceiling gives smaller chunks, never below one scoring block"""
+    assert chunk_size_for_memory_limit(64) > chunk_size_for_memory_limit(8) >= 32
+
+def test_peak_rss_stays_flat_as_n_grows():
+    """Peak memory of a streamed ranking does not grow with the number of candidates"""
+    small = peak_rss_growth_kb(300)
+    large = peak_rss_growth_kb(3000)
+    print(f"Peak RSS growth: {small} kB for 300 candidates, {large} kB for 3000 candidates")
+    # The in-memory ranking grows by ~6 MB between these sizes
+    assert large - small < 2 * 1024
+
+if __name__ == "__main__":
+    print("Testing Chunked Scoring")
+    print("=" * 50)
+
+    test_chunked_matches_in_memory_ranking()
+    test_memory_limit_sets_chunk_size()
+    test_peak_rss_stays_flat_as_n_grows()
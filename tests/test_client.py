@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script for the Python client SDK
+Serves the app from a thread on a free port, no separate server needed
+"""
+
+import sys
+import os
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+from werkzeug.serving import make_server
+
+import app.client as client_module
+from app import create_app
+from app.client import RecommenderClient, AsyncRecommenderClient, RecommenderError, Ranking, connect_failed
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+profiles = generate_user_profiles(30, seed=5)
+job_offers = generate_job_offers(6, seed=5)
+
+class ThreadedApp:
+    """The Flask app served from a background thread"""
+
+    def __init__(self, app):
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+class StubServer:
+    """HTTP/1.1 keep-alive server answering the queued statuses (then 200 []), counting connections"""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.connections = 0
+        stub = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            def setup(self):
+                stub.connections += 1
+                super().setup()
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                status = stub.statuses.pop(0) if stub.statuses else 200
+                body = b'[]' if status == 200 else b'{"error": "busy"}'
+                self.send_response(status)
+                self.send_header('Retry-After', '0')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args):
+                pass
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+def test_concurrent_calls_return_typed_rankings_in_order():
+    app = create_app()
+    expected = [app.test_client().post('/recommend/candidates-for-job', json={'jobOffer': job, 'userProfiles': profiles}).get_json()
+                for job in job_offers]
+    with ThreadedApp(app) as server, RecommenderClient(server.url, concurrency=3, bulk_threshold=None) as client:
+        rankings = client.candidates_for_jobs(job_offers, profiles)
+    assert all(isinstance(ranking, Ranking) for ranking in rankings)
+    for ranking, results in zip(rankings, expected):
+        assert [(r.record, r.score) for r in ranking] == [(r['userProfile'], r['score']) for r in results]
+        assert ranking.total == len(profiles) and not ranking.partial
+
+def test_pooled_connections_are_reused():
+    """Concurrent calls share at most `concurrency` keep-alive connections"""
+    with StubServer() as server, RecommenderClient(server.url, concurrency=3, bulk_threshold=None) as client:
+        for _ in range(4):
+            client.candidates_for_jobs(job_offers, profiles)
+        print(f"{4 * len(job_offers)} calls over {server.connections} connections")
+        assert server.connections <= 3
+
+def test_bulk_batching_and_pages():
+    """Large batches go through the job API; pages follow the cursor"""
+    app = create_app()
+    with ThreadedApp(app) as server, RecommenderClient(server.url, bulk_threshold=4, compress_min_bytes=0) as client:
+        direct = client.candidates_for_job(job_offers[0], profiles, top_k=100)
+        bulk = client.candidates_for_jobs(job_offers, profiles)
+        assert client._bulk_supported is True
+        assert [(r.record, r.score) for r in bulk[0]] == [(r.record, r.score) for r in direct]
+
+        first = client.candidates_for_job(job_offers[0], profiles, page_size=3)
+        pages = [first]
+        while pages[-1].cursor:
+            pages.append(client.next_page(pages[-1]))
+        assert [r.record for page in pages for r in page] == [r.record for r in direct]
+
+        with pytest.raises(RecommenderError) as error:
+            client.candidates_for_job(job_offers[0], profiles, top_k=-1)
+        assert error.value.status == 400
+
+def test_bulk_and_concurrent_rankings_agree():
+    """Without top_k both paths keep the client's default and report how many profiles were scored"""
+    previous_top_k = client_module.DEFAULT_TOP_K
+    client_module.DEFAULT_TOP_K = 5
+    try:
+        with ThreadedApp(create_app()) as server:
+            with RecommenderClient(server.url, bulk_threshold=4) as client:
+                bulk = client.candidates_for_jobs(job_offers, profiles)
+                assert client._bulk_supported is True
+            with RecommenderClient(server.url, bulk_threshold=None) as client:
+                concurrent = client.candidates_for_jobs(job_offers, profiles)
+    finally:
+        client_module.DEFAULT_TOP_K = previous_top_k
+    assert [[(r.record, r.score) for r in ranking] for ranking in bulk] == \
+        [[(r.record, r.score) for r in ranking] for ranking in concurrent]
+    assert max(len(ranking) for ranking in bulk) == 5
+    for ranking in bulk + concurrent:
+        assert len(ranking) <= 5 and ranking.partial is False
+        assert ranking.scored == ranking.total == len(profiles)
+
+def test_retries_with_backoff():
+    """503 and 429 answers are retried, honouring Retry-After, until max_retries"""
+    with StubServer([503, 429]) as server:
+        assert RecommenderClient(server.url, backoff=0.01).candidates_for_job(job_offers[0], profiles).results == []
+        assert server.statuses == []
+        server.statuses.extend([503] * 3)
+        with pytest.raises(RecommenderError) as error:
+            RecommenderClient(server.url, backoff=0.01, max_retries=2).candidates_for_job(job_offers[0], profiles)
+        assert error.value.status == 503
+
+def test_job_submission_is_not_sent_twice():
+    """POST /jobs is only retried on 429 or a failed connection, never after the server may have run it"""
+    with StubServer([503, 503]) as server:
+        with pytest.raises(RecommenderError) as error:
+            RecommenderClient(server.url, backoff=0.01).submit_job(job_offers, profiles)
+        assert error.value.status == 503 and server.statuses == [503]
+        server.statuses[:] = [429, 503]
+        with pytest.raises(RecommenderError):
+            RecommenderClient(server.url, backoff=0.01).submit_job(job_offers, profiles)
+        assert server.statuses == []
+
+    with StubServer() as server:
+        closed_url = server.url
+    with pytest.raises(requests.ConnectionError) as error:
+        RecommenderClient(closed_url, max_retries=0).submit_job(job_offers, profiles)
+    assert connect_failed(error.value)
+
+def test_async_client():
+    with ThreadedApp(create_app()) as server:
+        async def rank():
+            async with AsyncRecommenderClient(server.url, bulk_threshold=None) as client:
+                return await asyncio.gather(*(client.candidates_for_job(job, profiles) for job in job_offers[:3]))
+        rankings = asyncio.run(rank())
+    assert len(rankings) == 3 and all(ranking.total == len(profiles) for ranking in rankings)
+
+if __name__ == "__main__":
+    print("Testing the Python client SDK")
+    print("=" * 50)
+    test_concurrent_calls_return_typed_rankings_in_order()
+    test_pooled_connections_are_reused()
+    test_bulk_batching_and_pages()
+    test_bulk_and_concurrent_rankings_agree()
+    test_retries_with_backoff()
+    test_job_submission_is_not_sent_twice()
+    test_async_client()
+    print("All client tests passed")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight coalescing of identical requests
+Uses the Flask test client from several threads, no running server needed
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.api as api
+from app import create_app
+from app.coalesce import SingleFlight, request_key
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+user_profile = generate_user_profiles(1, seed=17)[0]
+job_offers = generate_job_offers(40, seed=17)
+
+def run_threads(count, target, stagger=0.0):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(stagger)
+    for thread in threads:
+        thread.join()
+
+def test_request_key_is_canonical():
+    payload = {'userProfile': user_profile, 'jobOffers': job_offers, 'top_k': 5}
+    reordered = {'top_k': 5, 'jobOffers': job_offers, 'userProfile': dict(reversed(list(user_profile.items())))}
+    assert request_key('jobs-for-candidate', payload) == request_key('jobs-for-candidate', reordered)
+    assert request_key('jobs-for-candidate', payload) == request_key('jobs-for-candidate', {**payload, 'deadline_ms': 10, 'page_size': 2})
+    assert request_key('jobs-for-candidate', payload) != request_key('jobs-for-candidate', {**payload, 'top_k': 6})
+    assert request_key('jobs-for-candidate', payload) != request_key('candidates-for-job', payload)
+
+def test_single_flight_shares_results_and_errors():
+    flights = SingleFlight()
+    calls, outcomes = [], []
+    def slow():
+        calls.append(1)
+        time.sleep(0.3)
+        return 'ranking'
+    run_threads(5, lambda: outcomes.append(flights.do('key', slow)), stagger=0.01)
+    assert len(calls) == 1 and sorted(outcomes) == [('ranking', False)] + [('ranking', True)] * 4
+    assert flights.in_flight() == 0
+
+    errors = []
+    def failing():
+        time.sleep(0.2)
+        raise RuntimeError('scoring failed')
+    def call():
+        try:
+            flights.do('key', failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+    run_threads(3, call, stagger=0.01)
+    assert errors == ['scoring failed'] * 3
+    # Nothing is kept once the computation ended
+    assert flights.do('key', lambda: 'again') == ('again', False)
+
+def test_identical_requests_score_once():
+    """Concurrent duplicates wait for the first computation, without holding a scoring slot"""
+    app = create_app({'MAX_CONCURRENT_REQUESTS': 2})
+    payload = {'userProfile': user_profile, 'jobOffers': job_offers}
+    expected = app.test_client().post('/recommend/jobs-for-candidate', json=payload).get_json()
+
+    calls, responses = [], []
+    original = api.match_jobs_for_candidate
+    def slow_match(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.5)
+        return original(*args, **kwargs)
+    api.match_jobs_for_candidate = slow_match
+    try:
+        run_threads(6, lambda: responses.append(app.test_client().post('/recommend/jobs-for-candidate', json=payload)), stagger=0.03)
+    finally:
+        api.match_jobs_for_candidate = original
+    metrics = app.extensions['metrics']
+    coalesced = metrics.counter('recommender_coalesced_requests_total', {'endpoint': 'jobs-for-candidate'})
+    print(f"Scoring runs: {len(calls)}, coalesced: {coalesced}, statuses: {[r.status_code for r in responses]}")
+    assert [r.status_code for r in responses] == [200] * 6
+    assert all(r.get_json() == expected for r in responses)
+    assert len(calls) == 1 and coalesced == 5
+    assert 'recommender_coalesced_requests_total{endpoint="jobs-for-candidate"} 5' in app.test_client().get('/metrics').get_data(as_text=True)
+
+def test_partial_results_are_not_shared():
+    """A follower recomputes when the leader's result is not shareable, after resuming"""
+    flights = SingleFlight()
+    calls, resumed, outcomes = [], [], []
+    def slow():
+        calls.append(1)
+        time.sleep(0.3)
+        return {'partial': len(calls) == 1}
+    def call():
+        outcomes.append(flights.do('key', slow, shareable=lambda result: not result['partial'],
+                                   on_resume=lambda: resumed.append(1)))
+    run_threads(2, call, stagger=0.05)
+    assert len(calls) == 2 and len(resumed) == 1
+    assert sorted(shared for _, shared in outcomes) == [False, False]
+
+def test_follower_without_free_slot_gets_503():
+    """A follower giving up at its deadline does not score beyond MAX_CONCURRENT_REQUESTS"""
+    app = create_app({'MAX_CONCURRENT_REQUESTS': 2})
+    payload = {'userProfile': user_profile, 'jobOffers': job_offers}
+    other = {'userProfile': user_profile, 'jobOffers': job_offers[:20]}
+    calls, responses = [], []
+    original = api.match_jobs_for_candidate
+    def slow_match(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.6)
+        return original(*args, **kwargs)
+    def post(body):
+        responses.append(app.test_client().post('/recommend/jobs-for-candidate', json=body))
+    api.match_jobs_for_candidate = slow_match
+    try:
+        # The follower frees its slot while waiting, another request takes it
+        threads = [threading.Thread(target=post, args=(payload,)),
+                   threading.Thread(target=post, args=({**payload, 'deadline_ms': 300},)),
+                   threading.Thread(target=post, args=(other,))]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.1)
+        for thread in threads:
+            thread.join()
+    finally:
+        api.match_jobs_for_candidate = original
+    statuses = sorted(response.status_code for response in responses)
+    print(f"Statuses: {statuses}, scoring runs: {len(calls)}")
+    assert statuses == [200, 200, 503] and len(calls) == 2
+
+if __name__ == "__main__":
+    print("Testing single-flight request coalescing")
+    print("=" * 50)
+    test_request_key_is_canonical()
+    test_single_flight_shares_results_and_errors()
+    test_identical_requests_score_once()
+    test_partial_results_are_not_shared()
+    test_follower_without_free_slot_gets_503()
+    print("All coalescing tests passed")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test of the thread-safe recommendation engine
+Uses a small deterministic encoder so it runs without downloading a model
+"""
+
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import requests
+from werkzeug.serving import make_server
+
+import app.recommender as recommender
+from app import create_app
+from app.engine import RecommenderEngine, VectorCache
+from app.recommender import resolve_scoring
+from app.synthetic import generate_user_profiles, generate_job_offers
+from encoders import FakeEncoder
+
+profiles = generate_user_profiles(80, seed=21)
+job_offers = generate_job_offers(6, seed=21)
+field_scoring = resolve_scoring({'fields': {'title': 0.1, 'experiences': 0.2}})
+THREADS = 16
+# Seconds every encode call takes, to widen the window in which another thread could race it
+ENCODE_DELAY = 0.002
+
+def request_options(index):
+    return [{}, {'cascade': {}}, {'scoring': field_scoring, 'top_k': 10}][index % 3]
+
+def summary(results, result_key='userProfile'):
+    return [(result[result_key].get('matricule', result[result_key].get('titre_de_poste')), result['score']) for result in results]
+
+def test_vector_cache_first_writer_wins():
+    """Concurrent writers keep the first vector of a key and never exceed the bound"""
+    cache = VectorCache(max_entries=500)
+    def write(thread):
+        for start in range(0, 1000, 50):
+            cache.put_many((key, thread) for key in range(start, start + 50))
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(write, range(THREADS)))
+    assert len(cache) == 500
+    # Every thread writes keys in order, so the first 500 keys were kept
+    assert cache.missing([1, 2, 499, 500, 500]) == [500]
+    assert all(cache.get(key) in range(THREADS) for key in range(500))
+
+def test_concurrent_encoding_encodes_each_skill_once():
+    """Overlapping batches from many threads encode every skill exactly once"""
+    encoder = FakeEncoder(delay=ENCODE_DELAY)
+    engine = RecommenderEngine(model=encoder)
+    skills = [f"skill {i}" for i in range(200)]
+    batches = [skills[start:start + 40] for start in range(0, 200, 10)] * 4
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        results = list(executor.map(engine.encode_skills, batches))
+    print(f"{len(encoder.encoded)} skills encoded for {len(batches)} concurrent batches, at most {encoder.max_active} encode call at once")
+    assert sorted(encoder.encoded) == sorted(skills)
+    assert encoder.max_active == 1
+    reference = RecommenderEngine(model=FakeEncoder(delay=ENCODE_DELAY))
+    for batch, vectors in zip(batches, results):
+        assert np.allclose(vectors, reference.encode_skills(batch))
+
+def test_bounded_skill_cache_and_explicit_engine():
+    """Skills beyond the cache bound still get their vectors; scoring helpers use the engine they are given"""
+    engine = RecommenderEngine(model=FakeEncoder(delay=ENCODE_DELAY), skill_cache_size=2)
+    vectors = engine.encode_skills(['python', 'django', 'sql'])
+    assert len(engine.skill_embeddings) == 2
+    assert np.allclose(vectors, RecommenderEngine(model=FakeEncoder(delay=ENCODE_DELAY)).encode_skills(['python', 'django', 'sql']))
+
+    previous_engine = recommender.ENGINE
+    recommender.ENGINE = RecommenderEngine(model=None)
+    try:
+        assert recommender.calculate_pretrained_similarity(['python'], ['python']) == 0.0
+        assert recommender.calculate_pretrained_similarity(['python'], ['python'], engine) > 99.0
+        assert engine.match_jobs_for_candidate(profiles[0], job_offers) == \
+            RecommenderEngine(model=FakeEncoder(delay=ENCODE_DELAY)).match_jobs_for_candidate(profiles[0], job_offers)
+    finally:
+        recommender.ENGINE = previous_engine
+
+def test_concurrent_rankings_match_serial_rankings():
+    """Many threads ranking at once on one cold engine give the serial results"""
+    serial_engine = RecommenderEngine(model=FakeEncoder(delay=ENCODE_DELAY))
+    expected = [summary(serial_engine.match_candidates_for_job(job_offers[i % len(job_offers)], profiles, **request_options(i)))
+                for i in range(24)]
+    expected_jobs = summary(serial_engine.match_jobs_for_candidate(profiles[0], job_offers), 'jobOffer')
+
+    encoder = FakeEncoder(delay=ENCODE_DELAY)
+    engine = RecommenderEngine(model=encoder)
+    def rank(index):
+        return summary(engine.match_candidates_for_job(job_offers[index % len(job_offers)], profiles, **request_options(index)))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        futures = [executor.submit(rank, index) for index in range(24)]
+        jobs_future = executor.submit(lambda: summary(engine.match_jobs_for_candidate(profiles[0], job_offers), 'jobOffer'))
+        rankings = [future.result() for future in futures]
+    print(f"24 rankings on {THREADS} threads in {time.perf_counter() - start:.2f}s, "
+          f"{len(encoder.encoded)} skills encoded, {len(engine.field_vectors)} field vectors")
+    assert rankings == expected
+    assert jobs_future.result() == expected_jobs
+    assert len(encoder.encoded) == len(set(encoder.encoded))
+    assert encoder.max_active == 1
+
+def test_threaded_server_with_reloads():
+    """A threaded Flask server ranks concurrent requests correctly while the snapshot is reloaded"""
+    previous_engine = recommender.ENGINE
+    recommender.ENGINE = RecommenderEngine(model=FakeEncoder(delay=ENCODE_DELAY))
+    try:
+        app = create_app({'MAX_CONCURRENT_REQUESTS': THREADS, 'COALESCE_REQUESTS': False, 'ADMIN_TOKEN': 'secret'})
+        client = app.test_client()
+        payloads = [{'jobOffer': job_offers[i % len(job_offers)], 'userProfiles': profiles, **request_options(i)} for i in range(24)]
+        expected = [client.post('/recommend/candidates-for-job', json=payload).get_json() for payload in payloads]
+        recommender.ENGINE = RecommenderEngine(model=FakeEncoder(delay=ENCODE_DELAY))
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        url = f"http://127.0.0.1:{server.server_port}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        stop = threading.Event()
+        reloads = []
+        def reload_loop():
+            while not stop.is_set():
+                response = requests.post(url + '/admin/reload', json={'wait': True}, headers={'X-Admin-Token': 'secret'})
+                reloads.append(response.status_code)
+        reloader = threading.Thread(target=reload_loop)
+        reloader.start()
+        try:
+            with ThreadPoolExecutor(max_workers=THREADS) as executor:
+                responses = list(executor.map(lambda payload: requests.post(url + '/recommend/candidates-for-job', json=payload),
+                                              payloads))
+        finally:
+            stop.set()
+            reloader.join()
+            server.shutdown()
+        print(f"{len(responses)} concurrent requests, {len(reloads)} reloads meanwhile")
+        assert [response.status_code for response in responses] == [200] * len(payloads)
+        assert [response.json() for response in responses] == expected
+        assert reloads and set(reloads) == {200}
+    finally:
+        recommender.ENGINE = previous_engine
+
+if __name__ == "__main__":
+    print("Testing Engine Concurrency")
+    print("=" * 50)
+    test_vector_cache_first_writer_wins()
+    test_concurrent_encoding_encodes_each_skill_once()
+    test_bounded_skill_cache_and_explicit_engine()
+    test_concurrent_rankings_match_serial_rankings()
+    test_threaded_server_with_reloads()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the accuracy-vs-speed evaluation of ranking modes
+"""
+
+import sys
+import os
+import contextlib
+import io
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.evaluation as evaluation
+from app.evaluation import evaluate, ndcg_at_k, recall_at_k, main
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+profiles = generate_user_profiles(60, seed=11)
+job_offers = generate_job_offers(3, seed=11)
+
+def test_metrics():
+    """recall@k and NDCG@k are 1 for the true ranking and drop when it is shuffled"""
+    records = [{'matricule': str(i)} for i in range(4)]
+    truth = [{'r': records[i], 'score': 90.0 - 10 * i} for i in range(4)]
+    assert recall_at_k(truth, truth, 'r', 2) == 1.0
+    assert ndcg_at_k(truth, truth, 'r', 3) == 1.0
+    swapped = [truth[2], truth[0], truth[1]]
+    print(f"recall@2 {recall_at_k(truth, swapped, 'r', 2)}, ndcg@3 {ndcg_at_k(truth, swapped, 'r', 3):.3f}")
+    assert recall_at_k(truth, swapped, 'r', 2) == 0.5
+    assert 0 < ndcg_at_k(truth, swapped, 'r', 3) < 1
+    assert recall_at_k([], [], 'r', 5) == 1.0
+
+def test_evaluate_modes():
+    """The exhaustive row is the reference; cutting the list keeps the top results"""
+    rows = evaluate(job_offers, profiles, {'cascade': {'cascade': {}}, 'top5': {'top_k': 5}}, k=5)
+    for row in rows:
+        print(row)
+    modes = {row['mode']: row for row in rows}
+    assert list(modes) == ['exhaustive', 'cascade', 'top5']
+    baseline = modes['exhaustive']
+    assert baseline['recall@5'] == 1.0 and baseline['ndcg@5'] == 1.0
+    assert baseline['score_mae'] == 0.0 and baseline['speedup'] == 1.0
+    # Cutting the list keeps the top results and their scores
+    assert modes['top5']['recall@5'] == 1.0 and modes['top5']['score_mae'] == 0.0
+    assert 0 <= modes['cascade']['recall@5'] <= 1 and modes['cascade']['speedup'] > 0
+
+def test_evaluate_jobs_direction():
+    """Job offers can be ranked for profiles too"""
+    rows = evaluate(profiles[:2], job_offers, {'cascade': {'cascade': {}}}, direction='jobs', k=3)
+    assert [row['mode'] for row in rows] == ['exhaustive', 'cascade']
+    assert rows[0]['recall@3'] == 1.0
+
+def test_modes_are_timed_warm():
+    """Every mode, the exhaustive one included, runs once untimed before its timed runs"""
+    calls = []
+    original = evaluation.match_candidates_for_job
+    def counting_match(job_offer, items, **options):
+        calls.append(bool(options))
+        return original(job_offer, items, **options)
+    evaluation.match_candidates_for_job = counting_match
+    try:
+        evaluate(job_offers[:2], profiles, {'top5': {'top_k': 5}}, k=5, repeat=2)
+    finally:
+        evaluation.match_candidates_for_job = original
+    # (warm-up + 2 timed runs) x 2 queries for each of the two modes
+    assert calls.count(False) == 6 and calls.count(True) == 6
+
+def test_cli():
+    """The command prints one table row per mode"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        main(['--queries', '2', '--candidates', '30', '--k', '5', '--mode', 'cascade={"cascade": {}}'])
+    print(output.getvalue())
+    lines = output.getvalue().splitlines()
+    assert 'recall@5' in lines[1] and 'speedup' in lines[1]
+    assert lines[2].startswith('exhaustive') and lines[3].startswith('cascade')
+
+if __name__ == "__main__":
+    print("Testing Evaluation Harness")
+    print("=" * 50)
+    test_metrics()
+    test_evaluate_modes()
+    test_evaluate_jobs_direction()
+    test_modes_are_timed_warm()
+    test_cli()
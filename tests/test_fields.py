@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-field matching on experiences, formations and job descriptions
+Uses the Flask test client, no running server needed
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import app.fields as fields
+from app import create_app
+from app.catalog import build_catalog
+import app.recommender as recommender
+from app.fields import field_similarities, job_field_text
+from app.recommender import match_candidates_for_job, resolve_scoring
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+job_offer = {
+    'titre_de_poste': 'Développeur Python',
+    'description': "Développement d'applications backend.",
+    'competences_requises': ['Python', 'Django', 'API REST'],
+}
+
+def profile(matricule, position, experiences, formations):
+    return {'matricule': matricule, 'position': position, 'experiences': experiences,
+            'formations': formations, 'competences': ['Python', 'Django']}
+
+backend = profile('U1', 'Développeur', ["Développement d'applications backend"], ['Master Informatique'])
+auditor = profile('U2', 'Auditeur', ['Audit financier'], ['Master Finance'])
+field_scoring = {'fields': {'title': 0.1, 'experiences': 0.2, 'formations': 0.05}}
+
+def test_field_similarities():
+    """Related fields score higher than unrelated ones, missing fields score 0"""
+    similarities = field_similarities([backend, auditor], [job_offer])
+    print(f"Field similarities (title, experiences, formations):\n{similarities.round(1)}")
+    assert similarities.shape == (2, 3)
+    assert similarities[0, 1] > 50 and similarities[0, 1] > 2 * similarities[1, 1]
+    assert similarities[0, 0] > similarities[1, 0]
+    # Pairwise rows and a single record broadcast to the other side agree
+    pairwise = field_similarities([backend, auditor], [job_offer, job_offer])
+    assert np.allclose(pairwise, similarities)
+    assert field_similarities([], [job_offer]).shape == (0, 3)
+    # Missing fields have no similarity
+    assert not field_similarities([{'competences': ['Python']}], [job_offer]).any()
+
+def test_vectors_are_cached_by_normalized_text():
+    """Texts that normalize alike reuse the cached vector"""
+    field_similarities([backend], [job_offer])
+    assert job_field_text(job_offer, 'experiences') in recommender.ENGINE.field_vectors
+    calls = []
+    original = fields._FIELD_VECTORIZER.transform
+    fields._FIELD_VECTORIZER.transform = lambda texts: calls.append(texts) or original(texts)
+    try:
+        field_similarities([backend], [{**job_offer, 'titre_de_poste': 'DÉVELOPPEUR  python!'}])
+    finally:
+        fields._FIELD_VECTORIZER.transform = original
+    assert not calls
+
+def test_field_weights_change_the_ranking():
+    """Field weights break ties that competences alone leave"""
+    plain = match_candidates_for_job(job_offer, [auditor, backend])
+    assert plain[0]['score'] == plain[1]['score']
+    # Zero field weights leave the scores untouched
+    zero = match_candidates_for_job(job_offer, [auditor, backend], scoring=resolve_scoring({'fields': {'title': 0}}))
+    assert [r['score'] for r in zero] == [r['score'] for r in plain]
+    ranked = match_candidates_for_job(job_offer, [auditor, backend], scoring=resolve_scoring(field_scoring))
+    print(f"With fields: {[(r['userProfile']['matricule'], round(r['score'], 1)) for r in ranked]}")
+    assert ranked[0]['userProfile'] is backend
+    assert ranked[0]['score'] > ranked[1]['score']
+
+def test_invalid_field_weights():
+    """Unknown fields, negative weights and weights adding up to more than 1 are rejected"""
+    for scoring in ({'fields': {'skills': 0.1}}, {'fields': {'title': -0.1}}, {'fields': {'title': 0.6, 'experiences': 0.6}}):
+        try:
+            resolve_scoring(scoring)
+        except ValueError as e:
+            print(f"Rejected {scoring}: {e}")
+        else:
+            raise AssertionError(f"{scoring} was accepted")
+
+def test_api_rerank_and_cascade_with_fields():
+    """Re-ranking kept components with field weights equals scoring them fresh"""
+    profiles = generate_user_profiles(60, seed=5)
+    job = generate_job_offers(1, seed=5)[0]
+    client = create_app().test_client()
+    payload = {'jobOffer': job, 'userProfiles': profiles}
+    first = client.post('/recommend/candidates-for-job', json={**payload, 'keep_components': True})
+    fresh = client.post('/recommend/candidates-for-job', json={**payload, 'scoring': field_scoring}).get_json()
+    reranked = client.post('/recommend/rerank', json={'ranking': first.headers['X-Recommendation-Ranking'],
+                                                     'scoring': field_scoring}).get_json()
+    assert [r['userProfile'] for r in reranked] == [r['userProfile'] for r in fresh]
+    assert np.allclose([r['score'] for r in reranked], [r['score'] for r in fresh])
+    cascade = client.post('/recommend/candidates-for-job', json={**payload, 'scoring': field_scoring, 'cascade': {}})
+    assert cascade.status_code == 200
+    assert client.post('/recommend/candidates-for-job', json={**payload, 'scoring': {'fields': {'title': 2}}}).status_code == 400
+
+def test_catalog_fields_vectorized_at_load():
+    """Catalog field texts are vectorized when the catalog is loaded, not per request"""
+    profiles = generate_user_profiles(200, seed=6)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'profiles.rcat')
+        build_catalog(profiles, 'profiles', path)
+        cache = recommender.ENGINE.field_vectors
+        cache.clear()
+        app = create_app({'PROFILE_CATALOG': path, 'SCORING': field_scoring})
+        warmed = len(cache)
+        assert warmed > 0
+        client = app.test_client()
+        job = generate_job_offers(1, seed=6)[0]
+        start = time.perf_counter()
+        plain = client.post('/recommend/candidates-for-job', json={'jobOffer': job, 'scoring': {'fields': dict.fromkeys(field_scoring['fields'], 0)}})
+        plain_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        response = client.post('/recommend/candidates-for-job', json={'jobOffer': job})
+        field_seconds = time.perf_counter() - start
+        print(f"{warmed} field vectors at load; ranking {plain_seconds:.2f}s without fields, {field_seconds:.2f}s with")
+        assert plain.status_code == 200 and response.status_code == 200
+        # Only the job offer's own texts were new
+        assert len(cache) <= warmed + 2
+
+if __name__ == "__main__":
+    print("Testing Multi-Field Matching")
+    print("=" * 50)
+    test_field_similarities()
+    test_vectors_are_cached_by_normalized_text()
+    test_field_weights_change_the_ranking()
+    test_invalid_field_weights()
+    test_api_rerank_and_cascade_with_fields()
+    test_catalog_fields_vectorized_at_load()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for department and location pre-filters
+Uses the Flask test client, no running server needed
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.catalog import build_catalog
+from app.filters import parse_filters, matches_filters
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+profiles = generate_user_profiles(400, seed=11)
+jobs = generate_job_offers(200, seed=11)
+
+def test_posting_lists_match_a_full_scan():
+    """Catalog selections equal filtering every record"""
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = build_catalog(jobs, 'jobs', os.path.join(directory, 'jobs.rcat'))
+        for raw in ({'department': 'Finance'}, {'location': ['Casablanca', 'fès']},
+                    {'department': ['IT', 'Marketing'], 'location': 'Rabat'}, {'department': 'Unknown'}):
+            filters = parse_filters(raw)
+            expected = [i for i, job in enumerate(jobs) if matches_filters(job, 'jobs', filters)]
+            print(f"{raw}: {len(expected)} jobs")
+            assert catalog.select(filters).tolist() == expected
+        assert catalog.select(None).tolist() == list(range(len(jobs)))
+
+def test_catalog_query_scores_only_the_slice():
+    """Without userProfiles the profile catalog is filtered before scoring"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'profiles.rcat')
+        build_catalog(profiles, 'profiles', path)
+        client = create_app({'PROFILE_CATALOG': path}).test_client()
+        filters = {'department': 'Finance', 'location': 'Casablanca'}
+        selected = [p for p in profiles if p['department'] == 'Finance' and p['localisation'] == 'Casablanca']
+
+        response = client.post('/recommend/candidates-for-job', json={'jobOffer': jobs[0], 'filters': filters})
+        assert response.status_code == 200
+        print(f"Filtered: {response.headers['X-Recommendation-Filtered']}, scored: {response.headers['X-Recommendation-Scored']}")
+        assert response.headers['X-Recommendation-Filtered'] == f"{len(selected)}/{len(profiles)}"
+        assert response.headers['X-Recommendation-Scored'] == f"{len(selected)}/{len(selected)}"
+        matricules = {r['userProfile']['matricule'] for r in response.get_json()}
+        assert matricules <= {p['matricule'] for p in selected}
+
+        # Same ranking as sending the slice in the payload
+        explicit = client.post('/recommend/candidates-for-job', json={'jobOffer': jobs[0], 'userProfiles': profiles, 'filters': filters})
+        assert explicit.headers['X-Recommendation-Filtered'] == f"{len(selected)}/{len(profiles)}"
+        assert [r['score'] for r in explicit.get_json()] == [r['score'] for r in response.get_json()]
+
+def test_job_filters_and_validation():
+    """Job offers can be filtered too, and malformed filters get a 400"""
+    client = create_app().test_client()
+    response = client.post('/recommend/jobs-for-candidate',
+                           json={'userProfile': profiles[0], 'jobOffers': jobs, 'filters': {'department': 'IT'}})
+    assert response.status_code == 200
+    assert all(r['jobOffer']['departement'] == 'IT' for r in response.get_json())
+
+    for filters in ({'salary': '10k'}, {'department': []}, {'location': 3}):
+        response = client.post('/recommend/jobs-for-candidate',
+                               json={'userProfile': profiles[0], 'jobOffers': jobs, 'filters': filters})
+        assert response.status_code == 400
+    # Without a catalog the candidate list stays required
+    response = client.post('/recommend/candidates-for-job', json={'jobOffer': jobs[0]})
+    assert response.status_code == 400
+
+if __name__ == "__main__":
+    print("Testing Pre-filters")
+    print("=" * 50)
+
+    test_posting_lists_match_a_full_scan()
+    test_catalog_query_scores_only_the_slice()
+    test_job_filters_and_validation()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test script for the character-trigram fuzzy skill index
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.recommender as recommender
+from app.fuzzy import SkillTrigramIndex, resolve_fuzzy_matches, is_close_spelling
+from app.recommender import calculate_direct_matches
+
+def test_close_spellings_are_neighbours():
+    """Typos and near spellings are neighbours, unrelated skills sharing trigrams are not"""
+    index = SkillTrigramIndex(['python', 'postgresql', 'javascript', 'gestion de projet'])
+    neighbours = index.neighbours(['pyhton', 'postgres', 'java', 'gestion'])
+    print(f"Neighbours: {neighbours}")
+    assert neighbours['pyhton'] == {'python'}
+    assert neighbours['postgres'] == {'postgresql'}
+    assert neighbours['java'] == frozenset()
+    assert neighbours['gestion'] == frozenset()
+    assert is_close_spelling('pyhton', 'python')
+    assert not is_close_spelling('java', 'javascript')
+
+def test_request_resolved_in_one_pass():
+    """All pairs of a request share one resolution keyed by job competency"""
+    pairs = [(['postgresql', 'django'], ['postgres', 'python']), (['pyhton'], ['postgres', 'python'])]
+    matches = resolve_fuzzy_matches(pairs)
+    assert matches['postgres'] == {'postgresql'}
+    assert matches['python'] == {'pyhton'}
+
+def test_direct_matching_keeps_containment():
+    """Contained skills and typos score as containment, with or without a resolved request"""
+    assert calculate_direct_matches(['postgresql', 'django'], ['postgres', 'django']) == 1.8
+    assert calculate_direct_matches(['javascript'], ['java']) == 0.8
+    assert calculate_direct_matches(['postgresql'], ['sql']) == 0.8
+    assert calculate_direct_matches(['microsoft excel avance'], ['excel']) == 0.8
+    assert calculate_direct_matches(['pyhton'], ['python']) == 0.8
+    pairs = [(['pyhton'], ['python'])]
+    assert calculate_direct_matches(['pyhton'], ['python'], resolve_fuzzy_matches(pairs)) == 0.8
+
+    previous = recommender.FUZZY_MATCH_THRESHOLD
+    recommender.FUZZY_MATCH_THRESHOLD = None
+    try:
+        assert calculate_direct_matches(['javascript'], ['java']) == 0.8
+        assert calculate_direct_matches(['pyhton'], ['python']) == 0
+    finally:
+        recommender.FUZZY_MATCH_THRESHOLD = previous
+
+if __name__ == "__main__":
+    print("Testing Trigram Fuzzy Skill Index")
+    print("=" * 50)
+
+    test_close_spellings_are_neighbours()
+    test_request_resolved_in_one_pass()
+    test_direct_matching_keeps_containment()
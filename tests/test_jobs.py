@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the asynchronous bulk job API
+Uses the Flask test client, no running server needed
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.recommender import match_candidates_for_job
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+profiles = generate_user_profiles(80, seed=14)
+jobs = generate_job_offers(5, seed=14)
+
+def wait_until_finished(client, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f'/jobs/{job_id}').get_json()
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_submit_poll_and_fetch():
+    """A bulk job returns an id at once and produces the synchronous rankings"""
+    with tempfile.TemporaryDirectory() as directory:
+        client = create_app({'JOB_DIR': directory}).test_client()
+        response = client.post('/jobs', json={'jobOffers': jobs, 'userProfiles': profiles, 'top_k': 10})
+        assert response.status_code == 202
+        job_id = response.get_json()['id']
+        assert response.headers['Location'] == f'/jobs/{job_id}'
+
+        # Following streams every offer as soon as it is ranked
+        streamed = [json.loads(line) for line in client.get(f'/jobs/{job_id}/results?follow=1').get_data(as_text=True).splitlines()]
+        status = wait_until_finished(client, job_id)
+        print(f"Job {job_id}: {status['status']}, {status['completed']}/{status['total']}")
+        assert status['status'] == 'done' and status['completed'] == len(jobs)
+
+        lines = [json.loads(line) for line in client.get(f'/jobs/{job_id}/results').get_data(as_text=True).splitlines()]
+        assert lines == streamed
+        assert [line['jobId'] for line in lines] == [job['id'] for job in jobs]
+        for job, line in zip(jobs, lines):
+            assert line['results'] == match_candidates_for_job(job, profiles, top_k=10)
+        tail = client.get(f'/jobs/{job_id}/results?offset=3').get_data(as_text=True).splitlines()
+        assert [json.loads(line)['index'] for line in tail] == [3, 4]
+
+def test_queue_depth_and_retention():
+    """Submissions beyond the queue depth get a 429 and finished jobs expire"""
+    with tempfile.TemporaryDirectory() as directory:
+        idle = create_app({'JOB_DIR': directory, 'JOB_WORKERS': 0, 'JOB_QUEUE_DEPTH': 1}).test_client()
+        assert idle.post('/jobs', json={'jobOffers': jobs[:1], 'userProfiles': profiles}).status_code == 202
+        response = idle.post('/jobs', json={'jobOffers': jobs[:1], 'userProfiles': profiles})
+        assert response.status_code == 429 and response.headers['Retry-After']
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = create_app({'JOB_DIR': directory, 'JOB_RETENTION': 0.5}).test_client()
+        first = client.post('/jobs', json={'jobOffers': jobs[:1], 'userProfiles': profiles[:10]}).get_json()['id']
+        wait_until_finished(client, first)
+        time.sleep(0.6)
+        second = client.post('/jobs', json={'jobOffers': jobs[:1], 'userProfiles': profiles[:10]}).get_json()['id']
+        assert client.get(f'/jobs/{first}').status_code == 404
+        wait_until_finished(client, second)
+        assert client.get('/jobs/../../etc').status_code == 404
+        assert client.post('/jobs', json={'jobOffers': [], 'userProfiles': profiles}).status_code == 400
+
+if __name__ == "__main__":
+    print("Testing Bulk Job API")
+    print("=" * 50)
+
+    test_submit_poll_and_fetch()
+    test_queue_depth_and_retention()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test script for the load-test harness
+Checks payload profiles are replayable and runs a one-second load
+"""
+
+import sys
+import os
+import tempfile
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(base_dir)
+sys.path.append(os.path.join(base_dir, 'scripts'))
+
+from load_test import build_payloads, save_payloads, load_payloads, run_load, LocalServer
+from app.synthetic import generate_user_profiles
+
+def test_payload_profiles_are_replayable():
+    """The same profile and seed always build the same payloads, also after a save/load"""
+    first = build_payloads('synthetic-small', 10, ['candidates', 'jobs'], seed=3)
+    second = build_payloads('synthetic-small', 10, ['candidates', 'jobs'], seed=3)
+    assert first == second
+    assert generate_user_profiles(5, seed=1) != generate_user_profiles(5, seed=2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'payloads.jsonl')
+        save_payloads(first, path)
+        assert load_payloads(path) == first
+
+def test_short_load_against_local_server():
+    """A short closed-loop run reports latency percentiles for both endpoints"""
+    payloads = build_payloads('sample', 4, ['candidates', 'jobs'])
+    with LocalServer('--workers 1') as server:
+        report = run_load(server.url, payloads, rps=0, concurrency=2, duration=1.0)
+    print(f"Load report: {report}")
+    for endpoint in ('candidates', 'jobs'):
+        assert report[endpoint]['requests'] > 0
+        assert report[endpoint]['error_rate'] == 0.0
+        assert report[endpoint]['p50'] <= report[endpoint]['p99']
+
+if __name__ == "__main__":
+    print("Testing Load-Test Harness")
+    print("=" * 50)
+
+    test_payload_profiles_are_replayable()
+    test_short_load_against_local_server()
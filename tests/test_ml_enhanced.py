@@ -168,7 +168,8 @@ def test_model_loading():
     print("\n🔧 Testing ML Model Loading...")
     
     try:
-        from app.recommender import ML_MODEL
+        from app.recommender import get_model
+        ML_MODEL = get_model()
         if ML_MODEL is not None:
             print("✅ Pre-trained ML model loaded successfully!")
             print(f"   Model: {ML_MODEL}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for cursor pagination over cached rankings
+Uses the Flask test client, no running server needed
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.api as api
+from app import create_app
+from app.cache import RankingCache
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+profiles = generate_user_profiles(90, seed=12)
+job_offer = generate_job_offers(1, seed=12)[0]
+
+def fetch_all_pages(client, payload):
+    response = client.post('/recommend/candidates-for-job', json=payload)
+    assert response.status_code == 200
+    pages = [response.get_json()]
+    while 'X-Recommendation-Cursor' in response.headers:
+        response = client.get('/recommend/page', query_string={'cursor': response.headers['X-Recommendation-Cursor']})
+        assert response.status_code == 200
+        pages.append(response.get_json())
+    return pages
+
+def test_pages_follow_the_full_ranking_without_rescoring():
+    """Concatenated pages equal the unpaginated ranking and only the first page scores"""
+    client = create_app().test_client()
+    full = client.post('/recommend/candidates-for-job', json={'jobOffer': job_offer, 'userProfiles': profiles}).get_json()
+
+    calls = []
+    original = api.match_candidates_for_job
+    api.match_candidates_for_job = lambda *args, **kwargs: calls.append(1) or original(*args, **kwargs)
+    try:
+        pages = fetch_all_pages(client, {'jobOffer': job_offer, 'userProfiles': profiles, 'page_size': 4})
+    finally:
+        api.match_candidates_for_job = original
+    print(f"Pages: {[len(page) for page in pages]}, scoring calls: {len(calls)}")
+    assert len(full) > 8
+    assert [len(page) for page in pages[:-1]] == [4] * (len(pages) - 1) and 0 < len(pages[-1]) <= 4
+    assert [r for page in pages for r in page] == full
+    assert len(calls) == 1
+
+def test_expired_and_evicted_cursors():
+    """Cursors stop working after the TTL or once the cache is full; bad ones get a 400"""
+    client = create_app({'RESULT_CACHE_TTL': 0.2}).test_client()
+    response = client.post('/recommend/candidates-for-job', json={'jobOffer': job_offer, 'userProfiles': profiles, 'page_size': 2})
+    cursor = response.headers['X-Recommendation-Cursor']
+    time.sleep(0.3)
+    assert client.get('/recommend/page', query_string={'cursor': cursor}).status_code == 410
+    assert client.get('/recommend/page', query_string={'cursor': 'nonsense'}).status_code == 400
+
+    cache = RankingCache(max_entries=2, ttl=60)
+    keys = [cache.put(index) for index in range(3)]
+    assert cache.get(keys[0]) is None and cache.get(keys[2]) == 2 and len(cache) == 2
+
+def test_ranking_id_is_not_a_cursor():
+    """A keep_components ranking id used as a cursor is rejected with 400, not a server error"""
+    client = create_app().test_client()
+    response = client.post('/recommend/candidates-for-job', json={'jobOffer': job_offer, 'userProfiles': profiles, 'keep_components': True})
+    ranking = response.headers['X-Recommendation-Ranking']
+    response = client.get('/recommend/page', query_string={'cursor': f"{ranking}.0"})
+    assert response.status_code == 400 and 'paginated' in response.get_json()['error']
+
+def test_single_page_needs_no_cursor():
+    """A ranking that fits in one page is not cached"""
+    app = create_app()
+    response = app.test_client().post('/recommend/candidates-for-job',
+                                      json={'jobOffer': job_offer, 'userProfiles': profiles, 'top_k': 5, 'page_size': 20})
+    assert len(response.get_json()) == 5
+    assert 'X-Recommendation-Cursor' not in response.headers
+    assert len(app.extensions['results']) == 0
+
+if __name__ == "__main__":
+    print("Testing Cursor Pagination")
+    print("=" * 50)
+
+    test_pages_follow_the_full_ranking_without_rescoring()
+    test_expired_and_evicted_cursors()
+    test_ranking_id_is_not_a_cursor()
+    test_single_page_needs_no_cursor()
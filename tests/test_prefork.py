@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the pre-fork launcher
+Starts two workers on a free port and sends a few requests
+"""
+
+import sys
+import os
+import gc
+import socket
+import subprocess
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+from app import create_prefork_app
+from app.prefork import worker_memory
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for_line(process, marker: str, timeout: float = 60.0) -> str:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        line = process.stdout.readline()
+        if marker in line:
+            return line
+    raise AssertionError(f"'{marker}' not printed by the launcher")
+
+def test_worker_memory_of_current_process():
+    """Memory report gives rss >= pss >= uss on Linux"""
+    memory = worker_memory(os.getpid())
+    print(f"Current process memory: {memory}")
+    if memory is not None:
+        assert memory['rss'] >= memory['pss'] >= memory['uss'] > 0
+
+def test_prefork_app_leaves_collection_enabled():
+    """The parent freezes its heap but keeps collecting new objects, also when loading fails"""
+    try:
+        create_prefork_app()
+        assert gc.isenabled() and gc.get_freeze_count() > 0
+        with pytest.raises(FileNotFoundError):
+            create_prefork_app({'PROFILE_CATALOG': os.path.join(base_dir, 'missing.rcat')})
+        assert gc.isenabled()
+    finally:
+        gc.unfreeze()
+        gc.enable()
+
+def test_prefork_workers_serve_requests():
+    """Workers share one socket and answer recommendation requests"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'app.prefork', '--workers', '2', '--port', str(port)],
+        cwd=base_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        print(wait_for_line(process, 'Serving on').strip())
+        payload = {
+            "jobOffer": {"titre_de_poste": "Développeur Python", "competences_requises": ["Python", "Django"]},
+            "userProfiles": [{"matricule": "DEV001", "competences": ["Python", "Django"]}],
+        }
+        with requests.Session() as session:
+            for _ in range(4):
+                response = session.post(f"http://127.0.0.1:{port}/recommend/candidates-for-job", json=payload, timeout=30)
+                assert response.status_code == 200
+                assert response.json()[0]['userProfile']['matricule'] == 'DEV001'
+        if sys.platform.startswith('linux'):
+            print(wait_for_line(process, 'worker').strip())
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+if __name__ == "__main__":
+    print("Testing Pre-Fork Launcher")
+    print("=" * 50)
+
+    test_worker_memory_of_current_process()
+    test_prefork_app_leaves_collection_enabled()
+    test_prefork_workers_serve_requests()
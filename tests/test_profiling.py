@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for opt-in per-request profiling
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+payload = {"jobOffer": generate_job_offers(1)[0], "userProfiles": generate_user_profiles(40)}
+
+def test_profiling_requires_admin_token():
+    """Without the admin token a profile request is refused"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = create_app({'ADMIN_TOKEN': 'secret', 'PROFILE_DIR': tmp}).test_client()
+        response = client.post('/recommend/candidates-for-job?profile=1', json=payload)
+        assert response.status_code == 403
+        response = client.post('/recommend/candidates-for-job?profile=1', json=payload, headers={'X-Admin-Token': 'wrong'})
+        assert response.status_code == 403
+        # Profiling stays off when no token is configured at all
+        client = create_app({'ADMIN_TOKEN': None, 'PROFILE_DIR': tmp}).test_client()
+        assert client.post('/recommend/candidates-for-job?profile=1', json=payload).status_code == 403
+
+def test_sampled_and_deterministic_profiles_are_stored():
+    """Both modes store their artifact with allocation counts and return the id"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = create_app({'ADMIN_TOKEN': 'secret', 'PROFILE_DIR': tmp, 'PROFILE_SAMPLE_INTERVAL_MS': 0.5}).test_client()
+        headers = {'X-Admin-Token': 'secret'}
+
+        response = client.post('/recommend/candidates-for-job?profile=1', json=payload, headers=headers)
+        assert response.status_code == 200
+        profile_id = response.headers['X-Profile-Id']
+        with open(os.path.join(tmp, profile_id, 'meta.json')) as f:
+            meta = json.load(f)
+        print(f"Sampled profile: {meta}")
+        assert meta['mode'] == 'sample' and meta['allocation_count'] > 0
+        assert meta['peak_traced_bytes'] >= meta['allocated_bytes']
+        with open(os.path.join(tmp, profile_id, 'allocations.txt')) as f:
+            assert f.readline() == f"# {meta['allocation_count']} allocations surviving the request, {meta['allocated_bytes']} bytes\n"
+        with open(os.path.join(tmp, profile_id, 'stacks.collapsed')) as f:
+            first_line = f.readline()
+        assert first_line.rsplit(' ', 1)[1].strip().isdigit()
+
+        response = client.post('/recommend/jobs-for-candidate?profile=cprofile', headers=headers,
+                               json={"userProfile": payload['userProfiles'][0], "jobOffers": generate_job_offers(10)})
+        assert os.path.exists(os.path.join(tmp, response.headers['X-Profile-Id'], 'profile.pstats'))
+
+def test_retention_limit():
+    """Only the newest PROFILE_RETENTION profiles are kept"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = create_app({'ADMIN_TOKEN': 'secret', 'PROFILE_DIR': tmp, 'PROFILE_RETENTION': 2}).test_client()
+        ids = []
+        for _ in range(4):
+            response = client.post('/recommend/candidates-for-job?profile=cprofile', json=payload, headers={'X-Admin-Token': 'secret'})
+            ids.append(response.headers['X-Profile-Id'])
+        assert len(os.listdir(tmp)) == 2
+        assert os.path.exists(os.path.join(tmp, ids[-1]))
+
+if __name__ == "__main__":
+    print("Testing Per-Request Profiling")
+    print("=" * 50)
+
+    test_profiling_requires_admin_token()
+    test_sampled_and_deterministic_profiles_are_stored()
+    test_retention_limit()
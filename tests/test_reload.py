@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for hot reload of catalog and artifact snapshots
+Uses the Flask test client, no running server needed
+"""
+
+import sys
+import os
+import gc
+import json
+import tempfile
+import threading
+import time
+import weakref
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.api as api
+import app.recommender as recommender
+from app import create_app
+from app.artifact import build_artifact
+from app.catalog import build_catalog
+from app.synthetic import generate_user_profiles, generate_job_offers
+from encoders import with_encoder
+
+old_profiles = generate_user_profiles(60, seed=31)
+new_profiles = generate_user_profiles(60, seed=32)
+job_offer = generate_job_offers(1, seed=31)[0]
+ADMIN = {'X-Admin-Token': 'secret'}
+
+def served_seeds(response):
+    """Seed prefixes (S31, S32) of the ranked profiles"""
+    assert response.status_code == 200
+    return {result['userProfile']['matricule'].split('-')[0] for result in response.get_json()}
+
+def rank(client):
+    return client.post('/recommend/candidates-for-job', json={'jobOffer': job_offer})
+
+def test_admin_reload_swaps_catalog_without_disturbing_requests_in_flight():
+    with tempfile.TemporaryDirectory() as directory:
+        old_path, new_path = os.path.join(directory, 'old.rcat'), os.path.join(directory, 'new.rcat')
+        build_catalog(old_profiles, 'profiles', old_path)
+        build_catalog(new_profiles, 'profiles', new_path)
+        app = create_app({'PROFILE_CATALOG': old_path, 'ADMIN_TOKEN': 'secret'})
+        client = app.test_client()
+        assert served_seeds(rank(client)) == {'S31'}
+        assert client.post('/admin/reload', json={'PROFILE_CATALOG': new_path}).status_code == 403
+
+        # A slow request started on the old snapshot finishes on it
+        started, in_flight = threading.Event(), []
+        original = api.match_candidates_for_job
+        def slow_match(*args, **kwargs):
+            started.set()
+            time.sleep(0.5)
+            return original(*args, **kwargs)
+        api.match_candidates_for_job = slow_match
+        thread = threading.Thread(target=lambda: in_flight.append(rank(app.test_client())))
+        thread.start()
+        try:
+            started.wait(10)
+            response = client.post('/admin/reload', json={'PROFILE_CATALOG': new_path, 'wait': True}, headers=ADMIN)
+        finally:
+            api.match_candidates_for_job = original
+        thread.join()
+        print(f"Reload: {response.get_json()}")
+        assert response.status_code == 200 and response.get_json()['version'] == 2
+        assert served_seeds(in_flight[0]) == {'S31'}
+        assert served_seeds(rank(client)) == {'S32'}
+
+        # A broken reload keeps the serving snapshot
+        response = client.post('/admin/reload', json={'PROFILE_CATALOG': os.path.join(directory, 'missing.rcat'), 'wait': True}, headers=ADMIN)
+        assert response.status_code == 500
+        status = client.get('/admin/snapshot', headers=ADMIN).get_json()
+        assert status['version'] == 2 and status['last_error'] and served_seeds(rank(client)) == {'S32'}
+
+def test_file_watch_reloads_replaced_catalog():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'profiles.rcat')
+        build_catalog(old_profiles, 'profiles', path)
+        app = create_app({'PROFILE_CATALOG': path, 'RELOAD_WATCH_INTERVAL': 0.1})
+        client = app.test_client()
+        assert served_seeds(rank(client)) == {'S31'}
+
+        # Build next to the live file and rename over it, as a deployment would
+        build_catalog(new_profiles, 'profiles', path + '.next')
+        os.replace(path + '.next', path)
+        deadline = time.monotonic() + 10
+        while app.extensions['snapshots'].current.version < 2:
+            assert time.monotonic() < deadline, 'watcher did not reload'
+            time.sleep(0.05)
+        assert served_seeds(rank(client)) == {'S32'}
+
+@with_encoder
+def test_artifact_swap_releases_the_old_snapshot():
+    """Requests keep their snapshot's artifact; once the old snapshot is dropped its mapped file is no longer referenced"""
+    with tempfile.TemporaryDirectory() as directory:
+        jobs_path = os.path.join(directory, 'jobs.json')
+        with open(jobs_path, 'w', encoding='utf-8') as f:
+            json.dump([job_offer], f)
+        paths = []
+        for name, profiles in (('old', old_profiles), ('new', new_profiles)):
+            profiles_path = os.path.join(directory, f'{name}.json')
+            with open(profiles_path, 'w', encoding='utf-8') as f:
+                json.dump(profiles, f)
+            paths.append(os.path.join(directory, f'{name}.artifact'))
+            build_artifact([profiles_path], [jobs_path], paths[-1])
+        encoded = len(recommender.ENGINE.skill_embeddings)
+        app = create_app({'ENGINE_ARTIFACT': paths[0], 'ADMIN_TOKEN': 'secret'})
+        old = app.extensions['snapshots'].current
+        old_artifact = weakref.ref(old.artifact)
+        response = app.test_client().post('/admin/reload', json={'ENGINE_ARTIFACT': paths[1], 'wait': True}, headers=ADMIN)
+        assert response.status_code == 200
+        new = app.extensions['snapshots'].current
+        # A request still holding the old snapshot scores with the old artifact
+        assert old.engine.artifact is old_artifact() and new.engine.artifact is new.artifact
+        assert recommender.ENGINE.artifact is new.artifact
+        # Artifact rows never enter the shared cache
+        assert len(recommender.ENGINE.skill_embeddings) == encoded
+        del old
+        gc.collect()
+        assert old_artifact() is None
+
+if __name__ == "__main__":
+    print("Testing hot reload of snapshots")
+    print("=" * 50)
+    test_admin_reload_swaps_catalog_without_disturbing_requests_in_flight()
+    test_file_watch_reloads_replaced_catalog()
+    test_artifact_swap_releases_the_old_snapshot()
+    print("All reload tests passed")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for configurable scoring and re-ranking from stored components
+Uses the Flask test client, no running server needed
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import app.recommender as recommender
+from app import create_app
+from app.recommender import combine_hybrid_score, combine_hybrid_scores, resolve_scoring
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+profiles = generate_user_profiles(60, seed=42)
+job_offer = generate_job_offers(1, seed=42)[0]
+new_scoring = {'weights': {'direct': 0.2, 'pretrained': 0.2, 'tfidf': 0.6}, 'no_model_cap': 0.9, 'min_score': 5}
+
+def test_vectorized_combination_matches_scalar():
+    """combine_hybrid_scores gives combine_hybrid_score for every pair and setting"""
+    rng = np.random.default_rng(0)
+    total = 5
+    direct_matches = rng.choice([0, 0.5, 0.8, 1, 2.3, 5], size=200)
+    tfidf = rng.uniform(0, 100, 200)
+    pretrained = np.where(rng.random(200) < 0.3, 0.0, rng.uniform(0, 100, 200))
+    components = np.column_stack([direct_matches / total * 100, tfidf, pretrained])
+    for scoring in (resolve_scoring(), resolve_scoring(new_scoring)):
+        expected = [combine_hybrid_score(d, total, t, p, scoring) for d, t, p in zip(direct_matches, tfidf, pretrained)]
+        assert np.allclose(combine_hybrid_scores(components, scoring), expected)
+
+def test_invalid_scoring_is_rejected():
+    client = create_app().test_client()
+    for scoring in ({'weights': {'semantic': 1}}, {'no_direct_cap': -1}, {'min_score': 'high'}, [0.4]):
+        response = client.post('/recommend/candidates-for-job', json={'jobOffer': job_offer, 'userProfiles': profiles, 'scoring': scoring})
+        assert response.status_code == 400, scoring
+
+def test_rerank_equals_a_fresh_ranking_without_rescoring():
+    """Re-weighting the kept components ranks like scoring again with the new settings"""
+    client = create_app().test_client()
+    payload = {'jobOffer': job_offer, 'userProfiles': profiles}
+    first = client.post('/recommend/candidates-for-job', json={**payload, 'keep_components': True, 'top_k': 5})
+    assert first.status_code == 200 and len(first.get_json()) <= 5
+    ranking = first.headers['X-Recommendation-Ranking']
+    fresh = client.post('/recommend/candidates-for-job', json={**payload, 'scoring': new_scoring}).get_json()
+
+    calls = []
+    original = recommender.calculate_tfidf_similarity
+    recommender.calculate_tfidf_similarity = lambda *args: calls.append(1) or original(*args)
+    try:
+        same = client.post('/recommend/rerank', json={'ranking': ranking})
+        reweighted = client.post('/recommend/rerank', json={'ranking': ranking, 'scoring': new_scoring})
+    finally:
+        recommender.calculate_tfidf_similarity = original
+    print(f"Fresh ranking: {len(fresh)} results, re-ranked: {len(reweighted.get_json())}, TF-IDF calls: {len(calls)}")
+    assert not calls
+    assert same.get_json()[:5] == first.get_json()
+    assert reweighted.headers['X-Recommendation-Scored'] == f'0/{len(profiles)}'
+    reranked = reweighted.get_json()
+    assert [r['userProfile'] for r in reranked] == [r['userProfile'] for r in fresh]
+    assert np.allclose([r['score'] for r in reranked], [r['score'] for r in fresh])
+
+def test_rerank_errors():
+    client = create_app({'RESULT_CACHE_SIZE': 1}).test_client()
+    assert client.post('/recommend/rerank', json={}).status_code == 400
+    assert client.post('/recommend/rerank', json={'ranking': 'unknown'}).status_code == 410
+    response = client.post('/recommend/candidates-for-job', json={'jobOffer': job_offer, 'userProfiles': profiles, 'keep_components': True})
+    assert client.post('/recommend/rerank', json={'ranking': response.headers['X-Recommendation-Ranking'], 'top_k': 0}).status_code == 400
+    chunked = create_app({'CHUNK_SIZE': 50}).test_client()
+    response = chunked.post('/recommend/candidates-for-job', json={'jobOffer': job_offer, 'userProfiles': profiles, 'keep_components': True})
+    assert response.status_code == 400
+
+if __name__ == "__main__":
+    print("Testing configurable scoring and re-ranking")
+    print("=" * 50)
+    test_vectorized_combination_matches_scalar()
+    test_invalid_scoring_is_rejected()
+    test_rerank_equals_a_fresh_ranking_without_rescoring()
+    test_rerank_errors()
+    print("All scoring tests passed")
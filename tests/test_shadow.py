@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for shadow-mode engine comparison and the metrics endpoint
+Uses the Flask test client, no running server needed
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.metrics import Metrics
+from app.shadow import ShadowRunner, compare_rankings
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+profiles = generate_user_profiles(50, seed=8)
+job_offer = generate_job_offers(1, seed=8)[0]
+payload = {'jobOffer': job_offer, 'userProfiles': profiles}
+
+def wait_for_runs(metrics, count, timeout=30.0):
+    end = time.monotonic() + timeout
+    while metrics.counter('recommender_shadow_runs_total', {'endpoint': 'candidates-for-job'}) < count:
+        assert time.monotonic() < end, 'shadow run did not finish'
+        time.sleep(0.05)
+
+def test_compare_rankings():
+    records = [{'matricule': str(i)} for i in range(4)]
+    primary = [{'r': records[i], 'score': 90.0 - i} for i in range(3)]
+    same = compare_rankings(primary, list(primary), 'r')
+    assert same['topk_overlap'] == 1.0 and abs(same['rank_correlation'] - 1.0) < 1e-9 and same['max_score_delta'] == 0.0
+    shadow = [{'r': records[3], 'score': 95.0}, {'r': records[2], 'score': 80.0}, {'r': records[1], 'score': 70.0}]
+    other = compare_rankings(primary, shadow, 'r')
+    print(f"Comparison: {other}")
+    assert other['common'] == 2 and other['topk_overlap'] == 2 / 3
+    assert abs(other['rank_correlation'] + 1.0) < 1e-9 and other['mean_score_delta'] == 13.5 and other['max_score_delta'] == 19.0
+
+def test_shadow_runs_in_background_and_exports_metrics():
+    """The served ranking is the primary one; the shadow comparison lands in /metrics"""
+    plain = create_app().test_client().post('/recommend/candidates-for-job', json=payload).get_json()
+    app = create_app({'SHADOW_ENGINE': {'scoring': {'weights': {'tfidf': 0.6}}}, 'SHADOW_SAMPLE_RATE': 1.0})
+    client = app.test_client()
+    response = client.post('/recommend/candidates-for-job', json=payload)
+    assert response.get_json() == plain
+    metrics = app.extensions['metrics']
+    wait_for_runs(metrics, 1)
+
+    overlap = metrics.summary('recommender_shadow_topk_overlap', {'endpoint': 'candidates-for-job'})
+    latency = metrics.summary('recommender_shadow_latency_seconds', {'endpoint': 'candidates-for-job', 'engine': 'shadow'})
+    delta = metrics.summary('recommender_shadow_score_delta', {'endpoint': 'candidates-for-job'})
+    print(f"Overlap: {overlap}, delta: {delta}")
+    assert 0.0 <= overlap['mean'] <= 1.0 and latency['count'] == 1 and delta['mean'] > 0
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'recommender_shadow_runs_total{endpoint="candidates-for-job"} 1' in text
+    assert 'recommender_shadow_latency_seconds_count{endpoint="candidates-for-job",engine="primary"} 1' in text
+
+def test_identical_engine_agrees():
+    app = create_app({'SHADOW_ENGINE': {}, 'SHADOW_SAMPLE_RATE': 1.0})
+    app.test_client().post('/recommend/candidates-for-job', json=payload)
+    metrics = app.extensions['metrics']
+    wait_for_runs(metrics, 1)
+    assert metrics.summary('recommender_shadow_topk_overlap', {'endpoint': 'candidates-for-job'})['min'] == 1.0
+    assert metrics.summary('recommender_shadow_score_delta', {'endpoint': 'candidates-for-job'})['max'] == 0.0
+
+def test_busy_shadow_skips_samples():
+    """With every shadow worker busy, new samples are skipped instead of queued"""
+    metrics = Metrics()
+    runner = ShadowRunner({}, 1.0, metrics, workers=1)
+    release = threading.Event()
+    blocking_match = lambda subject, items, **options: release.wait(10) and []
+    first = runner.submit('candidates-for-job', blocking_match, {}, [], {}, [], 0.0, 'userProfile')
+    assert runner.submit('candidates-for-job', blocking_match, {}, [], {}, [], 0.0, 'userProfile') is None
+    release.set()
+    assert first.result(10) is not None
+    assert metrics.counter('recommender_shadow_skipped_total', {'endpoint': 'candidates-for-job'}) == 1
+
+if __name__ == "__main__":
+    print("Testing shadow-mode engine comparison")
+    print("=" * 50)
+    test_compare_rankings()
+    test_shadow_runs_in_background_and_exports_metrics()
+    test_identical_engine_agrees()
+    test_busy_shadow_skips_samples()
+    print("All shadow tests passed")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the scatter-gather coordinator
+Starts one local server per shard (and one over the whole catalog) on free ports
+"""
+
+import sys
+import os
+import socket
+import tempfile
+import threading
+import time
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(base_dir)
+sys.path.append(os.path.join(base_dir, 'scripts'))
+
+import requests
+from load_test import LocalServer
+from app import create_app
+from app.catalog import build_catalog, split_catalog
+from app.coordinator import merge_rankings, _session
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+profiles = generate_user_profiles(240, seed=13)
+job_offer = generate_job_offers(1, seed=13)[0]
+
+def silent_server():
+    """A socket that accepts connections and never answers, like a stuck shard"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(8)
+    connections = []
+    def accept():
+        while True:
+            try:
+                connections.append(sock.accept()[0])
+            except OSError:
+                return
+    threading.Thread(target=accept, daemon=True).start()
+    return sock, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+def test_merge_keeps_global_order():
+    """Merged shard rankings are sorted by score and cut at top_k"""
+    shards = [[{'id': 'a', 'score': 90}, {'id': 'b', 'score': 40}], [{'id': 'c', 'score': 70}], []]
+    assert [r['id'] for r in merge_rankings(shards)] == ['a', 'c', 'b']
+    assert [r['id'] for r in merge_rankings(shards, top_k=2)] == ['a', 'c']
+
+def test_shard_session_is_shared_across_threads():
+    """Every coordinator thread reuses the pooled connections of one session"""
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(_session())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(session is _session() for session in sessions)
+
+def test_sharded_ranking_equals_single_node():
+    """Three shards give the top-k of one node over the whole catalog; lost shards give partial results"""
+    previous_seed = os.environ.get('PYTHONHASHSEED')
+    # Competency order (and so TF-IDF bigrams) follows set order; use the same one everywhere
+    os.environ['PYTHONHASHSEED'] = '0'
+    silent, silent_url = silent_server()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            full_path = os.path.join(directory, 'profiles.rcat')
+            build_catalog(profiles, 'profiles', full_path)
+            shard_paths = split_catalog(profiles, 'profiles', 3, os.path.join(directory, 'profiles'))
+            servers = [LocalServer(f"--workers 1 --profile-catalog {path}") for path in [full_path] + shard_paths]
+            for server in servers:
+                server.__enter__()
+            try:
+                payload = {'jobOffer': job_offer, 'top_k': 15, 'filters': {'department': ['IT', 'Finance']}}
+                expected = requests.post(servers[0].url + '/recommend/candidates-for-job', json=payload, timeout=60)
+
+                shard_urls = [server.url for server in servers[1:]]
+                client = create_app({'SHARD_URLS': shard_urls}).test_client()
+                response = client.post('/recommend/candidates-for-job', json=payload)
+                assert response.status_code == 200
+                print(f"Shards: {response.headers['X-Recommendation-Shards']}, scored: {response.headers['X-Recommendation-Scored']}")
+                assert response.headers['X-Recommendation-Shards'] == '3/3'
+                assert response.headers['X-Recommendation-Partial'] == 'false'
+                assert response.headers['X-Recommendation-Filtered'] == expected.headers['X-Recommendation-Filtered']
+                assert [r['score'] for r in response.get_json()] == [r['score'] for r in expected.json()]
+                assert {r['userProfile']['matricule'] for r in response.get_json()} <= {p['matricule'] for p in profiles}
+
+                # A stuck shard and a missing one: answer within the timeout with what the others found
+                missing_url = servers[0].url
+                servers[0].__exit__(None, None, None)
+                client = create_app({'SHARD_URLS': shard_urls + [silent_url, missing_url], 'SHARD_TIMEOUT_MS': 3000}).test_client()
+                start = time.monotonic()
+                response = client.post('/recommend/candidates-for-job', json=payload)
+                elapsed = time.monotonic() - start
+                print(f"Degraded: {response.headers['X-Recommendation-Shards']} in {elapsed:.1f}s")
+                assert response.status_code == 200 and elapsed < 10
+                assert response.headers['X-Recommendation-Shards'] == '3/5'
+                assert response.headers['X-Recommendation-Partial'] == 'true'
+                assert [r['score'] for r in response.get_json()] == [r['score'] for r in expected.json()]
+            finally:
+                for server in servers[1:]:
+                    server.__exit__(None, None, None)
+    finally:
+        silent.close()
+        if previous_seed is None:
+            del os.environ['PYTHONHASHSEED']
+        else:
+            os.environ['PYTHONHASHSEED'] = previous_seed
+
+if __name__ == "__main__":
+    print("Testing Sharded Scatter-Gather")
+    print("=" * 50)
+
+    test_merge_keeps_global_order()
+    test_shard_session_is_shared_across_threads()
+    test_sharded_ranking_equals_single_node()
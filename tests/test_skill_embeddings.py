@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for per-skill embedding scoring
+Uses a small deterministic encoder so it runs without downloading a model
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import app.recommender as recommender
+from app.engine import RecommenderEngine
+from encoders import with_encoder
+
+@with_encoder
+def test_identical_skills_score_full_coverage():
+    """A user holding every job skill covers the job completely"""
+    score = recommender.calculate_pretrained_similarity(['python', 'django', 'sql'], ['django', 'python'])
+    print(f"Identical skills score: {score:.1f}%")
+    assert abs(score - 100.0) < 1e-4
+
+@with_encoder
+def test_each_distinct_skill_encoded_once():
+    """The encoder only sees every distinct skill once across a batch and later calls"""
+    pairs = [
+        (['python', 'django'], ['python', 'sql']),
+        (['java', 'spring boot'], ['python', 'sql']),
+        (['python', 'sql'], ['java']),
+    ]
+    recommender.calculate_pretrained_similarity_batch(pairs)
+    recommender.calculate_pretrained_similarity(['python'], ['django'])
+    encoded = recommender.get_model().encoded
+    print(f"Encoded skills: {encoded}")
+    assert sorted(encoded) == sorted(set(encoded))
+    assert set(encoded) == {'python', 'django', 'sql', 'java', 'spring boot'}
+
+@with_encoder
+def test_batch_matches_single_pair_scoring():
+    """Batched padded scoring gives the same result as scoring each pair alone"""
+    pairs = [
+        (['python', 'django', 'react'], ['python']),
+        (['excel'], ['audit', 'comptabilite', 'excel']),
+        ([], ['python']),
+        (['python'], []),
+    ]
+    batch_scores = recommender.calculate_pretrained_similarity_batch(pairs)
+    for (user_comps, job_comps), batch_score in zip(pairs, batch_scores):
+        embeddings_user = recommender.get_skill_embeddings(user_comps) if user_comps else None
+        embeddings_job = recommender.get_skill_embeddings(job_comps) if job_comps else None
+        if embeddings_user is None or embeddings_job is None:
+            expected = 0.0
+        else:
+            similarity = embeddings_user @ embeddings_job.T
+            expected = float(np.clip(similarity.max(axis=0), 0.0, 1.0).mean() * 100)
+        print(f"{user_comps} vs {job_comps}: batch={batch_score:.2f}% expected={expected:.2f}%")
+        assert abs(batch_score - expected) < 1e-4
+
+def test_without_model_scores_zero():
+    """Without a pre-trained model the semantic component is disabled"""
+    scores = recommender.calculate_pretrained_similarity_batch([(['python'], ['python'])], RecommenderEngine(model=None))
+    assert scores.tolist() == [0.0]
+
+if __name__ == "__main__":
+    print("Testing Per-Skill Embedding Scoring")
+    print("=" * 50)
+
+    test_identical_skills_score_full_coverage()
+    test_each_distinct_skill_encoded_once()
+    test_batch_matches_single_pair_scoring()
+    test_without_model_scores_zero()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for compressed and MessagePack transport
+Uses the Flask test client, no running server needed
+"""
+
+import sys
+import os
+import gzip
+import json
+import zlib
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msgpack
+
+from app import create_app
+from app.synthetic import generate_user_profiles, generate_job_offers
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(base_dir, 'scripts'))
+from transport_benchmark import run_benchmark
+
+profiles = generate_user_profiles(40, seed=21)
+job_offer = generate_job_offers(1, seed=21)[0]
+payload = {'jobOffer': job_offer, 'userProfiles': profiles}
+body = json.dumps(payload).encode('utf-8')
+
+def post(client, data, **headers):
+    return client.post('/recommend/candidates-for-job', data=data, headers=headers,
+                       content_type=headers.pop('content_type', 'application/json'))
+
+def test_compressed_requests_and_responses_match_json():
+    """gzip and deflate bodies rank like plain JSON; responses are compressed on request"""
+    client = create_app().test_client()
+    plain = post(client, body)
+    assert plain.status_code == 200 and 'Content-Encoding' not in plain.headers
+    expected = plain.get_json()
+
+    response = post(client, gzip.compress(body), **{'Content-Encoding': 'gzip', 'Accept-Encoding': 'gzip'})
+    print(f"gzip response: {len(response.data)} bytes vs {len(plain.data)}")
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data)) == expected
+
+    response = post(client, zlib.compress(body), **{'Content-Encoding': 'deflate', 'Accept-Encoding': 'deflate'})
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert json.loads(zlib.decompress(response.data)) == expected
+
+def test_msgpack_round_trip():
+    """A MessagePack request accepting MessagePack gets the same ranking"""
+    client = create_app().test_client()
+    expected = post(client, body).get_json()
+    response = post(client, msgpack.packb(payload), content_type='application/msgpack', Accept='application/msgpack')
+    assert response.status_code == 200 and response.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(response.data, raw=False) == expected
+
+def test_rejected_bodies():
+    """Unknown encodings, decompression bombs and broken bodies are refused"""
+    client = create_app({'MAX_DECOMPRESSED_LENGTH': 4096}).test_client()
+    assert post(client, body, **{'Content-Encoding': 'br'}).status_code == 415
+    bomb = gzip.compress(b' ' * 10_000_000)
+    response = post(client, bomb, **{'Content-Encoding': 'gzip'})
+    print(f"Bomb of {len(bomb)} bytes: {response.status_code}")
+    assert response.status_code == 413
+    assert post(client, b'{"jobOffer":', **{}).status_code == 400
+    assert post(client, b'not gzip', **{'Content-Encoding': 'gzip'}).status_code == 400
+
+def test_benchmark_reports_every_encoding():
+    results = run_benchmark(profiles=20, repeat=2)
+    for rows in results.values():
+        assert set(rows) == {'json', 'json+gzip', 'json+deflate', 'msgpack', 'msgpack+gzip'}
+        assert rows['json+gzip']['bytes'] < rows['json']['bytes']
+
+if __name__ == "__main__":
+    print("Testing compressed and MessagePack transport")
+    print("=" * 50)
+    test_compressed_requests_and_responses_match_json()
+    test_msgpack_round_trip()
+    test_rejected_bodies()
+    test_benchmark_reports_every_encoding()
+    print("All transport tests passed")